@@ -23,6 +23,9 @@
 #
 # COMMAND LINE :    (the scissors 8< mean the command continues on the next line)
 #       ./check_local_cpu.py -w 75 -c 90 --debug
+#       ./check_local_cpu.py -w 75 -c 90 -a 300
+#       ./check_local_cpu.py -w 75 -c 90 -W 95 -C 99 -s 5 -S 10
+#       ./check_local_cpu.py -w 75 -c 90 -u /var/tmp/local_sampler.sock -n 300 -t p95
 #
 # NOTES :	1. This plugin requires the "psutil" library (http://code.google.com/p/psutil/).
 #                   Install it with :
@@ -30,6 +33,16 @@
 #                   Installing "psutil" this way requires the (Debian) packages :
 #                       python-pip
 #                       python-dev
+#               2. By default, the CPU usage is sampled during 1s. With '-a', it is computed since the previous
+#                  run (the cpu_times are saved in a state file) : the check doesn't wait. The first run, and
+#                  runs more than '-a' seconds after the previous one, sample during 0.1s.
+#               3. Also requires "numpy" : all the cores are computed at once.
+#               4. -w / -c apply to all the cores together, -W / -C to each core (a single saturated core is
+#                  reported), -s / -S to the steal time. The perfdata hold the busiest core and the user / system
+#                  / iowait / steal times, whatever the number of cores.
+#               5. With '-u', the CPU usage is read from the local sampler (see local_sampler.py) : the mean,
+#                  max or p95 ('-t') of its samples over the last '-n' seconds, so that bursts between 2 checks
+#                  are not missed. When the sampler doesn't answer, the check samples by itself (as without '-u').
 #
 # KNOWN BUGS AND LIMITATIONS :
 #               1. 
@@ -40,6 +53,8 @@
 from modules import CommandLine
 from modules import CheckLocalCpu
 from modules import Debug
+from modules import StateFile
+from modules import Threshold
 from modules import Utility
 
 myUtility   = Utility.Utility()
@@ -62,7 +77,7 @@ myCommandLine.declareArgument({
     'required'      : True,
     'default'       : '',
     'help'          : 'warning threshold in %%',    # '%%' escapes the '%' sign
-    'rule'          : '(\d+:?|:\d+|\d+:\d+)'
+    'rule'          : Threshold.RANGERULE
     })
 
 myCommandLine.declareArgument({
@@ -71,11 +86,87 @@ myCommandLine.declareArgument({
     'required'      : True,
     'default'       : None,
     'help'          : 'critical threshold in %%',
-    'rule'          : '(\d+:?|:\d+|\d+:\d+)'
+    'rule'          : Threshold.RANGERULE
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'a',
+    'longOption'    : 'snapshotMaxAge',
+    'required'      : False,
+    'default'       : 0,
+    'help'          : 'compute the CPU usage since the previous run when it is less than this many seconds old, '
+        + 'rather than sampling during 1s (default : 0, always sample)',
+    'rule'          : '\d+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'W',
+    'longOption'    : 'coreWarning',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'warning threshold on each core, in %%',
+    'rule'          : Threshold.RANGERULE
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'C',
+    'longOption'    : 'coreCritical',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'critical threshold on each core, in %%',
+    'rule'          : Threshold.RANGERULE
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 's',
+    'longOption'    : 'stealWarning',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'warning threshold on the steal time (all cores), in %%',
+    'rule'          : Threshold.RANGERULE
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'S',
+    'longOption'    : 'stealCritical',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'critical threshold on the steal time (all cores), in %%',
+    'rule'          : Threshold.RANGERULE
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'u',
+    'longOption'    : 'sampler',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'read the CPU usage from the local sampler listening on this Unix socket (optional)',
+    'rule'          : '[\w/\.\-]+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'n',
+    'longOption'    : 'samplerWindow',
+    'required'      : False,
+    'default'       : '300',
+    'help'          : 'with --sampler : the last seconds of samples to aggregate (default : 300)',
+    'rule'          : '\d+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 't',
+    'longOption'    : 'samplerStatistic',
+    'required'      : False,
+    'default'       : 'mean',
+    'help'          : 'with --sampler : mean, max or p95 of the samples (default : mean)',
+    'rule'          : '(mean|max|p95)'
     })
 
 myCommandLine.declareArgumentDebug()
+myCommandLine.declareArgumentImportProfile()
+myCommandLine.declareArgumentPerfDataJson()
 myCommandLine.readArgs()
+myPlugin.setPerfDataJsonFile(myCommandLine.getArgValue('perfDataJson'))
 #myCommandLine.showArgs()
 
 if not myCommandLine.checkArgsMatchRules():
@@ -86,7 +177,16 @@ if not myCommandLine.checkArgsMatchRules():
 # TODO : check that warning < critical and that kind of things ;-)
 
 
-myPlugin.getCpuUsagePercent()
+snapshotMaxAge = int(myCommandLine.getArgValue('snapshotMaxAge'))
+if not myCommandLine.getArgValue('sampler') or not myPlugin.getCpuUsageFromSampler(
+        socketPath      = myCommandLine.getArgValue('sampler'),
+        windowSeconds   = int(myCommandLine.getArgValue('samplerWindow')),
+        statistic       = myCommandLine.getArgValue('samplerStatistic')
+        ):
+    myPlugin.getCpuUsagePercent(
+        objStateFile            = StateFile.StateFile(myDebug, 'check_local_cpu') if snapshotMaxAge else None,
+        maxSnapshotAgeSeconds   = snapshotMaxAge
+        )
 
 
 #myDebug.show('WARNING = ' + myPlugin.getArgValue('warning'))
@@ -97,6 +197,15 @@ exitStatus = myPlugin.computeExitStatus(
     criticalThreshold   = myCommandLine.getArgValue('critical')
     )
 
+breakdownThresholds = {
+    'coreWarning'   : myCommandLine.getArgValue('coreWarning'),
+    'coreCritical'  : myCommandLine.getArgValue('coreCritical'),
+    'stealWarning'  : myCommandLine.getArgValue('stealWarning'),
+    'stealCritical' : myCommandLine.getArgValue('stealCritical'),
+    }
+breakdownExitStatus, breakdownMessage = myPlugin.computeBreakdownExitStatus(**breakdownThresholds)
+exitStatus = myPlugin.getWorstExitStatus([ exitStatus, breakdownExitStatus ])
+
 
 myPlugin.addPerfData(
     label   = 'CPU usage',
@@ -106,9 +215,11 @@ myPlugin.addPerfData(
     crit    = myCommandLine.getArgValue('critical'),
     min     = 0,
     max     =100)
+myPlugin.addBreakdownPerfData(**breakdownThresholds)
 
-# TODO : determine exitStatus
-myPlugin.exit(exitStatus  = exitStatus)
+myPlugin.exit(
+    exitStatus  = exitStatus,
+    exitMessage = breakdownMessage)
 
 
 
@@ -17,18 +17,26 @@
 #
 
 ######################################### check_snmp_NetApp_diskIO.py ###############################
-# FUNCTION :    This plugin ...
+# FUNCTION :    Check the NetApp disks read / write rates (bytes per second) through SNMP.
 #
 # VERSION :     20130311
 #
 # COMMAND LINE :    (the scissors 8< mean the command continues on the next line)
-#       ./check_snmp_NetApp_diskIO.py -w xxx -c yyy --debug
+#       ./check_snmp_NetApp_diskIO.py -H 192.168.1.101 -C public 8<
+#           -w 50000000 -c 100000000 --debug
+#       ./check_snmp_NetApp_diskIO.py -H 192.168.1.101 -v 3 -U nagios -A authPassPhrase -X privPassPhrase 8<
+#           -w 50000000 -c 100000000
 #
 # NOTES :	1. Required 'pysnmp' (http://pysnmp.sourceforge.net/)
 #                   installed with 'pip install pysnmp'
+#               2. The NetApp disk counters only ever grow : each run reads them once, and the rates are
+#                  computed against the values stored by the previous run (see CounterStore.py). The first
+#                  run only stores them.
+#               3. SNMP v3 : authentication / privacy with the pysnmp default protocols (MD5 / DES), enabled by
+#                  '--authKey' / '--privKey'.
 #
 # KNOWN BUGS AND LIMITATIONS :
-#               1.
+#               1. Rates are averaged over the time between 2 runs : the check interval.
 #
 ########################################## ##########################################################
 
@@ -36,9 +44,13 @@
 
 """
 
+from modules import CheckSnmpNetAppDiskIO
 from modules import CommandLine
-from modules import Check_snmp_NetApp_diskIO
+from modules import CounterStore
 from modules import Debug
+from modules import Snmp
+from modules import StateFile
+from modules import Threshold
 from modules import Utility
 
 myUtility   = Utility.Utility()
@@ -50,18 +62,81 @@ myCommandLine = CommandLine.CommandLine(
     objUtility  = myUtility
     )
 
-myPlugin    = CheckLocalCpu.CheckLocalCpu(
+myPlugin    = CheckSnmpNetAppDiskIO.CheckSnmpNetAppDiskIO(
     name        = 'CHECK NETAPP DISK IO',
     objDebug    = myDebug,
     )
 
+myCommandLine.declareArgument({
+    'shortOption'   : 'H',
+    'longOption'    : 'hostname',
+    'required'      : True,
+    'default'       : None,
+    'help'          : 'NetApp filer name or IP address',
+    'rule'          : '[A-Za-z0-9.:-]+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'p',
+    'longOption'    : 'snmpPort',
+    'required'      : False,
+    'default'       : 161,
+    'help'          : 'SNMP port (default : 161)',
+    'rule'          : '\d+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'C',
+    'longOption'    : 'community',
+    'required'      : False,
+    'default'       : 'public',
+    'help'          : 'SNMP community (default : public)',
+    'rule'          : '.+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'v',
+    'longOption'    : 'snmpVersion',
+    'required'      : False,
+    'default'       : '2c',
+    'help'          : 'SNMP version : 2c or 3 (default : 2c). The 64-bit counters are not available with SNMP v1.',
+    'rule'          : '(2c|3)'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'U',
+    'longOption'    : 'snmpUser',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'SNMP v3 user name (required with SNMP v3)',
+    'rule'          : '.+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'A',
+    'longOption'    : 'authKey',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'SNMP v3 authentication pass phrase, 8 characters or more (optional)',
+    'rule'          : '.{8,}'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'X',
+    'longOption'    : 'privKey',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'SNMP v3 privacy pass phrase, 8 characters or more (optional, requires --authKey)',
+    'rule'          : '.{8,}'
+    })
+
 myCommandLine.declareArgument({
     'shortOption'   : 'w',
     'longOption'    : 'warning',
     'required'      : True,
     'default'       : '',
-    'help'          : 'warning threshold in %%',    # '%%' escapes the '%' sign
-    'rule'          : '(\d+:?|:\d+|\d+:\d+)'
+    'help'          : 'warning threshold on the read and write rates, in bytes per second',
+    'rule'          : Threshold.RANGERULE
     })
 
 myCommandLine.declareArgument({
@@ -69,12 +144,15 @@ myCommandLine.declareArgument({
     'longOption'    : 'critical',
     'required'      : True,
     'default'       : None,
-    'help'          : 'critical threshold in %%',
-    'rule'          : '(\d+:?|:\d+|\d+:\d+)'
+    'help'          : 'critical threshold on the read and write rates, in bytes per second',
+    'rule'          : Threshold.RANGERULE
     })
 
 myCommandLine.declareArgumentDebug()
+myCommandLine.declareArgumentImportProfile()
+myCommandLine.declareArgumentPerfDataJson()
 myCommandLine.readArgs()
+myPlugin.setPerfDataJsonFile(myCommandLine.getArgValue('perfDataJson'))
 #myCommandLine.showArgs()
 
 if not myCommandLine.checkArgsMatchRules():
@@ -82,31 +160,60 @@ if not myCommandLine.checkArgsMatchRules():
         exitStatus  = 'UNKNOWN',
         exitMessage = 'args dont match rules :-(')
 
-# TODO : check that warning < critical and that kind of things ;-)
+if myCommandLine.getArgValue('snmpVersion') == '3' and not myCommandLine.getArgValue('snmpUser'):
+    myPlugin.exit(
+        exitStatus  = 'UNKNOWN',
+        exitMessage = 'SNMP v3 requires --snmpUser')
 
+if myCommandLine.getArgValue('privKey') and not myCommandLine.getArgValue('authKey'):
+    myPlugin.exit(
+        exitStatus  = 'UNKNOWN',
+        exitMessage = '--privKey requires --authKey')
+
+host = myCommandLine.getArgValue('hostname')
+port = int(myCommandLine.getArgValue('snmpPort'))
+
+mySnmp = Snmp.Snmp(
+    myUtility,
+    myDebug,
+    host        = host,
+    port        = port,
+    community   = myCommandLine.getArgValue('community'),
+    version     = myCommandLine.getArgValue('snmpVersion'),
+    user        = myCommandLine.getArgValue('snmpUser'),
+    authKey     = myCommandLine.getArgValue('authKey'),
+    privKey     = myCommandLine.getArgValue('privKey')
+    )
 
-myPlugin.getCpuUsagePercent()
+myCounterStore = CounterStore.CounterStore(
+    objDebug    = myDebug,
+    stateFile   = StateFile.StateFile(myDebug, 'check_snmp_NetApp_diskIO_' + host + '_' + str(port))
+    )
 
+if not myPlugin.getDiskIoRates(mySnmp, myCounterStore, host):
+    myPlugin.exit(
+        exitStatus  = 'UNKNOWN',
+        exitMessage = 'Cannot read the disk counters of ' + host)
 
-#myDebug.show('WARNING = ' + myPlugin.getArgValue('warning'))
-#myDebug.show('CRITICAL = ' + myPlugin.getArgValue('critical'))
+if myPlugin.readBytesPerSecond is None or myPlugin.writeBytesPerSecond is None:
+    myPlugin.exit(
+        exitStatus  = 'OK',
+        exitMessage = 'Disk counters stored : rates will be available on the next run')
 
 exitStatus = myPlugin.computeExitStatus(
     warningThreshold    = myCommandLine.getArgValue('warning'),
     criticalThreshold   = myCommandLine.getArgValue('critical')
     )
 
-
-myPlugin.addPerfData(
-    label   = 'NetApp disk IO',
-    value   = myPlugin.cpuUsagePercent,
-    uom     = '%',
-    warn    = myCommandLine.getArgValue('warning'),
-    crit    = myCommandLine.getArgValue('critical'),
-    min     = 0,
-    max     =100)
-
-# TODO : determine exitStatus
-myPlugin.exit(exitStatus  = exitStatus)
-
-
+for label, value in (('read', myPlugin.readBytesPerSecond), ('write', myPlugin.writeBytesPerSecond)):
+    myPlugin.addPerfData(
+        label   = label,
+        value   = value,
+        uom     = 'B',
+        warn    = myCommandLine.getArgValue('warning'),
+        crit    = myCommandLine.getArgValue('critical'),
+        min     = 0)
+
+myPlugin.exit(
+    exitStatus  = exitStatus,
+    exitMessage = 'read : %.0f B/s, write : %.0f B/s' % (myPlugin.readBytesPerSecond, myPlugin.writeBytesPerSecond))
@@ -33,11 +33,36 @@
 #       ./check_web.py --url="http://origin-www.gala.fr/l_actu/news_de_stars/deborah_francois_une_revelation_populaire_276187?$RANDOM" 8<
 #            --httpHostHeader="www.gala.fr" --httpMethod="GET" --httpStatusCode=200 --matchString="sans fausse note" -w 2500 -c 4000 --debug
 
+#   SEARCHING MANY STRINGS, SOME OF THEM MUST NOT BE ON THE PAGE :
+#       ./check_web.py --url="http://origin-www.voici.fr" --httpHostHeader="www.voici.fr" 8<
+#           --matchString="Voici" --matchString="kate" --rejectString="Fatal error" --rejectString="Exception" 8<
+#           -w 2500 -c 4000
+#
 #   PLAYING WITH EXPECTED HTTP STATUS CODES (no matchstring) :
 #       ./check_web.py --url="http://origin-www.voici.fr" --httpHostHeader="origin-www.voici.fr" 8<
 #           --httpMethod="GET" --httpStatusCode=301  -w 2500 -c 4000 --debug
 #
-# NOTES :	1. (none so far ;-)
+#   CHECKING MANY PAGES CONCURRENTLY (repeated --url and / or a targets file, one URL per line) :
+#       ./check_web.py --url="http://origin-www.voici.fr" --url="http://origin-www.gala.fr" 8<
+#           --targetsFile=/etc/nagios/web_targets.txt --concurrency=20 --maxConnectionsPerHost=4 8<
+#           --httpStatusCode=200 -w 2500 -c 4000
+#
+#   TELLING SLOW DNS FROM SLOW BACKENDS (each phase of the fetch can have its own thresholds) :
+#       ./check_web.py --url="http://origin-www.voici.fr" --httpStatusCode=200 -w 2500 -c 4000 8<
+#           --phaseWarning="dns=50,connect=100,ttfb=1000" --phaseCritical="dns=200,ttfb=2000"
+#
+# NOTES :	1. When given more than 1 URL, the pages are fetched concurrently (see modules/AsyncHttp.py),
+#                  each one is checked as a single page would be, and the plugin exits with the worst status.
+#                  The perfdata of a page are labeled 'host/query', with an index suffix ('_2', ...) when the
+#                  same page is given twice.
+#               2. Pages of the same origin share keep-alive connections : the perfdata then show a 0ms
+#                  connect time for the pages fetched on a reused connection.
+#               3. Pages are not stored : the body is searched for the matchStrings / rejectStrings while being
+#                  read, and reading stops as soon as there is nothing left to search for (or after --maxBytes bytes).
+#                  All the strings are searched at once, in a single pass over the page (see modules/StreamMatcher.py).
+#               4. The fetch is split into phases, each having its own perfdata : dns (name resolution),
+#                  connect (TCP), send (request), ttfb (until the response headers are received) and
+#                  download (body). They are measured with a monotonic clock (see modules/timer.py).
 #
 # KNOWN BUGS AND LIMITATIONS :
 #               1.
@@ -51,12 +76,12 @@
 # /TODO
 
 
-import httplib  # http://docs.python.org/library/httplib.htm
 import re
 
 from modules import CommandLine
 from modules import Debug
 from modules import NagiosPlugin
+from modules import Threshold
 from modules import Url
 from modules import Utility
 
@@ -84,18 +109,22 @@ class check_web(NagiosPlugin.NagiosPlugin):
 
         self._getHttpHostHeader()
 
-        myTimer = timer.Timer()
-        myTimer.start()
+        self._timer = timer.Timer()
+        self._timer.start()
         self._connectToHttpServer()
         self._sendHttpRequest()
         self._getHttpResponse()
-        self._durationMilliseconds = myTimer.stop() / 1000
-        return {
+        self._durationMilliseconds = self._timer.stop() / 1000
+        self._phasesMilliseconds = self._timer.getSpansMilliseconds()
+        result = {
             'httpStatusCode'        : self._httpStatusCode,
             'responseHeaders'       : self._responseHeaders,
-            'pageContent'           : self._pageContent,
+            'bytesRead'             : self._bytesRead,
             'durationMilliseconds'  : self._durationMilliseconds
             }
+        for phase in PHASES:
+            result[phase + 'Milliseconds'] = self._phasesMilliseconds.get(phase, 0)
+        return result
 
 
     def _getHttpHostHeader(self):
@@ -106,24 +135,43 @@ class check_web(NagiosPlugin.NagiosPlugin):
 
 
     def _connectToHttpServer(self):
-        # http://docs.python.org/library/httplib.html#httplib.HTTPConnection
+        """
+        The host name is resolved first, then the connection is opened to the resolved address,
+        so that the DNS and TCP connect phases are timed separately.
+        """
+        # http://docs.python.org/3/library/http.client.html#http.client.HTTPConnection
+        import http.client  # imported here so that '--help' and arguments errors don't pay for it
         import socket   # required to track the socket.timeout exception
+        port = int(self._objCommandLine.getArgValue('httpPort'))
         try:
-            self._httpConnection = httplib.HTTPConnection(
-                self._objUrl.getHostName(),
-                self._objCommandLine.getArgValue('httpPort')
+            addresses = socket.getaddrinfo(self._objUrl.getHostName(), port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            self.exit(
+                exitStatus  = 'CRITICAL',
+                exitMessage = 'Cannot resolve "' + self._objUrl.getHostName() + '" : ' + str(e),
                 )
-            #TODO : host must be HTTP (no httpS) and have no leading "http://"
-        except socket.timeout, e:
+        self._timer.lap('dns')
+
+        self._httpConnection = http.client.HTTPConnection(addresses[0][4][0], port)
+        #TODO : host must be HTTP (no httpS) and have no leading "http://"
+        try:
+            self._httpConnection.connect()
+        except socket.timeout:
             self.exit(
                 exitStatus  = 'CRITICAL',
                 exitMessage = 'Plugin timed out (>' + str(TIMEOUTSECONDS) + 's) while opening HTTP connection.',
                 )
+        except OSError as e:
+            self.exit(
+                exitStatus  = 'CRITICAL',
+                exitMessage = 'Cannot open HTTP connection : ' + str(e),
+                )
+        self._timer.lap('connect')
 
 
     def _sendHttpRequest(self):
         """
-        http://docs.python.org/library/httplib.html#httplib.HTTPConnection.request
+        http://docs.python.org/3/library/http.client.html#http.client.HTTPConnection.request
         example : http://www.dev-explorer.com/articles/using-python-httplib
         httpConnection.request('GET', '/', {}, {'Host': args.httpHostHeader})
         """
@@ -135,11 +183,12 @@ class check_web(NagiosPlugin.NagiosPlugin):
                 {},                                             # body. Used only for POST (?)
                 {'Host': self._httpHostHeader}                  # headers
                 )
-        except socket.timeout, e:
+        except socket.timeout:
             self.exit(
                 exitStatus  = 'CRITICAL',
                 exitMessage = 'Plugin timed out (>' + str(TIMEOUTSECONDS) + 's) while sending HTTP request.',
                 )
+        self._timer.lap('send')
 
 
     def _getHttpResponse(self):
@@ -147,32 +196,78 @@ class check_web(NagiosPlugin.NagiosPlugin):
         try:
             httpResponse = self._httpConnection.getresponse()
             # returns an HTTPResponse object :
-            #   http://docs.python.org/library/httplib.html#httplib.HTTPResponse
-            #   http://docs.python.org/library/httplib.html#httpresponse-objects
+            #   http://docs.python.org/3/library/http.client.html#httpresponse-objects
+            self._timer.lap('ttfb')     # the status line and headers are received
 
-            self._pageContent       = httpResponse.read()
             self._httpStatusCode    = httpResponse.status
             self._responseHeaders   = httpResponse.getheaders()
-        except socket.timeout, e:
+            self._readHttpResponseBody(httpResponse)
+            self._timer.lap('download')
+        except socket.timeout:
             self.exit(
                 exitStatus  = 'CRITICAL',
                 exitMessage = 'Plugin timed out (>' + str(TIMEOUTSECONDS) + 's) while waiting for HTTP response.',
                 )
 
 
-    def _receivedTheExpectedHttpStatusCode(self):
-        receivedHttpStatusCode = self._httpStatusCode   # This is an integer
+    def _readHttpResponseBody(self, httpResponse):
+        """
+        The body is streamed through the matcher instead of being stored : reading stops as soon as
+        there is nothing left to search for, or when 'maxBytes' bytes were read.
+        """
+        self._objMatcher    = self._getMatcher()
+        maxBytes            = self._getMaxBytes()
+        self._bytesRead     = 0
+        while maxBytes is None or self._bytesRead < maxBytes:
+            chunk = httpResponse.read(CHUNKBYTES if maxBytes is None else min(CHUNKBYTES, maxBytes - self._bytesRead))
+            if not chunk:
+                break
+            self._bytesRead += len(chunk)
+            if self._objMatcher and self._objMatcher.feed(chunk):
+                break
+        httpResponse.close()
+        self._objDebug.show('Read %s bytes of body', self._bytesRead)
+
+
+    def _getMatcher(self):
+        """ Return a new StreamMatcher for the matchStrings / rejectStrings, or None if there's nothing to match. """
+        if not self._wasGivenAsPluginParameter('matchString') and not self._wasGivenAsPluginParameter('rejectString'):
+            return None
+        from modules import StreamMatcher
+        # /!\ The page content is read as bytes
+        return StreamMatcher.StreamMatcher(
+            required    = [ string.encode() for string in self._objCommandLine.getArgValue('matchString') or [] ],
+            forbidden   = [ string.encode() for string in self._objCommandLine.getArgValue('rejectString') or [] ]
+            )
+
+
+    def _getMaxBytes(self):
+        maxBytes = self._objCommandLine.getArgValue('maxBytes')
+        return int(maxBytes) if maxBytes else None
+
+
+    def _receivedTheExpectedHttpStatusCode(self, receivedHttpStatusCode):
+        # receivedHttpStatusCode is an integer
 
         expectedHttpStatusCode = int(self._objCommandLine.getArgValue('httpStatusCode'))
         # /!\ Command line arguments are read as strings
 
-        self._objDebug.show("Expected HTTP status code : " + `expectedHttpStatusCode` + "\n" \
-            + '              Received HTTP status code : ' + `receivedHttpStatusCode`)
+        self._objDebug.show("Expected HTTP status code : %s\n              Received HTTP status code : %s",
+            expectedHttpStatusCode, receivedHttpStatusCode)
         return True if receivedHttpStatusCode == expectedHttpStatusCode else False
 
 
-    def _matchStringWasFound(self):
-        return True if re.search(self._objCommandLine.getArgValue('matchString'), self._pageContent) else False
+    def _describeMatches(self, objMatcher):
+        """ 'found : "a", "b" / missing : "c" / rejected : "Fatal error"' """
+        message = []
+        for label, strings in (
+                ('found',       objMatcher.getFoundRequired()),
+                ('missing',     objMatcher.getMissingRequired()),
+                ('rejected',    objMatcher.getFoundForbidden())
+                ):
+            if strings:
+                message.append(label + ' : ' + ', '.join('"' + string.decode() + '"' for string in strings))
+        return ' / '.join(message)
 
 
     def _wasGivenAsPluginParameter(self, pluginParameterName):
@@ -186,35 +281,236 @@ class check_web(NagiosPlugin.NagiosPlugin):
                                         The plugin is designed so that it'll exit when the timeout occurs.
                                         So, arriving here means 'no timeout'.
             2. httpStatusCode :         CRITICAL if not received as expected. Otherwise continue
-            3. matchString :            CRITICAL if not found. Otherwise continue
+            3. matchString :            CRITICAL if any is not found, or if any rejectString is found. Otherwise continue
             4. warn/crit thresholds :   OK / WARNING / CRITICAL based on values.
         """
 
-#        self._objDebug.show('Expected HTTP status code : ' + self.getArgValue('httpStatusCode'))
-        if self._wasGivenAsPluginParameter('httpStatusCode') and not self._receivedTheExpectedHttpStatusCode():
+        exitStatus, exitMessage = self._evaluateResult(
+            httpStatusCode          = self._httpStatusCode,
+            objMatcher              = self._objMatcher,
+            durationExitStatus      = self.computeExitStatus(
+                value               = self._durationMilliseconds,
+                warningThreshold    = self._objCommandLine.getArgValue('warning'),
+                criticalThreshold   = self._objCommandLine.getArgValue('critical')
+                )
+            )
+        if exitMessage:
             self.exit(
-                exitStatus  = 'CRITICAL',
-                exitMessage = 'Expected HTTP status code : ' + self._objCommandLine.getArgValue('httpStatusCode') +', received : ' + `self._httpStatusCode`,
+                exitStatus  = exitStatus,
+                exitMessage = exitMessage,
                 )
+        return exitStatus
 
-        if self._wasGivenAsPluginParameter('matchString') and not self._matchStringWasFound():
-            self.exit(
-                exitStatus  = 'CRITICAL',
-                exitMessage = 'Expected matchstring "' + self._objCommandLine.getArgValue('matchString') + '" not found',
+
+    def getMatchReport(self):
+        """ Which strings were found on the page, or '' if none were searched. """
+        return self._describeMatches(self._objMatcher) if self._objMatcher else ''
+
+
+    def _evaluateResult(self, httpStatusCode, objMatcher, durationExitStatus):
+        """
+        Apply the steps 2 to 4 of checkResult() to a single page, without exiting.
+        'durationExitStatus' is the result of step 4, computed by the caller.
+        Return the exit status, and the reason of the failure (empty when steps 2 and 3 are OK).
+        """
+        if self._wasGivenAsPluginParameter('httpStatusCode') and not self._receivedTheExpectedHttpStatusCode(httpStatusCode):
+            return 'CRITICAL', 'Expected HTTP status code : ' + self._objCommandLine.getArgValue('httpStatusCode') \
+                + ', received : ' + str(httpStatusCode)
+
+        if objMatcher and (objMatcher.getMissingRequired() or objMatcher.getFoundForbidden()):
+            return 'CRITICAL', self._describeMatches(objMatcher) \
+                + (' (within the first ' + str(self._getMaxBytes()) + ' bytes)' if self._getMaxBytes() else '')
+
+        return durationExitStatus, ''
+
+
+########################################## ##########################################################
+# PHASES : DNS, CONNECT, SEND, TTFB, DOWNLOAD
+
+    def _getPhaseThresholds(self, argName):
+        """ 'dns=50,connect=100' ==> { 'dns': 50, 'connect': 100 } """
+        thresholds = self._objCommandLine.getArgValue(argName)
+        if not thresholds:
+            return {}
+        return dict((phase, int(milliseconds)) for phase, milliseconds in
+            (threshold.split('=') for threshold in thresholds.split(',')))
+
+
+    def evaluatePhases(self, result):
+        """
+        Compare the duration of each phase to its own thresholds, if any.
+        Return the worst status, and which phases were too slow.
+        """
+        warningThresholds   = self._getPhaseThresholds('phaseWarning')
+        criticalThresholds  = self._getPhaseThresholds('phaseCritical')
+        exitStatuses        = [ 'OK' ]
+        slowPhases          = []
+        for phase in PHASES:
+            milliseconds = result[phase + 'Milliseconds']
+            if phase in criticalThresholds and milliseconds > criticalThresholds[phase]:
+                exitStatus, threshold = 'CRITICAL', criticalThresholds[phase]
+            elif phase in warningThresholds and milliseconds > warningThresholds[phase]:
+                exitStatus, threshold = 'WARNING', warningThresholds[phase]
+            else:
+                continue
+            exitStatuses.append(exitStatus)
+            slowPhases.append(phase + ' ' + str(round(milliseconds, 3)) + 'ms > ' + str(threshold) + 'ms')
+        return self.getWorstExitStatus(exitStatuses), ', '.join(slowPhases)
+
+
+    def addPhasesPerfData(self, labelPrefix, result):
+        warningThresholds   = self._getPhaseThresholds('phaseWarning')
+        criticalThresholds  = self._getPhaseThresholds('phaseCritical')
+        for phase in PHASES:
+            self.addPerfData(
+                label   = labelPrefix + phase,
+                value   = result[phase + 'Milliseconds'],
+                uom     = 'ms',
+                warn    = warningThresholds.get(phase, ''),
+                crit    = criticalThresholds.get(phase, '')
                 )
 
-        return self.computeExitStatus(
-            value               = self._durationMilliseconds,
-            warningThreshold    = self._objCommandLine.getArgValue('warning'),
-            criticalThreshold   = self._objCommandLine.getArgValue('critical')
+
+########################################## ##########################################################
+# MANY PAGES AT ONCE
+
+    def checkPages(self, objCommandLine, objUrls):
+        """
+        Fetch all the pages concurrently, check each of them as checkResult() does for a single page,
+        add 1 perfdata per page and exit with the worst status.
+        """
+        from modules import AsyncHttp
+
+        self._objCommandLine = objCommandLine
+
+        requests = []
+        for objUrl in objUrls:
+            self._objUrl = objUrl
+            self._getHttpHostHeader()
+            requests.append({
+                'host'          : objUrl.getHostName(),
+                'port'          : int(objCommandLine.getArgValue('httpPort')),
+                'method'        : objCommandLine.getArgValue('httpMethod'),
+                'query'         : objUrl.getQuery(),
+                'hostHeader'    : self._httpHostHeader,
+                'matcher'       : self._getMatcher(),
+                'maxBytes'      : self._getMaxBytes(),
+                })
+
+        myAsyncHttp = AsyncHttp.AsyncHttp(
+            objDebug                = self._objDebug,
+            concurrency             = int(objCommandLine.getArgValue('concurrency')),
+            timeoutSeconds          = TIMEOUTSECONDS,
+            maxConnectionsPerHost   = int(objCommandLine.getArgValue('maxConnectionsPerHost'))
             )
+        results = myAsyncHttp.fetchAll(requests)
+        durationExitStatuses = self._computeDurationExitStatuses([ result['durationMilliseconds'] for result in results ])
+
+        exitStatuses    = []
+        failures        = []
+        labels          = set()
+        for objUrl, request, result, durationExitStatus in zip(objUrls, requests, results, durationExitStatuses):
+            if result['error']:
+                exitStatus, exitMessage = 'CRITICAL', result['error']
+            else:
+                exitStatus, exitMessage = self._evaluateResult(
+                    httpStatusCode          = result['httpStatusCode'],
+                    objMatcher              = request['matcher'],
+                    durationExitStatus      = durationExitStatus
+                    )
+                if not exitMessage:
+                    phasesExitStatus, exitMessage = self.evaluatePhases(result)
+                    exitStatus = self.getWorstExitStatus([ exitStatus, phasesExitStatus ])
+            exitStatuses.append(exitStatus)
+            if self._exitCodes[exitStatus]:
+                failures.append(objUrl.getFullUrl() + ' : ' + exitStatus + (' (' + exitMessage + ')' if exitMessage else ''))
+
+            label = self._getPageLabel(objUrl, labels)
+            self.addPerfData(
+                label   = label,
+                value   = result['durationMilliseconds'],
+                uom     = 'ms',
+                warn    = objCommandLine.getArgValue('warning'),
+                crit    = objCommandLine.getArgValue('critical')
+                )
+            # the dns and connect times are 0 when the connection was reused
+            self.addPhasesPerfData(label + '_', result)
+
+        poolStats = myAsyncHttp.getPoolStats()
+        for stat in ('opened', 'reused'):
+            self.addPerfData(
+                label   = 'connections_' + stat,
+                value   = poolStats.get(stat, 0),
+                uom     = '',
+                warn    = '',
+                crit    = ''
+                )
+
+        self.exit(
+            exitStatus  = self.getWorstExitStatus(exitStatuses),
+            exitMessage = str(len(objUrls) - len(failures)) + '/' + str(len(objUrls)) + ' pages OK' \
+                + ''.join('\n' + failure for failure in failures)
+            )
+
+
+    def _getPageLabel(self, objUrl, labels):
+        """
+        'host/query', unique among 'labels' (the labels of the pages already checked) : a page given twice, or
+        'http://host' and 'http://host/', get an index suffix such as 'host/_2'.
+        """
+        pageLabel   = objUrl.getHostName() + objUrl.getQuery()
+        label       = pageLabel
+        index       = 1
+        while label in labels:
+            index += 1
+            label = pageLabel + '_' + str(index)
+        labels.add(label)
+        return label
+
+
+    def _computeDurationExitStatuses(self, durationsMilliseconds):
+        """ The thresholds are applied to all the durations at once with NumPy, when available. """
+        warningThreshold    = self._objCommandLine.getArgValue('warning')
+        criticalThreshold   = self._objCommandLine.getArgValue('critical')
+        try:
+            exitCodes, worstExitStatus = self.computeExitStatuses(durationsMilliseconds, warningThreshold, criticalThreshold)
+        except ImportError:
+            return [ self.computeExitStatus(duration, warningThreshold, criticalThreshold) for duration in durationsMilliseconds ]
+        if worstExitStatus == NagiosPlugin.okNoWarnString:
+            return [ worstExitStatus ] * len(durationsMilliseconds)
+        return [ Threshold.STATUSES[exitCode] for exitCode in exitCodes ]
+
+
+    def readTargetsFile(self, targetsFile):
+        """ One URL per line. Empty lines and lines starting with '#' are ignored. """
+        try:
+            with open(targetsFile) as targets:
+                lines = [ line.strip() for line in targets ]
+        except IOError as e:
+            self.exit(
+                exitStatus  = 'UNKNOWN',
+                exitMessage = 'Cannot read targets file : ' + str(e),
+                )
+        urls = [ line for line in lines if line and not line.startswith('#') ]
+        for url in urls:
+            if not re.search('^' + URLRULE + '$', url):
+                self.exit(
+                    exitStatus  = 'UNKNOWN',
+                    exitMessage = 'Invalid URL in targets file : "' + url + '"',
+                    )
+        return urls
 
 ########################################## ##########################################################
 # /CLASSES
 # CONFIG
 ########################################## ##########################################################
 TIMEOUTSECONDS  = 0.5
+CHUNKBYTES      = 16384
 PLUGINLABEL     = 'CHECK WEB'
+URLRULE         = 'http://[^:]+'
+PHASES          = ('dns', 'connect', 'send', 'ttfb', 'download')   # same as AsyncHttp.PHASES (checked by testU/test_CheckWeb.py)
+PHASERULE       = '(' + '|'.join(PHASES) + ')=\d+'
+PHASESRULE      = PHASERULE + '(,' + PHASERULE + ')*'
 ########################################## ##########################################################
 # /CONFIG
 # main()
@@ -238,10 +534,40 @@ myPlugin    = check_web(
 myCommandLine.declareArgument({
     'shortOption'   : 'u',
     'longOption'    : 'url',
-    'required'      : True,
+    'required'      : False,
     'default'       : None,
-    'help'          : 'URL of page to check (with leading "http://"). To specify a port number, use the "httpPort" directive.',
-    'rule'          : 'http://[^:]+'
+    'help'          : 'URL of page to check (with leading "http://"). To specify a port number, use the "httpPort" directive. Can be repeated.',
+    'rule'          : URLRULE,
+    'multiple'      : True,
+    'orArgGroup'    : 'url_OR_targetsFile'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'f',
+    'longOption'    : 'targetsFile',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'File listing the URLs of the pages to check, one per line (optional)',
+    'rule'          : '',
+    'orArgGroup'    : 'url_OR_targetsFile'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'n',
+    'longOption'    : 'concurrency',
+    'required'      : False,
+    'default'       : '10',
+    'help'          : 'How many pages are fetched at the same time when checking many pages (optional. Defaults to 10)',
+    'rule'          : '[1-9]\d*'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'k',
+    'longOption'    : 'maxConnectionsPerHost',
+    'required'      : False,
+    'default'       : '4',
+    'help'          : 'How many keep-alive connections can be opened to the same host when checking many pages (optional. Defaults to 4)',
+    'rule'          : '[1-9]\d*'
     })
 
 myCommandLine.declareArgument({
@@ -279,18 +605,39 @@ myCommandLine.declareArgument({
     'longOption'    : 'matchString',
     'required'      : False,
     'default'       : None,
-    'help'          : 'String to search on page',
+    'help'          : 'String to search on page. Can be repeated : all of them must be found',
     'rule'          : '[\w \.-]+',
+    'multiple'      : True,
     'orArgGroup'    : 'httpStatusCode_OR_matchString'
     })
 
+myCommandLine.declareArgument({
+    'shortOption'   : 'r',
+    'longOption'    : 'rejectString',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'String that must NOT be on page. Can be repeated : none of them must be found',
+    'rule'          : '[\w \.-]+',
+    'multiple'      : True,
+    'orArgGroup'    : 'httpStatusCode_OR_matchString'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'b',
+    'longOption'    : 'maxBytes',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'Stop reading the page after this many bytes (optional. Defaults to the whole page)',
+    'rule'          : '[1-9]\d*'
+    })
+
 myCommandLine.declareArgument({
     'shortOption'   : 'w',
     'longOption'    : 'warning',
     'required'      : True,
     'default'       : None,
-    'help'          : 'warning threshold in ms',
-    'rule'          : '(\d+:?|:\d+|\d+:\d+)'
+    'help'          : 'warning threshold in ms. Either a number (see NagiosPlugin.computeExitStatus()) or a Nagios range such as "~:2500"',
+    'rule'          : Threshold.RANGERULE
 # TODO : add param here usch as :
 #    'lessThanCrit' : True
 # so that we can check warn vs crit
@@ -301,8 +648,26 @@ myCommandLine.declareArgument({
     'longOption'    : 'critical',
     'required'      : True,
     'default'       : None,
-    'help'          : 'critical threshold in ms',
-    'rule'          : ''
+    'help'          : 'critical threshold in ms, same format as warning',
+    'rule'          : Threshold.RANGERULE
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'W',
+    'longOption'    : 'phaseWarning',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'warning thresholds in ms of the fetch phases, such as "dns=50,ttfb=800". Phases : ' + ', '.join(PHASES) + ' (optional)',
+    'rule'          : PHASESRULE
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'C',
+    'longOption'    : 'phaseCritical',
+    'required'      : False,
+    'default'       : None,
+    'help'          : 'critical thresholds in ms of the fetch phases, same format as phaseWarning (optional)',
+    'rule'          : PHASESRULE
     })
 
 myCommandLine.declareArgument({
@@ -349,7 +714,10 @@ myCommandLine.declareArgument({
 """
 
 myCommandLine.declareArgumentDebug()
+myCommandLine.declareArgumentImportProfile()
+myCommandLine.declareArgumentPerfDataJson()
 myCommandLine.readArgs()
+myPlugin.setPerfDataJsonFile(myCommandLine.getArgValue('perfDataJson'))
 
 if not myCommandLine.checkArgsMatchRules():
     myPlugin.exit(
@@ -368,7 +736,23 @@ if not optionalArgsAreOk:
 myCommandLine.showArgs()
 
 
-myUrl = Url.Url(full=myCommandLine.getArgValue('url'))
+urls = myCommandLine.getArgValue('url') or []
+if myCommandLine.getArgValue('targetsFile'):
+    urls += myPlugin.readTargetsFile(myCommandLine.getArgValue('targetsFile'))
+
+if not urls:
+    myPlugin.exit(
+        exitStatus  = 'UNKNOWN',
+        exitMessage = 'No URL to check')
+
+if len(urls) > 1:
+    myPlugin.checkPages(
+        objCommandLine  = myCommandLine,
+        objUrls         = [ Url.Url(full=url) for url in urls ]
+        )
+
+
+myUrl = Url.Url(full=urls[0])
 
 
 result = myPlugin.getPage(
@@ -378,12 +762,14 @@ result = myPlugin.getPage(
 
 #myDebug.show('HTTP status code : '  + `result['httpStatusCode']`)
 #myDebug.show('Duration : '          + `result['durationMilliseconds']` + 'ms')
-#myDebug.show('Page length : '       + `len(result['pageContent'])`)
+#myDebug.show('Bytes read : '        + `result['bytesRead']`)
 #myDebug.show('Response headers : '  + `result['responseHeaders']`)
 
 exitStatus = myPlugin.checkResult()
+phasesExitStatus, phasesMessage = myPlugin.evaluatePhases(result)
+exitStatus = myPlugin.getWorstExitStatus([ exitStatus, phasesExitStatus ])
 
-myDebug.show('exit status = "' + exitStatus + '"')
+myDebug.show('exit status = "%s"', exitStatus)
 
 
 myPlugin.addPerfData(
@@ -393,8 +779,9 @@ myPlugin.addPerfData(
     warn    = myCommandLine.getArgValue('warning'),
     crit    = myCommandLine.getArgValue('critical')
     )
+myPlugin.addPhasesPerfData('', result)
 
-myPlugin.exit(exitStatus)
+myPlugin.exit(exitStatus, ' / '.join(message for message in (myPlugin.getMatchReport(), phasesMessage) if message))
 
 
 
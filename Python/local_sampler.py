@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# local_sampler.py - Copyright (C) 2012 Matthieu FOURNET, fournet.matthieu@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+######################################### local_sampler.py ##########################################
+# FUNCTION :    Daemon sampling the local CPU, load and memory several times per second, and serving the
+#               mean / max / p95 over the last N seconds to 'check_local_cpu.py --sampler'.
+#
+# VERSION :     20131102
+#
+# COMMAND LINE :    (the scissors 8< mean the command continues on the next line)
+#       ./local_sampler.py --socket=/var/tmp/local_sampler.sock --interval=0.25 --window=900 &
+#       ./check_local_cpu.py -w 75 -c 90 --sampler=/var/tmp/local_sampler.sock --samplerWindow=300 8<
+#           --samplerStatistic=p95
+#
+# NOTES :	1. The socket is created with mode 0600 : run the sampler as the Nagios / NRPE user.
+#               2. Requires "psutil" and "numpy", as check_local_cpu.py.
+#
+# KNOWN BUGS AND LIMITATIONS :
+#               1. Aggregates are over what was sampled since the sampler started : right after a restart,
+#                  the window is not full.
+#
+########################################## ##########################################################
+
+
+from modules import CommandLine
+from modules import Debug
+from modules import LocalSampler
+from modules import Utility
+
+
+########################################## ##########################################################
+# CONFIG
+########################################## ##########################################################
+SOCKETPATH  = '/var/tmp/local_sampler.sock'
+########################################## ##########################################################
+# /CONFIG
+# main()
+########################################## ##########################################################
+
+
+myUtility   = Utility.Utility()
+myDebug     = Debug.Debug()
+
+myCommandLine = CommandLine.CommandLine(
+    description = 'Sample the local CPU, load and memory, and serve aggregates over a Unix socket.',
+    objDebug    = myDebug,
+    objUtility  = myUtility
+    )
+
+myCommandLine.declareArgument({
+    'shortOption'   : 's',
+    'longOption'    : 'socket',
+    'required'      : False,
+    'default'       : SOCKETPATH,
+    'help'          : 'Unix socket to listen on (optional. Defaults to ' + SOCKETPATH + ')',
+    'rule'          : '[\w/\.\-]+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'i',
+    'longOption'    : 'interval',
+    'required'      : False,
+    'default'       : '0.25',
+    'help'          : 'Seconds between 2 samples (optional. Defaults to 0.25)',
+    'rule'          : '(\d*[1-9]\d*(\.\d+)?|\d*\.\d*[1-9]\d*)'     # > 0
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'w',
+    'longOption'    : 'window',
+    'required'      : False,
+    'default'       : '900',
+    'help'          : 'Seconds of samples kept : the longest window clients can ask for (optional. Defaults to 900)',
+    'rule'          : '\d+'
+    })
+
+myCommandLine.declareArgumentDebug()
+myCommandLine.readArgs()
+
+if not myCommandLine.checkArgsMatchRules():
+    myDebug.die(exitMessage = 'args dont match rules :-(')
+
+mySampler = LocalSampler.LocalSampler(
+    objDebug        = myDebug,
+    socketPath      = myCommandLine.getArgValue('socket'),
+    intervalSeconds = float(myCommandLine.getArgValue('interval')),
+    windowSeconds   = int(myCommandLine.getArgValue('window'))
+    )
+myDebug.flush()
+mySampler.serve()
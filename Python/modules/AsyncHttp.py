@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+######################################### AsyncHttp.py ##############################################
+# FUNCTION :    Fetch many web pages concurrently on a single asyncio event loop, so that a single
+#               plugin run can check a whole list of URLs.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Requests are sent as HTTP/1.1 with keep-alive : connections to the same origin are
+#                  reused through HttpConnectionPool.
+#               2. Each phase of a fetch is timed separately (see PHASES). 'dns' and 'connect' are 0 when
+#                  the connection was reused.
+#
+########################################## ##########################################################
+
+
+import asyncio
+import socket
+
+from modules import HttpConnectionPool
+from modules import timer
+
+
+# The phases of a fetch, timed separately. 'ttfb' lasts until the response headers are received.
+PHASES = ('dns', 'connect', 'send', 'ttfb', 'download')
+
+
+class AsyncHttp(object):
+
+    def __init__(self, objDebug, concurrency=10, timeoutSeconds=0.5, maxConnectionsPerHost=4, idleTimeoutSeconds=5.0):
+        self._objDebug              = objDebug
+        self._concurrency           = concurrency
+        self._timeoutSeconds        = timeoutSeconds
+        self._maxConnectionsPerHost = maxConnectionsPerHost
+        self._idleTimeoutSeconds    = idleTimeoutSeconds
+        self._poolStats             = {}
+
+
+    def fetchAll(self, requests):
+        """
+        'requests' is a list of dicts with the keys : 'host', 'port', 'method', 'query', 'hostHeader',
+        and optionally 'matcher' (a StreamMatcher the body is fed to) and 'maxBytes'.
+        Return the results in the same order. Each result is a dict with the keys : 'httpStatusCode',
+        'responseHeaders', 'bytesRead', 'durationMilliseconds', '<phase>Milliseconds' for each of the
+        PHASES, 'reused' and 'error' (None unless the fetch failed).
+        """
+        return asyncio.run(self._fetchAll(requests))
+
+
+    def getPoolStats(self):
+        """ See HttpConnectionPool.getStats(). """
+        return self._poolStats
+
+
+    async def _fetchAll(self, requests):
+        semaphore   = asyncio.Semaphore(self._concurrency)
+        self._pool  = HttpConnectionPool.HttpConnectionPool(
+            objDebug                = self._objDebug,
+            maxConnectionsPerHost   = self._maxConnectionsPerHost,
+            idleTimeoutSeconds      = self._idleTimeoutSeconds
+            )
+        try:
+            return await asyncio.gather(*[ self._fetchWithinLimit(semaphore, request) for request in requests ])
+        finally:
+            self._poolStats = self._pool.getStats()
+            self._pool.closeAll()
+
+
+    async def _fetchWithinLimit(self, semaphore, request):
+        async with semaphore:
+            key         = (request['host'], request['port'], request['hostHeader'])
+            connection  = await self._pool.acquire(key)
+            result      = {
+                'httpStatusCode'        : None,
+                'responseHeaders'       : [],
+                'bytesRead'             : 0,
+                'reused'                : connection is not None,
+                'error'                 : None,
+                }
+            state   = { 'connection': connection, 'reusable': False }
+            myTimer = timer.Timer()
+            myTimer.start()
+            try:
+                await asyncio.wait_for(self._fetch(key, request, result, state, myTimer), self._timeoutSeconds)
+            except asyncio.TimeoutError:
+                result['error'] = 'Timed out (>' + str(self._timeoutSeconds) + 's)'
+            except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+                result['error'] = str(e)
+            finally:
+                self._pool.release(key, state['connection'], state['reusable'])
+            result['durationMilliseconds'] = myTimer.stop() / 1000
+            spans = myTimer.getSpansMilliseconds()
+            for phase in PHASES:
+                result[phase + 'Milliseconds'] = spans.get(phase, 0)
+            self._objDebug.show('%s%s : %s, %s%s, error : %s',
+                request['host'], request['query'], result['httpStatusCode'], spans,
+                ' (reused connection)' if result['reused'] else '', result['error'])
+            return result
+
+
+    async def _fetch(self, key, request, result, state, myTimer):
+        if state['connection'] is None:
+            await self._connect(key, state, myTimer)
+
+        try:
+            statusLine = await self._sendRequest(request, state['connection'], myTimer)
+        except ConnectionError:
+            if not result['reused']:
+                raise
+            statusLine = b''
+        if not statusLine and result['reused']:
+            # The server closed the idle connection in the meantime : open a new one, once.
+            state['connection'][1].close()
+            state['connection'] = None
+            result['reused']    = False
+            await self._connect(key, state, myTimer)
+            statusLine = await self._sendRequest(request, state['connection'], myTimer)
+
+        reader = state['connection'][0]
+        try:
+            httpVersion, httpStatusCode = statusLine.split()[0:2]   # 'HTTP/1.1 200 OK'
+            result['httpStatusCode'] = int(httpStatusCode)
+        except ValueError:
+            raise ValueError('Invalid HTTP status line : ' + repr(statusLine))
+
+        while True:
+            headerLine = (await reader.readline()).decode('latin-1').strip()
+            if not headerLine:
+                break
+            name, _, value = headerLine.partition(':')
+            result['responseHeaders'].append((name.strip(), value.strip()))
+        headers = dict((name.lower(), value.lower()) for name, value in result['responseHeaders'])
+        myTimer.lap('ttfb')
+
+        # The body is not stored : it is fed to the matcher, and reading stops as soon as the matcher
+        # is satisfied or 'maxBytes' were read. The connection can't be reused then.
+        bodyWasFullyRead    = True
+        matcher             = request.get('matcher')
+        maxBytes            = request.get('maxBytes')
+        async for chunk in self._readBody(reader, request, result['httpStatusCode'], headers):
+            if maxBytes:
+                chunk = chunk[:maxBytes - result['bytesRead']]
+            result['bytesRead'] += len(chunk)
+            if (matcher and matcher.feed(chunk)) or (maxBytes and result['bytesRead'] >= maxBytes):
+                bodyWasFullyRead = False
+                break
+        myTimer.lap('download')
+
+        state['reusable'] = bodyWasFullyRead \
+            and httpVersion == b'HTTP/1.1' \
+            and headers.get('connection') != 'close' \
+            and ('content-length' in headers or 'chunked' in headers.get('transfer-encoding', '') \
+                or not self._hasBody(request, result['httpStatusCode']))
+
+
+    async def _connect(self, key, state, myTimer):
+        host, port, hostHeader = key
+        addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        myTimer.lap('dns')
+        state['connection'] = await self._pool.connect(key, addresses[0][4][0])
+        myTimer.lap('connect')
+
+
+    async def _sendRequest(self, request, connection, myTimer):
+        """ Return the status line of the response, or b'' if the server closed the connection. """
+        reader, writer = connection
+        writer.write((request['method'] + ' ' + request['query'] + ' HTTP/1.1\r\n' \
+            + 'Host: ' + request['hostHeader'] + '\r\n' \
+            + 'Accept-Encoding: identity\r\n' \
+            + '\r\n').encode())
+        await writer.drain()
+        myTimer.lap('send')
+        return await reader.readline()
+
+
+    def _hasBody(self, request, httpStatusCode):
+        return not (request['method'] == 'HEAD' or httpStatusCode in (204, 304) or 100 <= httpStatusCode < 200)
+
+
+    async def _readBody(self, reader, request, httpStatusCode, headers):
+        """ Yield the response body chunk by chunk. """
+        if not self._hasBody(request, httpStatusCode):
+            return
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            while True:
+                chunkSize = int((await reader.readline()).split(b';')[0], 16)
+                if chunkSize == 0:
+                    while (await reader.readline()).strip():    # trailers
+                        pass
+                    return
+                yield await reader.readexactly(chunkSize)
+                await reader.readline()     # CRLF ending the chunk
+        elif 'content-length' in headers:
+            remaining = int(headers['content-length'])
+            while remaining:
+                chunk = await reader.read(min(remaining, 65536))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                remaining -= len(chunk)
+                yield chunk
+        else:   # the body ends when the server closes the connection
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    return
+                yield chunk
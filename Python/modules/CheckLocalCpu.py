@@ -22,44 +22,173 @@
 # VERSION :     20121104
 ########################################## ##########################################################
 
+import time
+
 from modules import NagiosPlugin
-import psutil
+
+
+# cpu_times() fields reported separately (those that exist on this OS)
+STATES = ('user', 'system', 'iowait', 'steal')
 
 
 class CheckLocalCpu(NagiosPlugin.NagiosPlugin):
 
 
-    def getCpuUsagePercent(self):
-        self.cpuUsagePercent = psutil.cpu_percent(interval=1)
-        self._objDebug.show(self.cpuUsagePercent)
+    def getCpuUsagePercent(self, objStateFile=None, maxSnapshotAgeSeconds=300, fallbackIntervalSeconds=0.1):
+        """
+        Without 'objStateFile' : sample the CPU usage during 1s.
+        With a StateFile : compute the CPU usage since the cpu_times() snapshot saved by the previous run, and save
+        the current one for the next run : no waiting. When there is no usable snapshot (first run, older than
+        'maxSnapshotAgeSeconds', taken less than 'fallbackIntervalSeconds' ago, reboot, CPU added / removed),
+        sample the CPU usage during 'fallbackIntervalSeconds' instead.
 
+        Set :
+            - cpuUsagePercent : all cores together
+            - coreUsagePercents : a NumPy array, 1 value per core
+            - maxCoreUsagePercent, maxCore : the busiest core
+            - statePercents : { state : % of the time of all cores together } for each of the STATES
+        """
+        if objStateFile is None:
+            fields, before  = self.readCpuTimes()
+            time.sleep(1)
+            fields, after   = self.readCpuTimes()
+            deltas          = after - before
+        else:
+            fields, deltas  = objStateFile.update(lambda state: self._getDeltasSinceSnapshot(
+                state, maxSnapshotAgeSeconds, fallbackIntervalSeconds))
+        self.computeCpuUsage(fields, deltas)
+        self._objDebug.show('CPU : %s%%, max core : %s%% (cpu%s), states : %s',
+            self.cpuUsagePercent, self.maxCoreUsagePercent, self.maxCore, self.statePercents)
 
-    def computeExitStatus(self, warningThreshold, criticalThreshold):
+
+    def getCpuUsageFromSampler(self, socketPath, windowSeconds=300, statistic='mean', timeoutSeconds=2):
         """
-        Compare the cpuUsagePercent VS the warn / crit thresholds
-        and return the corresponding exit status.
+        Ask the local sampler (see local_sampler.py) for the CPU usage over the last 'windowSeconds' : no sampling
+        here at all. 'statistic' : 'mean', 'max' or 'p95' of the samples, for the CPU usage, each core and the STATES.
+        Set the attributes listed in getCpuUsagePercent(), and return True. Return False when the sampler can't
+        answer (not running, no sample yet, ...) : the caller samples itself instead.
         """
-        # /!\ Thresholds are internally known as strings
-        warningThreshold    = int(warningThreshold)
-        criticalThreshold   = int(criticalThreshold)
+        import json
+        import socket
+        import numpy
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(timeoutSeconds)
+                client.connect(socketPath)
+                client.sendall(str(windowSeconds).encode())
+                client.shutdown(socket.SHUT_WR)
+                response = b''
+                while True:
+                    data = client.recv(65536)
+                    if not data:
+                        break
+                    response += data
+            aggregates = json.loads(response.decode())
+        except (OSError, ValueError) as e:
+            self._objDebug.show('Sampler %s : %s', socketPath, e)
+            return False
+        if not aggregates.get('samples') or aggregates['metrics']['cpu'][statistic] is None:
+            self._objDebug.show('Sampler %s : no sample yet', socketPath)
+            return False
 
-        exitStatus = ''
+        coreUsagePercents           = numpy.array([ numpy.nan if value is None else value for value in aggregates['cores'][statistic] ])
+        self.coreUsagePercents      = numpy.nan_to_num(coreUsagePercents)
+        self.cpuUsagePercent        = aggregates['metrics']['cpu'][statistic]
+        self.maxCore                = int(self.coreUsagePercents.argmax())
+        self.maxCoreUsagePercent    = float(self.coreUsagePercents[self.maxCore])
+        self.statePercents          = { state : aggregates['metrics'][state][statistic]
+            for state in STATES if aggregates['metrics'][state][statistic] is not None }
+        self._objDebug.show('CPU (sampler, %s over %ss, %d samples) : %s%%, max core : %s%% (cpu%s), states : %s',
+            statistic, windowSeconds, aggregates['samples'],
+            self.cpuUsagePercent, self.maxCoreUsagePercent, self.maxCore, self.statePercents)
+        return True
+
+
+    def readCpuTimes(self):
+        """ Return the cpu_times() field names, and the times as an array : 1 row per core, 1 column per field. """
+        import numpy    # imported here so that '--help' and arguments errors don't pay for it
+        import psutil
+        perCpuTimes = psutil.cpu_times(percpu=True)
+        return list(perCpuTimes[0]._fields), numpy.array(perCpuTimes, dtype=float)
+
+
+    def _getDeltasSinceSnapshot(self, state, maxSnapshotAgeSeconds, fallbackIntervalSeconds):
+        """ Compare the current cpu_times() with the snapshot in 'state', and replace the snapshot. """
+        import numpy
+        now             = time.time()
+        fields, times   = self.readCpuTimes()
+        age             = now - state.get('time', 0)
+        deltas          = None
+        if state.get('fields') == fields and fallbackIntervalSeconds <= age <= maxSnapshotAgeSeconds:
+            snapshot = numpy.array(state['perCpuTimes'], dtype=float)
+            if snapshot.shape == times.shape and (times >= snapshot).all():
+                deltas = times - snapshot
+        if deltas is None:
+            self._objDebug.show('No usable cpu_times snapshot (age : %.1fs) : sampling during %ss', age, fallbackIntervalSeconds)
+            time.sleep(fallbackIntervalSeconds)
+            now, snapshot               = time.time(), times
+            fields, times               = self.readCpuTimes()
+            deltas                      = times - snapshot
+        state['time']           = now
+        state['fields']         = fields
+        state['perCpuTimes']    = times.tolist()
+        return fields, deltas
 
-        if(self.cpuUsagePercent < warningThreshold):
-            exitStatus = 'OK'
-        elif(self.cpuUsagePercent > criticalThreshold):
-            exitStatus = 'CRITICAL'
-        else:
-            exitStatus = 'WARNING'
 
+    def computeCpuUsage(self, fields, deltas):
         """
-        exitStatus = self._exitCodes[self._exitStatus]
-
-        self._objDebug.show('CPU usage : ' + `self.cpuUsagePercent` + '%' \
-            + "\nWarning threshold : " + str(warningThreshold) \
-            + "\nCritical threshold : " + str(criticalThreshold) \
-#            + "\nExit code : " + str(exitCode) \
-            + "\nExit status : " + self._exitStatus
-            )
+        From the cpu_times() deltas (1 row per core, see readCpuTimes()), compute all the percentages at once, whatever
+        the number of cores. As psutil.cpu_percent() : 'iowait' is idle time, 'guest' times are already counted in
+        'user' / 'nice'. Set the attributes listed in getCpuUsagePercent().
         """
-        return exitStatus
+        import numpy
+        column  = { field : index for index, field in enumerate(fields) }
+        total   = deltas.sum(axis=1) - sum(deltas[:, column[field]] for field in ('guest', 'guest_nice') if field in column)
+        idle    = deltas[:, column['idle']] + (deltas[:, column['iowait']] if 'iowait' in column else 0)
+        busy    = total - idle
+        coreUsagePercents       = 100 * busy / numpy.maximum(total, 1e-9)   # a core with no ticks at all is idle
+        allCoresTotal           = max(total.sum(), 1e-9)
+        statePercents           = 100 * deltas.sum(axis=0) / allCoresTotal
+
+        self.coreUsagePercents      = coreUsagePercents.round(1)
+        self.cpuUsagePercent        = round(100 * busy.sum() / allCoresTotal, 1)
+        self.maxCore                = int(coreUsagePercents.argmax())
+        self.maxCoreUsagePercent    = float(self.coreUsagePercents[self.maxCore])
+        self.statePercents          = { state : round(float(statePercents[column[state]]), 1)
+            for state in STATES if state in column }
+
+
+    def computeExitStatus(self, warningThreshold, criticalThreshold):
+        """
+        Compare the cpuUsagePercent VS the warn / crit thresholds : Nagios ranges (see Threshold.py), or plain numbers
+        as before. Return the corresponding exit status.
+        """
+        return super().computeExitStatus(self.cpuUsagePercent, warningThreshold, criticalThreshold)
+
+
+    def computeBreakdownExitStatus(self, coreWarning=None, coreCritical=None, stealWarning=None, stealCritical=None):
+        """
+        Compare every core VS the core warn / crit thresholds (in one go, whatever the number of cores), and the steal
+        time VS the steal thresholds. Thresholds are Nagios ranges (see Threshold.py), None to skip.
+        Return the worst exit status, and a message about the cores / steal time over their thresholds.
+        """
+        coreExitCodes, coreExitStatus = self.computeExitStatuses(self.coreUsagePercents, coreWarning, coreCritical)
+        stealExitStatus = super().computeExitStatus(self.statePercents.get('steal', 0), stealWarning, stealCritical)
+        messages = []
+        if coreExitCodes.any():
+            messages.append('%d cores over threshold, max : %s%% (cpu%d)'
+                % (int((coreExitCodes > 0).sum()), self.maxCoreUsagePercent, self.maxCore))
+        if stealExitStatus in ('WARNING', 'CRITICAL'):
+            messages.append('steal : %s%%' % self.statePercents['steal'])
+        return self.getWorstExitStatus([ coreExitStatus, stealExitStatus ]), ', '.join(messages)
+
+
+    def addBreakdownPerfData(self, coreWarning=None, coreCritical=None, stealWarning=None, stealCritical=None):
+        """ The busiest core, and each of the STATES : the same few metrics whatever the number of cores. """
+        self.addPerfData(label='max core', value=self.maxCoreUsagePercent, uom='%',
+            warn=coreWarning, crit=coreCritical, min=0, max=100)
+        for state, percent in self.statePercents.items():
+            self.addPerfData(label=state, value=percent, uom='%',
+                warn=stealWarning if state == 'steal' else None,
+                crit=stealCritical if state == 'steal' else None,
+                min=0, max=100)
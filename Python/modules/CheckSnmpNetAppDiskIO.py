@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# check_snmp_NetApp_diskIO.py - Copyright (C) 2013 Matthieu FOURNET, fournet.matthieu@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+######################################### CheckSnmpNetAppDiskIO.py ##################################
+# MODULE PART
+#
+# VERSION :     20130311
+########################################## ##########################################################
+
+from modules import CounterStore
+from modules import NagiosPlugin
+from modules import Snmp
+
+
+# NETAPP-MIB : bytes read from / written to the disks since the filer started (Counter64)
+READBYTESOID    = '1.3.6.1.4.1.789.1.2.2.32.0'    # misc64DiskReadBytes
+WRITEBYTESOID   = '1.3.6.1.4.1.789.1.2.2.33.0'    # misc64DiskWriteBytes
+
+
+class CheckSnmpNetAppDiskIO(NagiosPlugin.NagiosPlugin):
+
+
+    def getDiskIoRates(self, objSnmp, objCounterStore, host):
+        """
+        Read the disk counters and the sysUpTime in a single GET, and turn them into bytes per second with the
+        values of the previous run.
+        Set 'self.readBytesPerSecond' and 'self.writeBytesPerSecond' (None on the first run, or after a filer
+        restart), and return True. Return False when the counters couldn't be read.
+        """
+        values = objSnmp.getMany([ CounterStore.SYSUPTIMEOID, READBYTESOID, WRITEBYTESOID ])
+        if values is None or any(isinstance(value, Snmp.VarBindError) for value in values.values()):
+            self._objDebug.show('Cannot read the disk counters : %s', values)
+            return False
+        rates = objCounterStore.getRates(
+            host        = host,
+            counters    = { READBYTESOID : values[READBYTESOID], WRITEBYTESOID : values[WRITEBYTESOID] },
+            sysUpTime   = values[CounterStore.SYSUPTIMEOID],
+            counterBits = 64
+            )
+        self.readBytesPerSecond     = rates[READBYTESOID]
+        self.writeBytesPerSecond    = rates[WRITEBYTESOID]
+        self._objDebug.show('read : %s B/s, write : %s B/s', self.readBytesPerSecond, self.writeBytesPerSecond)
+        return True
+
+
+    def computeExitStatus(self, warningThreshold, criticalThreshold):
+        """
+        Compare both the read and write rates VS the warn / crit thresholds (bytes per second),
+        and return the worst exit status.
+        """
+        return self.getWorstExitStatus([
+            super().computeExitStatus(self.readBytesPerSecond, warningThreshold, criticalThreshold),
+            super().computeExitStatus(self.writeBytesPerSecond, warningThreshold, criticalThreshold),
+            ])
@@ -17,6 +17,8 @@
 import argparse
 import re
 
+from modules import Debug
+
 
 class CommandLine(object):
 
@@ -47,7 +49,9 @@ class CommandLine(object):
             dest        = argData['longOption'],
             required    = argData['required'],
             default     = argData['default'],
-            help        = argData['help']
+            help        = argData['help'],
+            action      = 'append' if argData.get('multiple') else 'store'
+            # 'multiple' arguments can be repeated, their value is the list of the given values
             )
         self._argDict[argData['longOption']] = {
             'value'         : 0,
@@ -56,8 +60,9 @@ class CommandLine(object):
             }
 
 
-    def readArgs(self):
-        self._args = self._argParser.parse_args()
+    def readArgs(self, argv=None):
+        """ Parse 'argv' (defaults to sys.argv[1:]). """
+        self._args = self._argParser.parse_args(argv)
         for argName in self._argDict:
             self._argDict[argName]['value'] = getattr(self._args, argName)
         self._detectDebugValue()
@@ -65,6 +70,8 @@ class CommandLine(object):
 
 
     def showArgs(self):
+        if not self._objDebug.isEnabled():
+            return
         length  = self._objUtility.lengthOfLongestKey(self._argDict)
         message = ''
         for argName in self._argDict:
@@ -83,18 +90,49 @@ class CommandLine(object):
         self._argParser.add_argument(
             '--debug',
             required    = False,
-            action      = 'store_true',
-            help        = 'Toggle debug messages'
+            action      = 'count',
+            default     = 0,
+            help        = 'Toggle debug messages (repeat it to trace each item : each OID of a walk, ...)'
             )
         self._argDict['debug'] = {'orArgGroup': None}
 
 
     def _detectDebugValue(self):
         if self._argDict['debug']['value']:
-            self._objDebug.enable(True)
+            self._objDebug.enable(True, level=min(self._argDict['debug']['value'], Debug.TRACE))
 #            self._objDebug.show('DEBUG IS ENABLED!')
 
 
+########################################## ##########################################################
+# THE 'IMPORT-PROFILE' COMMAND LINE ARGUMENT
+
+    def declareArgumentImportProfile(self):
+        """
+        The profiling itself is started by 'modules/__init__.py' before anything else is imported :
+        this only lets argparse accept the switch (and list it in the help).
+        """
+        self._argParser.add_argument(
+            '--import-profile',
+            required    = False,
+            action      = 'store_true',
+            help        = 'Print the cumulative import time of each module on exit'
+            )
+
+
+########################################## ##########################################################
+# THE 'PERFDATAJSON' COMMAND LINE ARGUMENT
+
+    def declareArgumentPerfDataJson(self):
+        """ See NagiosPlugin.setPerfDataJsonFile() """
+        self._argParser.add_argument(
+            '--perfDataJson',
+            required    = False,
+            default     = None,
+            metavar     = 'FILE',
+            help        = 'Also append the perfdata to this file, as JSON lines (optional)'
+            )
+
+
 ########################################## ##########################################################
 # ARGUMENTS VALIDATION
 
@@ -104,7 +142,10 @@ class CommandLine(object):
         for argName in self._argDict:
             if self._isUselessCheckingArgument(argName):
                 continue
-            if re.search('^' + self._argDict[argName]['rule'] + '$', str(self._argDict[argName]['value'])):
+            values = self._argDict[argName]['value']
+            if not isinstance(values, list):
+                values = [ values ]
+            if all(re.search('^' + self._argDict[argName]['rule'] + '$', str(value)) for value in values):
                 matchMessage = 'MATCHED :'
                 thisArgIsOk = True
             else:
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+######################################### CounterStore.py ###########################################
+# FUNCTION :    Turn the SNMP counters read in a run into per-second rates, using the values stored by the
+#               previous run : a check is then a single GET, without sleeping between 2 samples.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. The elapsed time is measured with the agent's sysUpTime (read in the same GET as the
+#                  counters), not with the poller clock : network delays and retries don't skew the rates.
+#               2. sysUpTime going backwards means the agent restarted : its counters started over, so there
+#                  is no rate for this run.
+#               3. A counter going backwards has wrapped if it is a 32-bit counter (Counter32) : 2^32 is added.
+#                  A 64-bit counter (Counter64) doesn't wrap in practice : it was reset, there is no rate.
+#               4. Stored per host : { host : { 'sysUpTime' : ticks, 'counters' : { OID : value } } }
+#
+########################################## ##########################################################
+
+
+SYSUPTIMEOID    = '1.3.6.1.2.1.1.3.0'
+TICKSPERSECOND  = 100       # sysUpTime unit : 1/100 s
+
+
+class CounterStore(object):
+
+    def __init__(self, objDebug, stateFile):
+        """ 'stateFile' : a StateFile. """
+        self._objDebug  = objDebug
+        self._stateFile = stateFile
+
+
+    def getRates(self, host, counters, sysUpTime, counterBits=64):
+        """
+        'counters' : { OID : counter value }, read in the same request as 'sysUpTime' (see SYSUPTIMEOID).
+        'counterBits' : 32 or 64, for all the counters, or a dict { OID : 32 or 64 }.
+        Store the values for the next run, and return { OID : per-second rate, or None when there is no
+        previous value to compare with (first run, agent restart, counter reset) }.
+        """
+        return self._stateFile.update(lambda state: self._computeRates(state, host, counters, int(sysUpTime), counterBits))
+
+
+    def _computeRates(self, state, host, counters, sysUpTime, counterBits):
+        previous    = state.get(host, {})
+        elapsed     = (sysUpTime - previous['sysUpTime']) / TICKSPERSECOND if 'sysUpTime' in previous else None
+        state[host] = { 'sysUpTime' : sysUpTime, 'counters' : { oid : int(value) for oid, value in counters.items() } }
+
+        if elapsed is None or elapsed <= 0:
+            self._objDebug.show('%s : no rates (%s)', host,
+                'first run' if elapsed is None else 'agent restarted' if elapsed < 0 else 'same sample')
+            return { oid : None for oid in counters }
+
+        rates = {}
+        for oid, value in counters.items():
+            previousValue = previous.get('counters', {}).get(oid)
+            if previousValue is None:
+                rates[oid] = None
+                continue
+            delta = int(value) - previousValue
+            if delta < 0:
+                bits = counterBits.get(oid, 64) if isinstance(counterBits, dict) else counterBits
+                if bits == 32:
+                    delta += 2 ** 32
+                else:
+                    self._objDebug.show('%s : %s was reset', host, oid)
+                    rates[oid] = None
+                    continue
+            rates[oid] = delta / elapsed
+        return rates
@@ -1,14 +1,60 @@
 #!/usr/bin/env python3
 
+######################################### Debug.py ##################################################
+# FUNCTION :    Debug messages, leveled and cheap enough to be left in hot loops (SNMP walks, ...).
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. show(message, *args) works like the 'logging' module : 'message % args' is only computed
+#                  when the record is displayed, so callers must not build the message themselves.
+#                  Since formatting is deferred until flush(), 'args' should not be objects modified afterwards.
+#               2. Records are kept in a bounded ring buffer and displayed all at once by flush(), which
+#                  NagiosPlugin.exit() and die() call (and, as a last resort, the interpreter exit).
+#                  When the ring is full, the oldest records are dropped. Long-running processes
+#                  (LocalSampler.py, PluginRunner.py) call flush() themselves, as they go.
+#               3. With debug disabled, show() is a single comparison.
+#
+########################################## ##########################################################
+
+
+import atexit
+import collections
+import sys
+import weakref
+
+
+# Levels : the higher, the more verbose
+INFO    = 1     # '--debug'
+TRACE   = 2     # '--debug --debug' : per-item messages (each OID of a walk, ...)
+
+_enabledInstances = weakref.WeakSet()    # a weak set, so that embedded plugin runs don't pile up here
+
+
+@atexit.register
+def _flushAll():
+    for objDebug in list(_enabledInstances):
+        objDebug.flush()
+
+
 class Debug(object):
 
-    def __init__(self):
-        self._mySys = __import__('sys')
-        self._show  = False
+    def __init__(self, maxRecords=10000):
+        self._mySys     = __import__('sys')
+        self._level     = 0
+        self._records   = collections.deque(maxlen=maxRecords)
+        self._dropped   = 0
+
+
+    def enable(self, enabledByCaller, level=INFO):
+        self._level = level if enabledByCaller else 0
+        if self._level:
+            _enabledInstances.add(self)
 
 
-    def enable(self, enabledByCaller):
-        self._show = True if enabledByCaller else False
+    def isEnabled(self, level=INFO):
+        """ For callers that would have to compute something just to display it. """
+        return self._level >= level
 
 
     def die(self, exitMessage, exitCode=2):
@@ -17,18 +63,35 @@ class Debug(object):
 
         The defaut exit code is 2 to identify cases when a script was terminated through this function.
         """
+        self.flush()
         print (exitMessage)
         self._mySys.exit(exitCode)
 
 
-    def show(self, message):
-        if self._show:
-            import inspect
-            print ("\n" \
+    def show(self, message, *args, level=INFO):
+        if self._level < level:
+            return
+        frame = sys._getframe(1)
+        if len(self._records) == self._records.maxlen:
+            self._dropped += 1
+        self._records.append((frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name, message, args))
+
+
+    def flush(self):
+        """ Display the buffered records, then forget them. """
+        if not self._records:
+            return
+        output = []
+        if self._dropped:
+            output.append("\n ++=================== DEBUG : " + str(self._dropped) + " older records dropped\n")
+        for fileName, lineNumber, caller, message, args in self._records:
+            output.append("\n" \
                 + " ++=================== DEBUG =========================\n" \
-                + ' || FILE    : ' + str(inspect.stack()[1][1]) + "\n" \
-                + ' || LINE    : ' + str(inspect.stack()[1][2]) + "\n" \
-                + ' || CALLER  : ' + str(inspect.stack()[1][3]) + "\n" \
-                + ' || MESSAGE : ' + str(message) + "\n" \
+                + ' || FILE    : ' + fileName + "\n" \
+                + ' || LINE    : ' + str(lineNumber) + "\n" \
+                + ' || CALLER  : ' + caller + "\n" \
+                + ' || MESSAGE : ' + (str(message) % args if args else str(message)) + "\n" \
                 + " ++================== /DEBUG =========================\n")
-
+        self._records.clear()
+        self._dropped = 0
+        print (''.join(output))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+######################################### HttpConnectionPool.py #####################################
+# FUNCTION :    Keep-alive HTTP connections shared by the concurrent requests of AsyncHttp, so that
+#               several pages of the same origin don't pay for a new TCP connection each.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Connections are keyed by (host, port, Host header).
+#               2. A connection is either in use by exactly 1 request, or idle in the pool. Idle connections
+#                  are dropped after 'idleTimeoutSeconds', or as soon as the server closed them.
+#
+########################################## ##########################################################
+
+
+import asyncio
+import time
+
+
+class HttpConnectionPool(object):
+
+    def __init__(self, objDebug, maxConnectionsPerHost=4, idleTimeoutSeconds=5.0):
+        self._objDebug              = objDebug
+        self._maxConnectionsPerHost = maxConnectionsPerHost
+        self._idleTimeoutSeconds    = idleTimeoutSeconds
+        self._slots                 = {}    # key => semaphore limiting the connections to this origin
+        self._idleConnections       = {}    # key => [ (reader, writer, last use time) ], most recent last
+        self._stats                 = { 'opened': 0, 'reused': 0, 'evicted': 0 }
+
+
+    async def acquire(self, key):
+        """
+        Wait for a free slot for this origin, then return an idle connection (reader, writer)
+        or None if a new one has to be opened with connect().
+        """
+        if key not in self._slots:
+            self._slots[key]            = asyncio.Semaphore(self._maxConnectionsPerHost)
+            self._idleConnections[key]  = []
+        await self._slots[key].acquire()
+        return self._getIdleConnection(key)
+
+
+    async def connect(self, key, address=None):
+        """ 'address' : the IP address 'host' resolves to, when the caller resolved it already. """
+        host, port, hostHeader = key
+        connection = await asyncio.open_connection(address or host, port)
+        self._stats['opened'] += 1
+        return connection
+
+
+    def release(self, key, connection, reusable):
+        """ Give the slot back. The connection is kept for later requests only when 'reusable'. """
+        if connection:
+            reader, writer = connection
+            if reusable and not writer.is_closing():
+                self._idleConnections[key].append((reader, writer, time.monotonic()))
+            else:
+                writer.close()
+        self._slots[key].release()
+
+
+    def closeAll(self):
+        for key in self._idleConnections:
+            for reader, writer, lastUseTime in self._idleConnections[key]:
+                writer.close()
+            self._idleConnections[key] = []
+
+
+    def getStats(self):
+        """ How many connections were opened, reused, and evicted because idle / closed by the server. """
+        return dict(self._stats)
+
+
+    def _getIdleConnection(self, key):
+        self._evictIdleConnections(key)
+        if self._idleConnections[key]:
+            reader, writer, lastUseTime = self._idleConnections[key].pop()
+            self._stats['reused'] += 1
+            return reader, writer
+        return None
+
+
+    def _evictIdleConnections(self, key):
+        now             = time.monotonic()
+        idleConnections = []
+        for reader, writer, lastUseTime in self._idleConnections[key]:
+            if now - lastUseTime > self._idleTimeoutSeconds or reader.at_eof() or writer.is_closing():
+                writer.close()
+                self._stats['evicted'] += 1
+            else:
+                idleConnections.append((reader, writer, lastUseTime))
+        self._idleConnections[key] = idleConnections
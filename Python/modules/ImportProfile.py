@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+######################################### ImportProfile.py ##########################################
+# FUNCTION :    Measure the cumulative import time of each module, to keep the plugins' cold start
+#               under control. Enabled with the '--import-profile' command line switch.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. This has to be installed before anything else is imported : 'modules/__init__.py'
+#                  does it as soon as it sees the switch in sys.argv.
+#               2. Durations are cumulative : they include the modules imported by the module itself.
+#
+########################################## ##########################################################
+
+
+import atexit
+import builtins
+import sys
+import time
+
+
+class ImportProfile(object):
+
+    def __init__(self):
+        self._originalImport    = builtins.__import__
+        self._records           = []    # [ depth, module name, duration (ns) ], in import order
+        self._depth             = 0
+
+
+    def install(self, reportAtExit=True):
+        builtins.__import__ = self._import
+        if reportAtExit:
+            atexit.register(self._printReport)
+
+
+    def uninstall(self):
+        builtins.__import__ = self._originalImport
+
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in sys.modules and not fromlist:
+            return self._originalImport(name, globals, locals, fromlist, level)
+
+        modulesBefore   = len(sys.modules)
+        record          = [ self._depth, self._getLabel(name, globals, fromlist, level), 0 ]
+        self._records.append(record)
+        self._depth     += 1
+        startTime       = time.perf_counter_ns()
+        try:
+            return self._originalImport(name, globals, locals, fromlist, level)
+        finally:
+            record[2]   = time.perf_counter_ns() - startTime
+            self._depth -= 1
+            if len(sys.modules) == modulesBefore:
+                self._records.remove(record)    # nothing new was loaded : not worth reporting
+
+
+    def _getLabel(self, name, globals, fromlist, level):
+        """ 'from .a import b, c' within package 'p' gives : 'p.a.b, p.a.c' """
+        if level:
+            package = (globals or {}).get('__package__') or ''
+            if level > 1:
+                package = package.rsplit('.', level - 1)[0]
+            name = package + '.' + name if name else package
+        if fromlist:
+            return ', '.join(name + '.' + item for item in fromlist)
+        return name
+
+
+    def getRecords(self):
+        """ Return the (depth, module name, cumulative duration in µs) tuples, in import order. """
+        return [ (depth, name, duration // 1000) for depth, name, duration in self._records ]
+
+
+    def getReport(self):
+        lines = [ 'IMPORT PROFILE (cumulative, µs) :' ]
+        for depth, name, duration in self.getRecords():
+            lines.append(str(duration).rjust(10) + ' | ' + '  ' * depth + name)
+        total = sum(duration for depth, name, duration in self.getRecords() if depth == 0)
+        lines.append(str(total).rjust(10) + ' | TOTAL')
+        return '\n'.join(lines)
+
+
+    def _printReport(self):
+        self.uninstall()
+        print(self.getReport(), file=sys.stderr)
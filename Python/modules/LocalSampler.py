@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+######################################### LocalSampler.py ###########################################
+# FUNCTION :    Resident process sampling the local CPU, load and memory several times per second into
+#               ring buffers, and serving aggregates (mean, max, p95) over the last N seconds : checks read
+#               these instead of sampling on their own, and short bursts between 2 checks are not missed.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Protocol on the Unix socket :
+#                   request  : the window in seconds (ASCII), then the client shuts down writing
+#                   response : a JSON object, see getAggregates()
+#               2. Ring buffers are fixed-size NumPy arrays ('windowSeconds' / 'intervalSeconds' rows) : memory
+#                  use doesn't grow, and a sample is a row write.
+#               3. A single thread samples and serves : requests are answered between 2 samples.
+#               4. CPU usage is computed by CheckLocalCpu.computeCpuUsage(), as check_local_cpu.py does.
+#
+########################################## ##########################################################
+
+
+import json
+import math
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import warnings
+
+from modules import CheckLocalCpu
+
+
+# The metrics of each sample : all in %, except the load average
+METRICS = ('cpu', 'user', 'system', 'iowait', 'steal', 'load1', 'memory')
+
+
+class LocalSampler(object):
+
+    def __init__(self, objDebug, socketPath, intervalSeconds=0.25, windowSeconds=900):
+        import numpy
+        import psutil
+        self._objDebug          = objDebug
+        self._socketPath        = socketPath
+        self._intervalSeconds   = intervalSeconds
+        self._psutil            = psutil
+        self._numpy             = numpy
+        self._checkLocalCpu     = CheckLocalCpu.CheckLocalCpu(name='LOCAL SAMPLER', objDebug=objDebug)
+        self._fields, self._cpuTimes = self._checkLocalCpu.readCpuTimes()
+
+        capacity                = max(int(math.ceil(windowSeconds / intervalSeconds)), 1)
+        self._times             = numpy.full(capacity, numpy.nan)     # monotonic time of each sample, NaN = empty
+        self._samples           = numpy.full((capacity, len(METRICS)), numpy.nan)
+        self._coreSamples       = numpy.full((capacity, len(self._cpuTimes)), numpy.nan)
+        self._sampleCount       = 0
+
+
+    def sample(self):
+        """ Read the CPU times since the previous sample, the load and the memory use, into the ring buffers. """
+        fields, cpuTimes    = self._checkLocalCpu.readCpuTimes()
+        if fields != self._fields or cpuTimes.shape != self._cpuTimes.shape:
+            if len(cpuTimes) != len(self._cpuTimes):    # CPU added / removed : the per-core samples start over
+                self._coreSamples = self._numpy.full((len(self._times), len(cpuTimes)), self._numpy.nan)
+            self._fields, self._cpuTimes = fields, cpuTimes
+            return
+        deltas              = cpuTimes - self._cpuTimes
+        self._cpuTimes      = cpuTimes
+        if (deltas < 0).any():
+            return
+        cpu = self._checkLocalCpu
+        cpu.computeCpuUsage(fields, deltas)
+        row = self._sampleCount % len(self._times)
+        self._times[row]        = time.monotonic()
+        self._samples[row]      = [ cpu.cpuUsagePercent ] \
+            + [ cpu.statePercents.get(state, self._numpy.nan) for state in ('user', 'system', 'iowait', 'steal') ] \
+            + [ os.getloadavg()[0], self._psutil.virtual_memory().percent ]
+        self._coreSamples[row]  = cpu.coreUsagePercents
+        self._sampleCount       += 1
+
+
+    def getAggregates(self, windowSeconds):
+        """
+        Return { 'samples' : number of samples in the window, 'windowSeconds',
+            'metrics' : { metric : { 'mean', 'max', 'p95' } } for each of the METRICS,
+            'cores' : { 'mean', 'max', 'p95' } : lists, 1 value per core }
+        Values are None when there is no sample in the window yet.
+        """
+        numpy   = self._numpy
+        inWindow = self._times >= time.monotonic() - windowSeconds    # NaN (empty rows) compare as False
+        samples = self._samples[inWindow]
+        result  = { 'samples' : int(inWindow.sum()), 'windowSeconds' : windowSeconds, 'metrics' : {}, 'cores' : None }
+        if not len(samples):
+            result['metrics'] = { metric : { 'mean' : None, 'max' : None, 'p95' : None } for metric in METRICS }
+            return result
+        coreSamples = self._coreSamples[inWindow]     # NaN rows : sampled before a CPU was added / removed
+        with warnings.catch_warnings():     # metrics missing on this OS (steal, ...) are all NaN : NaN result
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means   = numpy.nanmean(samples, axis=0)
+            maxs    = numpy.nanmax(samples, axis=0)
+            p95s    = numpy.nanpercentile(samples, 95, axis=0)
+            cores   = {
+                'mean'  : numpy.nanmean(coreSamples, axis=0),
+                'max'   : numpy.nanmax(coreSamples, axis=0),
+                'p95'   : numpy.nanpercentile(coreSamples, 95, axis=0),
+                }
+        for index, metric in enumerate(METRICS):
+            result['metrics'][metric] = {
+                'mean'  : self._getNumber(means[index]),
+                'max'   : self._getNumber(maxs[index]),
+                'p95'   : self._getNumber(p95s[index]),
+                }
+        result['cores'] = { statistic : [ self._getNumber(value) for value in values ] for statistic, values in cores.items() }
+        return result
+
+
+    def _getNumber(self, value):
+        return None if math.isnan(value) else round(float(value), 2)
+
+
+########################################## ##########################################################
+# SERVING REQUESTS
+
+    def serve(self):
+        if os.path.exists(self._socketPath):
+            os.unlink(self._socketPath)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self._socketPath)
+        os.chmod(self._socketPath, 0o600)
+        self._listener.listen(128)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        nextSampleTime = time.monotonic() + self._intervalSeconds
+        while True:
+            readable, writable, errors = select.select(
+                [ self._listener ], [], [], max(nextSampleTime - time.monotonic(), 0))
+            if readable:
+                connection, _ = self._listener.accept()
+                with connection:
+                    self._handle(connection)
+            now = time.monotonic()
+            if now >= nextSampleTime:
+                self.sample()
+                # on schedule, unless we fell behind (suspended, ...) : no catching up
+                nextSampleTime = max(nextSampleTime + self._intervalSeconds, now)
+            self._objDebug.flush()      # as it goes : debug records are buffered until flush(), see Debug.py
+
+
+    def _handle(self, connection):
+        connection.settimeout(1)    # a stuck client must not stop the sampling for long
+        try:
+            request = b''
+            while True:
+                data = connection.recv(4096)
+                if not data:
+                    break
+                request += data
+            windowSeconds = float(request.decode() or 60)
+            connection.sendall(json.dumps(self.getAggregates(windowSeconds)).encode())
+        except (OSError, ValueError) as e:
+            self._objDebug.show('Invalid request : %s', e)
+
+
+    def _stop(self, signum, frame):
+        self._objDebug.flush()
+        if os.path.exists(self._socketPath):
+            os.unlink(self._socketPath)
+        sys.exit(0)
@@ -11,11 +11,29 @@
 ########################################## ##########################################################
 
 
+from modules import PerfData
+
+
 okNoWarnString = 'NOWARN (ok)'
 
 
+class PluginExit(Exception):
+    """
+    Raised by NagiosPlugin.exit() instead of leaving the interpreter when the plugin
+    runs embedded into a long-lived process (see PluginRunner.py).
+    """
+
+    def __init__(self, outputMessage, exitCode):
+        Exception.__init__(self, outputMessage)
+        self.outputMessage  = outputMessage
+        self.exitCode       = exitCode
+
+
 class NagiosPlugin(object):
 
+    # Set to True by the plugin runner : exit() then raises PluginExit rather than calling sys.exit()
+    embedded = False
+
     def __init__(self, name, objDebug):
         self._name          = name
         self._objDebug      = objDebug
@@ -27,27 +45,76 @@ class NagiosPlugin(object):
             'UNKNOWN'       : 3
             }
 
-        self._perfData  = ''
         self._decimalPlaces = 3
+        self._perfData  = PerfData.PerfData(decimalPlaces = self._decimalPlaces)
+        self._perfDataJsonFile = None
+        self._thresholds = {}   # (warn, crit) => Threshold
 
 
     def addPerfData(self, label, value, uom, warn, crit, min=None, max=None):
         """
         Perfdata :  http://nagiosplug.sourceforge.net/developer-guidelines.html#AEN201
         Format :    'label'=value[UOM];[warn];[crit];[min];[max]
+        The perfdata are only rendered once, by exit() (see PerfData.py).
         """
-        self._perfData += label + '=' + str(value) + uom + ';' \
-            + str(warn) + ';' + str(crit) + ';' + str(min) + ';' + str(max) + ' '
-        self._objDebug.show('PERFDATA : ' + self._perfData)
+        self._perfData.add(label, value, uom, warn, crit, min, max)
 
 
-    def exit(self, exitStatus, exitMessage=''):
-        self._mySys = __import__('sys')
+    def setPerfDataJsonFile(self, perfDataJsonFile):
+        """ Also append the perfdata to this file on exit, as JSON lines. None disables it. """
+        self._perfDataJsonFile = perfDataJsonFile
+
+
+    def getWorstExitStatus(self, exitStatuses):
+        """ CRITICAL > WARNING > UNKNOWN > OK """
+        severity = {
+            'OK'            : 0,
+            okNoWarnString  : 0,
+            'UNKNOWN'       : 1,
+            'WARNING'       : 2,
+            'CRITICAL'      : 3
+            }
+        return max(exitStatuses, key=lambda exitStatus: severity[exitStatus]) if exitStatuses else 'UNKNOWN'
+
+
+    def getResult(self, exitStatus, exitMessage=''):
+        """
+        Build the plugin output line and return it with the matching exit code.
+        This is the non-exiting counterpart of exit().
+        """
         outputMessage = self._name + ' ' + exitStatus + '. ' + exitMessage
         if self._perfData:
-            outputMessage += '|' + self._perfData
+            perfData = self._perfData.render()
+            self._objDebug.show('PERFDATA : %s', perfData)
+            outputMessage += '|' + perfData
+        return outputMessage, self._exitCodes[exitStatus]
+
+
+    def exit(self, exitStatus, exitMessage=''):
+        outputMessage, exitCode = self.getResult(exitStatus, exitMessage)
+        if self._perfDataJsonFile and self._perfData:
+            self._writePerfDataJson(exitStatus)
+        self._objDebug.flush()
+        if NagiosPlugin.embedded:
+            raise PluginExit(outputMessage, exitCode)
+        self._mySys = __import__('sys')
         print(outputMessage)
-        self._mySys.exit(self._exitCodes[exitStatus])
+        self._mySys.exit(exitCode)
+
+
+    def _writePerfDataJson(self, exitStatus):
+        """ A failure to write the JSON lines must not change the plugin result. """
+        import time
+        jsonLines = self._perfData.renderJsonLines({
+            'plugin'    : self._name,
+            'time'      : round(time.time(), 3),
+            'status'    : exitStatus
+            })
+        try:
+            with open(self._perfDataJsonFile, 'a') as perfDataJsonFile:
+                perfDataJsonFile.write(jsonLines)     # a single write : lines of concurrent plugins don't mix
+        except IOError as e:
+            self._objDebug.show('PERFDATA JSON - ERROR : %s', e)
 
 
     def computeExitStatus(self, value, warningThreshold, criticalThreshold):
@@ -64,40 +131,29 @@ class NagiosPlugin(object):
         -oo <--------------+-------------------+---------------------> +oo
                 critical   C      warning      W           ok
 
-
-        NB : this method doesn't meet the Nagios plugin specification as for warn / crit ranges.
-        Since such ranges are not widely used, this implementation should be enough for most common cases.
+        This applies to thresholds given as plain numbers. Thresholds can also be Nagios ranges,
+        such as '10:20' or '@~:50' (see Threshold.py).
         """
-        # TODO : what about value == warn (or crit) threshold ?
+        self._objDebug.show("VALUE = %s\n              WARN  = %s\n              CRIT  = %s",
+            value, warningThreshold, criticalThreshold)
+        return self._getThreshold(warningThreshold, criticalThreshold).getStatus(value)
 
-        # TODO : command line parameters may be converted to int earlier ?
-        value = int(value)
-        warningThreshold    = int(warningThreshold)
-        criticalThreshold   = int(criticalThreshold)
-        self._objDebug.show('VALUE = ' + str(value) + "\n              WARN  = " \
-            + str(warningThreshold) + "\n              CRIT  = " + str(criticalThreshold))
 
-
-
-        if warningThreshold == 0 and criticalThreshold == 0:
-            exitStatus = okNoWarnString
-        else:
-            if warningThreshold < criticalThreshold:
-                if value < warningThreshold:
-                    exitStatus = 'OK'
-                elif value > criticalThreshold:
-                    exitStatus = 'CRITICAL'
-                else:
-                    exitStatus = 'WARNING'
-            else:
-                if value > warningThreshold:
-                    exitStatus = 'OK'
-                elif value < criticalThreshold:
-                    exitStatus = 'CRITICAL'
-                else:
-                    exitStatus = 'WARNING'
-
-
-
-
-        return exitStatus
+    def computeExitStatuses(self, values, warningThreshold, criticalThreshold):
+        """
+        Same as computeExitStatus(), for many values at once (needs NumPy).
+        Return the exit code of each value (a NumPy array), and the worst exit status.
+        """
+        return self._getThreshold(warningThreshold, criticalThreshold).getStatuses(values)
+
+
+    def _getThreshold(self, warningThreshold, criticalThreshold):
+        """ Each pair of thresholds is parsed only once. Invalid thresholds ('20:10', ...) exit 'UNKNOWN'. """
+        from modules import Threshold
+        key = (warningThreshold, criticalThreshold)
+        if key not in self._thresholds:
+            try:
+                self._thresholds[key] = Threshold.Threshold(warningThreshold, criticalThreshold, invertible=True)
+            except ValueError as e:
+                self.exit(exitStatus='UNKNOWN', exitMessage=str(e))
+        return self._thresholds[key]
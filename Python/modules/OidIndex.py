@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+######################################### OidIndex.py ###############################################
+# FUNCTION :    OIDs and their values, sorted in true OID order ('.2' before '.10'), answering "children of X",
+#               "next OID after Y" and range queries by binary search.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. OIDs are tuples of int, as Snmp.walk() returns them : tuple comparison is the SNMP
+#                  lexicographic order. Queries also accept dotted strings ('1.3.6.1.2.1.2.2.1.2').
+#               2. 2 parallel lists (sorted OIDs, values) : no node objects, so memory is the OID tuples and
+#                  the values themselves, even for hundreds of thousands of OIDs. Queries are O(log n).
+#               3. Walks return OIDs in order : adding a walk is a single list insertion (an append when it
+#                  comes after all the OIDs already there). Other additions are an insert (add()), or a merge
+#                  (update()).
+#
+########################################## ##########################################################
+
+
+import bisect
+
+
+def toOid(oid):
+    """ A dotted string ('1.3.6.1', '.1.3.6.1') or a tuple of int, as a tuple of int. """
+    if isinstance(oid, str):
+        return tuple(int(subIdentifier) for subIdentifier in oid.strip('.').split('.'))
+    return tuple(oid)
+
+
+class OidIndex(object):
+
+    def __init__(self, items=()):
+        """ 'items' : (OID, value) pairs, or a dict { OID : value } such as a walk() result. """
+        self._oids      = []
+        self._values    = []
+        self.update(items)
+
+
+    def __len__(self):
+        return len(self._oids)
+
+
+    def __contains__(self, oid):
+        return self._find(toOid(oid)) is not None
+
+
+    def __iter__(self):
+        """ (OID, value) pairs, in OID order. """
+        return zip(self._oids, self._values)
+
+
+    def add(self, oid, value):
+        """ Add 'oid', or replace its value. """
+        oid = toOid(oid)
+        if not self._oids or oid > self._oids[-1]:
+            self._oids.append(oid)
+            self._values.append(value)
+            return
+        position = bisect.bisect_left(self._oids, oid)
+        if self._oids[position] == oid:
+            self._values[position] = value
+        else:
+            self._oids.insert(position, oid)
+            self._values.insert(position, value)
+
+
+    def update(self, items):
+        """ Add many (OID, value) pairs, or a dict { OID : value }, replacing the values of the OIDs already there. """
+        if isinstance(items, dict):
+            items = items.items()
+        items = [ (toOid(oid), value) for oid, value in items ]
+        if not items:
+            return
+        if all(items[position][0] < items[position + 1][0] for position in range(len(items) - 1)):
+            # a walk : sorted, and usually a subtree no OID of this index is in (another column, ...) : inserted
+            # as a whole
+            start = bisect.bisect_left(self._oids, items[0][0])
+            if start == bisect.bisect_right(self._oids, items[-1][0], start):
+                self._oids[start:start]     = [ oid for oid, value in items ]
+                self._values[start:start]   = [ value for oid, value in items ]
+                return
+        merged = dict(zip(self._oids, self._values))
+        merged.update(items)
+        self._oids      = sorted(merged)
+        self._values    = [ merged[oid] for oid in self._oids ]
+
+
+    def get(self, oid, default=None):
+        position = self._find(toOid(oid))
+        return default if position is None else self._values[position]
+
+
+    def getNext(self, oid):
+        """ The first (OID, value) after 'oid', as a GETNEXT would return it, or None at the end. """
+        position = bisect.bisect_right(self._oids, toOid(oid))
+        if position == len(self._oids):
+            return None
+        return self._oids[position], self._values[position]
+
+
+    def iterRange(self, startOid, stopOid=None):
+        """ (OID, value) pairs from 'startOid' included to 'stopOid' excluded (the end when None), in OID order. """
+        start   = bisect.bisect_left(self._oids, toOid(startOid))
+        stop    = len(self._oids) if stopOid is None else bisect.bisect_left(self._oids, toOid(stopOid))
+        return self._iterPositions(start, stop)
+
+
+    def iterChildren(self, prefix):
+        """ (OID, value) pairs below 'prefix' ('prefix' itself excluded), in OID order. """
+        prefix  = toOid(prefix)
+        if not prefix:
+            return iter(self)
+        start   = bisect.bisect_right(self._oids, prefix)
+        # every OID below 'prefix' sorts before its next sibling
+        stop    = bisect.bisect_left(self._oids, prefix[:-1] + (prefix[-1] + 1,), start)
+        return self._iterPositions(start, stop)
+
+
+    def _iterPositions(self, start, stop):
+        return zip(self._oids[start:stop], self._values[start:stop])
+
+
+    def _find(self, oid):
+        position = bisect.bisect_left(self._oids, oid)
+        if position < len(self._oids) and self._oids[position] == oid:
+            return position
+        return None
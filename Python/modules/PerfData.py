@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+######################################### PerfData.py ###############################################
+# FUNCTION :    Collect the perfdata of a plugin, then render them once, either as the Nagios perfdata
+#               string or as JSON lines.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Format : http://nagiosplug.sourceforge.net/developer-guidelines.html#AEN201
+#                   'label'=value[UOM];[warn];[crit];[min];[max]
+#                  - labels with spaces or single quotes are quoted, and single quotes doubled. '=' is not
+#                    allowed in labels : it is replaced with '_'
+#                  - missing fields are left empty, and trailing empty fields are omitted
+#                  - a None value is rendered 'U' : the value could not be determined
+#               2. The metrics are stored column by column : adding one is a few appends, whatever the
+#                  number of metrics already collected. Nothing is formatted before render().
+#               3. Integers are kept as they are (Counter64 values over 2^53 stay exact), floats are rounded to
+#                  'decimalPlaces'.
+#
+########################################## ##########################################################
+
+
+import json
+import math
+import numbers
+
+
+class PerfData(object):
+
+    def __init__(self, decimalPlaces=3):
+        self._decimalPlaces = decimalPlaces
+        self._labels        = []
+        self._values        = []    # None when missing
+        self._uoms          = []
+        self._warns         = []    # thresholds are strings : they can be ranges such as '10:20'
+        self._crits         = []
+        self._mins          = []
+        self._maxs          = []
+
+
+    def __len__(self):
+        return len(self._labels)
+
+
+    def add(self, label, value, uom='', warn=None, crit=None, min=None, max=None):
+        """ 'value', 'min' and 'max' : numbers, or None. Raise TypeError otherwise, before adding anything. """
+        for name, number in (('value', value), ('min', min), ('max', max)):
+            if number is not None and (not isinstance(number, numbers.Real) or isinstance(number, bool)):
+                raise TypeError('perfdata "%s" : %s must be a number, not %r' % (label, name, number))
+        self._labels.append(label)
+        self._values.append(value)
+        self._uoms.append(uom or '')
+        self._warns.append('' if warn is None else str(warn))
+        self._crits.append('' if crit is None else str(crit))
+        self._mins.append(min)
+        self._maxs.append(max)
+
+
+    def render(self):
+        """ Return the perfdata as expected by Nagios (the part after the '|'). """
+        perfData = []
+        for index, label in enumerate(self._labels):
+            fields = [
+                self._formatLabel(label) + '=' + (self._formatNumber(self._values[index]) or 'U') + self._uoms[index],
+                self._warns[index],
+                self._crits[index],
+                self._formatNumber(self._mins[index]),
+                self._formatNumber(self._maxs[index]),
+                ]
+            perfData.append(';'.join(fields).rstrip(';'))
+        return ' '.join(perfData)
+
+
+    def renderJsonLines(self, extraFields=None):
+        """
+        Return 1 JSON object per metric, 1 per line. Missing fields are null.
+        'extraFields' (a dict) is added to each object : plugin name, time, status, ...
+        """
+        lines = []
+        for index, label in enumerate(self._labels):
+            metric = dict(extraFields or {})
+            metric.update({
+                'label' : label,
+                'value' : self._getNumber(self._values[index]),
+                'uom'   : self._uoms[index],
+                'warn'  : self._warns[index] or None,
+                'crit'  : self._crits[index] or None,
+                'min'   : self._getNumber(self._mins[index]),
+                'max'   : self._getNumber(self._maxs[index]),
+                })
+            lines.append(json.dumps(metric) + '\n')
+        return ''.join(lines)
+
+
+    def _formatLabel(self, label):
+        label = label.replace('=', '_')
+        if ' ' in label or "'" in label:
+            return "'" + label.replace("'", "''") + "'"
+        return label
+
+
+    def _getNumber(self, number):
+        """
+        Integers as they are. Floats rounded to 'decimalPlaces', as an int when there is no decimal part.
+        None when missing (None, NaN).
+        """
+        if number is None:
+            return None
+        if isinstance(number, numbers.Integral):
+            return int(number)
+        if math.isnan(number):
+            return None
+        number = round(float(number), self._decimalPlaces)
+        return int(number) if number.is_integer() else number
+
+
+    def _formatNumber(self, number):
+        number = self._getNumber(number)
+        return '' if number is None else str(number)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+######################################### PluginRunner.py ###########################################
+# FUNCTION :    Long-lived process running the Python plugins in-process, the same way Nagios'
+#               embedded Perl interpreter does for Perl plugins : the interpreter and the 'modules.*'
+#               (plus their heavy dependencies : argparse, psutil, pysnmp, ...) are loaded once.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Protocol on the Unix socket :
+#                   request  : the plugin argv items separated by '\0', then the client shuts down writing
+#                   response : '<exit code>\n<plugin output>'
+#               2. Each request runs in a fresh globals dict, so no CommandLine / NagiosPlugin object
+#                  survives from one request to the next. Requests are served one at a time per worker.
+#
+########################################## ##########################################################
+
+
+import contextlib
+import io
+import os
+import signal
+import socket
+import sys
+
+from modules import NagiosPlugin
+
+
+class PluginRunner(object):
+
+    def __init__(self, objDebug, socketPath, pluginDir, workers=1):
+        self._objDebug      = objDebug
+        self._socketPath    = socketPath
+        self._pluginDir     = os.path.abspath(pluginDir)
+        self._workers       = workers
+        self._codeCache     = {}    # plugin path => (mtime, compiled code)
+        self._children      = []
+
+
+    def preload(self, moduleNames):
+        """
+        Import the given modules once and for all. Missing optional dependencies (psutil, pysnmp, ...)
+        only prevent preloading : the plugins needing them will report the error themselves.
+        """
+        for moduleName in moduleNames:
+            try:
+                __import__(moduleName)
+            except ImportError as e:
+                self._objDebug.show('PRELOAD - %s : %s', moduleName, e)
+
+
+########################################## ##########################################################
+# RUNNING PLUGINS
+
+    def runPlugin(self, argv):
+        """
+        Run the plugin 'argv[0]' with the arguments 'argv[1:]' in-process.
+        Return the plugin output and its exit code.
+        """
+        try:
+            pluginPath = self._getPluginPath(argv[0])
+        except (IndexError, ValueError) as e:
+            return 'UNKNOWN. Plugin runner : ' + str(e) + '\n', 3
+
+        output          = io.StringIO()
+        exitCode        = 0
+        savedArgv       = sys.argv
+        savedTimeout    = socket.getdefaulttimeout()
+        sys.argv        = [pluginPath] + list(argv[1:])
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                exec(self._getCode(pluginPath), {
+                    '__name__'      : '__main__',
+                    '__file__'      : pluginPath,
+                    '__builtins__'  : __builtins__,
+                    })
+        except NagiosPlugin.PluginExit as e:
+            output.write(e.outputMessage + '\n')
+            exitCode = e.exitCode
+        except SystemExit as e:     # argparse errors, '--help', Debug.die()
+            if e.code is None or isinstance(e.code, int):
+                exitCode = e.code or 0
+            else:
+                output.write(str(e.code) + '\n')
+                exitCode = 3
+        except Exception as e:
+            output.write('UNKNOWN. Plugin crashed : ' + repr(e) + '\n')
+            exitCode = 3
+        finally:
+            sys.argv = savedArgv
+            socket.setdefaulttimeout(savedTimeout)
+        return output.getvalue(), exitCode
+
+
+    def _getPluginPath(self, pluginName):
+        """ Only the 'check_*' plugins from the runner's plugin directory can be run. """
+        pluginName = os.path.basename(pluginName)
+        pluginPath = os.path.join(self._pluginDir, pluginName)
+        if not pluginName.startswith('check_') or not os.path.isfile(pluginPath):
+            raise ValueError('no such plugin "' + pluginName + '"')
+        return pluginPath
+
+
+    def _getCode(self, pluginPath):
+        """ Compile the plugin once, and again only when the file changes. """
+        mtime = os.stat(pluginPath).st_mtime
+        if pluginPath not in self._codeCache or self._codeCache[pluginPath][0] != mtime:
+            with open(pluginPath) as pluginFile:
+                self._codeCache[pluginPath] = (mtime, compile(pluginFile.read(), pluginPath, 'exec'))
+        return self._codeCache[pluginPath][1]
+
+
+########################################## ##########################################################
+# SERVING REQUESTS
+
+    def serve(self):
+        NagiosPlugin.NagiosPlugin.embedded = True
+
+        if os.path.exists(self._socketPath):
+            os.unlink(self._socketPath)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self._socketPath)
+        os.chmod(self._socketPath, 0o600)
+        self._listener.listen(128)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        for _ in range(self._workers):
+            self._spawnWorker()
+        while True:     # respawn the workers that died
+            pid, status = os.wait()
+            if pid in self._children:
+                self._children.remove(pid)
+                self._objDebug.show('Worker %s died (status %s), respawning', pid, status)
+                self._objDebug.flush()
+                self._spawnWorker()
+
+
+    def _spawnWorker(self):
+        pid = os.fork()
+        if pid:
+            self._children.append(pid)
+            return
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            while True:
+                connection, _ = self._listener.accept()
+                with connection:
+                    self._handle(connection)
+        finally:
+            os._exit(0)
+
+
+    def _handle(self, connection):
+        request = b''
+        while True:
+            data = connection.recv(65536)
+            if not data:
+                break
+            request += data
+        argv = request.decode().split('\0')
+        output, exitCode = self.runPlugin(argv)
+        connection.sendall((str(exitCode) + '\n' + output).encode())
+
+
+    def _stop(self, signum, frame):
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        if os.path.exists(self._socketPath):
+            os.unlink(self._socketPath)
+        sys.exit(0)
@@ -23,112 +23,333 @@
 
 # /usr/local/lib/python2.6/dist-packages/pysnmp/entity/rfc3413/oneliner/cmdgen.py
 # /usr/local/lib/python3.1/dist-packages/pysnmp-4.2.5rc0-py3.1.egg/pysnmp
-from pysnmp.entity.rfc3413.oneliner import cmdgen
-from pysnmp.proto.rfc1905 import NoSuchObject
+#
+from modules import Debug
+from modules import SnmpSession
+from modules import SnmpTable
+
+# /!\ pysnmp takes ~200ms to import : it is only imported when the first request is sent,
+# so that '--help' and arguments errors don't pay for it.
+
+MINREPETITIONS  = 10    # GETBULK max-repetitions : starting value, and never less than this unless the agent says 'tooBig'
+MAXREPETITIONS  = 500
+
+univ            = None
+NoSuchObject    = None
+NoSuchInstance  = None
+EndOfMibView    = None
+
+_decoders       = {}    # pysnmp value class => function returning the native value, see decodeValue()
+
+
+def decodeValue(value):
+    """
+    Map a pysnmp value straight to a native type, without going through str :
+        - Integer32, Counter32, Counter64, Gauge32, TimeTicks, Unsigned32 : int (Counter64 without precision loss)
+        - OctetString, IpAddress, Opaque, Bits : bytes (MAC addresses, IP addresses, ... are kept as is)
+        - ObjectIdentifier : a tuple of int
+        - anything else (Null, noSuchObject, ...) : None
+    The class of each value is checked once : the function for this class is then looked up in a dict.
+    """
+    decoder = _decoders.get(value.__class__)
+    if decoder is None:
+        from pyasn1.type import univ
+        if isinstance(value, univ.Integer):
+            decoder = int
+        elif isinstance(value, univ.OctetString) and not isinstance(value, univ.Null):  # Null : noSuchObject, ...
+            decoder = univ.OctetString.asOctets
+        elif isinstance(value, univ.ObjectIdentifier):
+            decoder = univ.ObjectIdentifier.asTuple
+        else:
+            decoder = lambda value: None
+        _decoders[value.__class__] = decoder
+    return decoder(value)
+
+
+class VarBindError(object):
+    """
+    Value returned by getMany() for an OID the agent couldn't give a value for, while the other OIDs of the
+    same request got theirs. 'reason' is : 'noSuchObject', 'noSuchInstance', 'endOfMibView', or the SNMP
+    error status blamed on this OID ('noSuchName' with SNMPv1, 'tooBig', ...).
+    """
+
+    def __init__(self, reason):
+        self.reason = reason
+
+
+    def __eq__(self, other):
+        return isinstance(other, VarBindError) and other.reason == self.reason
+
+
+    def __repr__(self):
+        return 'VarBindError(' + repr(self.reason) + ')'
 
 
 class Snmp(object):
 
-    def __init__(self, utility, debug, host, port=161, community='public', version='2c', timeoutMilliseconds=1000):
+    def __init__(self, utility, debug, host, port=161, community='public', version='2c', timeoutMilliseconds=1000,
+            user=None, authKey=None, privKey=None, cache=None):
+        """
+        'version' : '1', '2c' or '3'. With '3', 'community' is unused : 'user', and 'authKey' / 'privKey' when
+        authentication / privacy are enabled, are used instead (with the pysnmp default protocols : MD5 / DES).
+        'cache' : an SnmpCache, shared by the plugins of this host. get(), getMany() and walk() then read their
+        responses from it while they are fresh. getMany() results are cached as a whole, for this list of OIDs.
+        """
         self._utility   = utility
         self._debug     = debug
-        self._host = host
-        self._port = port
-        self._community = community
-        # TODO : version is unused
-        self._timeoutMilliseconds = timeoutMilliseconds
-        self._cmdGen = cmdgen.CommandGenerator()
+        self._version   = str(version)
+        # engine, credentials and transport : shared by all the Snmp objects querying the same agent
+        self._session   = SnmpSession.getSession(host, port, community, version, timeoutMilliseconds,
+            user, authKey, privKey)
+        self._cache     = cache
+        self._cacheKey  = (host, port, community, self._version, user)
+        self._maxVarBindsPerPdu = 64    # lowered when the agent answers 'tooBig', and kept for the next requests
+        self._maxRepetitions    = MINREPETITIONS   # adapted to the agent along the walks
+        self._tooBigRepetitions = None      # the lowest max-repetitions the agent answered 'tooBig' to
+        self._walkFailed        = False
+
+
+    def _loadPysnmp(self):
+        global univ, NoSuchObject, NoSuchInstance, EndOfMibView
+        if univ is None:
+            from pyasn1.type import univ
+            from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
+
+
+    def getSessionStats(self):
+        """
+        Requests, retries, timeouts, bytesSent and bytesReceived of the session with this agent, for perfdata.
+        Shared by all the Snmp objects querying the same agent (see SnmpSession.getSession()).
+        """
+        return self._session.getStats()
 
 
     def get(self, OID):
+        """ The value of 'OID', converted by decodeValue(), or None on error or when the agent has no value for it. """
+        if self._cache:
+            return self._cache.getOrFetch(self._cacheKey + ('get', OID), lambda: self._get(OID))
+        return self._get(OID)
+
+
+    def _get(self, OID):
+        self._loadPysnmp()
         try:
-            errorIndication, errorStatus, errorIndex, varBinds = self._cmdGen.getCmd(
-                cmdgen.CommunityData(self._community),
-
-                # /usr/local/lib/python2.6/dist-packages/pysnmp/entity/rfc3413/oneliner/target.py
-                cmdgen.UdpTransportTarget(
-                    transportAddr = (self._host, self._port),
-                    timeout = self._timeoutMilliseconds / 1000,
-                    retries = 3
-                    ),
-                OID
-                )
-                # TODO : test the timeout + retries
+            errorIndication, errorStatus, errorIndex, varBinds = self._session.request('get', [OID])
         except Exception as e:    # this catches errors such as invalid IP
-            self._debug.show('GET - ERROR 1 : %s' % e.args[0])
+            self._debug.show('GET - ERROR 1 : %s', e.args[0])
             return None
 
 
         if errorIndication: # Check for errors (such as timeouts) and print out results
-            self._debug.show('GET - ERROR 2 : %s' % errorIndication)
+            self._debug.show('GET - ERROR 2 : %s', errorIndication)
             return None
         else:
-            if errorStatus:
-                self._debug.show('%s at %s' % (
-                        errorStatus.prettyPrint(),
-                        errorIndex and varBinds[int(errorIndex)-1] or '?'
-                        )
-                    )
-                # TODO : don't print, 'except'
+            if errorStatus:     # SNMPv1 'noSuchName' for a missing OID, ...
+                self._debug.show('GET - ERROR 4 : %s at %s', errorStatus.prettyPrint(), errorIndex)
+                return None
 
             else:
 
                 # http://stackoverflow.com/questions/16178565/how-to-identify-a-nosuchobject-in-python
-                if isinstance(varBinds[0][1], NoSuchObject):    # 'NoSuchObject' in returned tuple because of invalid OID
+                if isinstance(varBinds[0][1], (NoSuchObject, NoSuchInstance, EndOfMibView)):  # because of invalid OID
                     self._debug.show('GET - ERROR 3 : Invalid OID')
                     return None
+                return decodeValue(varBinds[0][1])
 
-                for oid, value in varBinds:
-                    try:
-                        oidValue = value if self._utility.isNumber(value) else str(value)
- 
-                    except AttributeError:
-                        self._debug.show('GET - ERROR 3 : Invalid OID')
-                        # When the specified OID doesn't exist, 'value' doesn't either
-                        oidValue = None
-        return oidValue
 
+    def getMany(self, OIDs):
+        """
+        GET many OIDs with as few requests as possible : as many OIDs per request as the agent accepts.
+        Return a dict { OID : value }, with values converted by decodeValue(). OIDs the agent has no value for
+        get a VarBindError instead of failing the whole request.
+        Return None when the agent can't be queried at all (timeout, invalid address, ...).
+        """
+        if self._cache:
+            return self._cache.getOrFetch(self._cacheKey + ('getMany', tuple(OIDs)), lambda: self._getMany(OIDs))
+        return self._getMany(OIDs)
 
-    def walk(self, OID):
-        returnData = {}
 
-        try:
-            errorIndication, errorStatus, errorIndex, varBindTable = self._cmdGen.nextCmd(
-                cmdgen.CommunityData(self._community),
-                cmdgen.UdpTransportTarget((self._host, self._port)),
-                OID,
-                )
-        except Exception as e:    # this catches errors such as invalid IP
-            self._debug.show('WALK - ERROR 1 : %s' % e.args[0])
-            return None
+    def _getMany(self, OIDs):
+        self._loadPysnmp()
+        returnData  = {}
+        pending     = list(OIDs)
+        while pending:
+            chunk = pending[:self._maxVarBindsPerPdu]
+            try:
+                errorIndication, errorStatus, errorIndex, varBinds = self._session.request('get', chunk)
+            except Exception as e:    # this catches errors such as invalid IP
+                self._debug.show('GETMANY - ERROR 1 : %s', e.args[0])
+                return None
 
-        if errorIndication:     # Check for errors (such as timeouts) and print out results
-            self._debug.show('WALK - ERROR 2 : %s' % errorIndication)
-            return None
+            if errorIndication:
+                self._debug.show('GETMANY - ERROR 2 : %s', errorIndication)
+                return None
+
+            if errorStatus and errorStatus.prettyPrint() == 'tooBig':
+                if len(chunk) == 1:
+                    returnData[chunk[0]] = VarBindError('tooBig')
+                    pending = pending[1:]
+                else:
+                    # send half as many OIDs per request, from now on
+                    self._maxVarBindsPerPdu = (len(chunk) + 1) // 2
+                    self._debug.show('GETMANY - tooBig : %s OIDs per request now', self._maxVarBindsPerPdu)
+                continue
+
+            if errorStatus:
+                # Only the OID blamed by 'errorIndex' gets the error (SNMPv1 'noSuchName', ...), the others are
+                # requested again. Without 'errorIndex', all the OIDs of this request get it.
+                self._debug.show('GETMANY - %s at %s', errorStatus.prettyPrint(), errorIndex)
+                if 0 < int(errorIndex) <= len(chunk):
+                    blamedOid = chunk[int(errorIndex) - 1]
+                    returnData[blamedOid] = VarBindError(errorStatus.prettyPrint())
+                    pending.remove(blamedOid)
+                else:
+                    for oid in chunk:
+                        returnData[oid] = VarBindError(errorStatus.prettyPrint())
+                    pending = pending[len(chunk):]
+                continue
+
+            for oid, (returnedOid, value) in zip(chunk, varBinds):
+                if isinstance(value, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                    returnData[oid] = VarBindError(value.__class__.__name__[0].lower() + value.__class__.__name__[1:])
+                else:
+                    returnData[oid] = decodeValue(value)
+            pending = pending[len(chunk):]
+        return returnData
+
+
+    def walk(self, OID, index=None):
+        """
+        Return a dict { OID : value } of everything below 'OID', or None on error. OIDs are tuples of int, values
+        are converted by decodeValue().
+        'index' : an OidIndex, also filled with the result (several walks can fill the same one), for prefix,
+        next OID and range queries in OID order.
+        SNMP v2c / v3 agents are walked with GETBULK, v1 agents with GETNEXT.
+        """
+        self._walkFailed = False    # a cached result is a walk that succeeded
+        if self._cache:
+            result = self._cache.getOrFetch(self._cacheKey + ('walk', OID), lambda: self._walk(OID))
         else:
+            result = self._walk(OID)
+        if index is not None and result:
+            index.update(result)
+        return result
+
+
+    def walkTable(self, entryOid, columns):
+        """
+        Walk the 'columns' of the table which entry is 'entryOid' (hrStorageEntry : '1.3.6.1.2.1.25.2.3.1', ...),
+        and join them on their row index. 'columns' : { column name : column number below 'entryOid' }.
+        Return an SnmpTable, or None when a column couldn't be walked.
+        """
+        walks = {}
+        for name, column in columns.items():
+            columnOid   = entryOid + '.' + str(column)
+            result      = self.walk(columnOid)
+            if result is None:
+                return None
+            prefixLength    = columnOid.count('.') + 1
+            walks[name]     = { oid[prefixLength:] : value for oid, value in result.items() }
+        return SnmpTable.SnmpTable.fromWalks(walks)
+
+
+    def iterWalk(self, OID):
+        """
+        Yield the (OID, value) pairs below 'OID' as walk() returns them, as each response arrives : the caller can
+        stop the walk at any time (looking for 1 row, ...), and only 1 response is held in memory at a time.
+        On error, the iteration stops, and walkFailed() returns True. Responses are not read from / written to the
+        cache : use walk() for that.
+        """
+        for varBinds in self._iterWalkPdus(OID):
+            for oid, value in varBinds:
+                self._debug.show('%s = %s', oid, value, level=Debug.TRACE)
+                yield oid.asTuple(), decodeValue(value)
+
+
+    def walkFailed(self):
+        """ Whether the last walk (walk(), iterWalk()) stopped on an error : timeout, invalid address, ... """
+        return self._walkFailed
+
+
+    def _walk(self, OID):
+        returnData = dict(self.iterWalk(OID))
+        if self._walkFailed:
+            return None
+        if not returnData:      # nothing below this OID
+            self._debug.show('WALK - ERROR 3 : Invalid OID')
+            return None
+        return returnData
+
+
+    def _iterWalkPdus(self, OID):
+        """
+        Yield the (oid, value) pairs below 'OID', as a list per response received.
+        On error, 'self._walkFailed' is set and the iteration stops.
+
+        The GETBULK max-repetitions is adapted to the agent :
+            - doubled while responses come full and the walk is not over, but never up to a value the agent
+              answered 'tooBig' to : half way to it instead
+            - set to the number of rows received when the agent sent fewer (it truncated its response), not
+              less than MINREPETITIONS unless the agent answered 'tooBig' before
+            - halved on 'tooBig'
+        and kept for the next walks.
+        """
+        self._loadPysnmp()
+        self._walkFailed = False
+        rootOid = univ.ObjectIdentifier(OID)
+        lastOid = rootOid
+        while True:
+            try:
+                if self._version == '1':
+                    repetitions = 1
+                    errorIndication, errorStatus, errorIndex, varBinds = self._session.request('next', [lastOid])
+                else:
+                    repetitions = self._maxRepetitions
+                    errorIndication, errorStatus, errorIndex, varBinds = self._session.request(
+                        'bulk', [lastOid], maxRepetitions=repetitions)
+            except Exception as e:    # this catches errors such as invalid IP
+                self._debug.show('WALK - ERROR 1 : %s', e.args[0] if e.args else e)
+                self._walkFailed = True
+                return
+
+            if errorIndication:     # Check for errors (such as timeouts) and print out results
+                self._debug.show('WALK - ERROR 2 : %s', errorIndication)
+                self._walkFailed = True
+                return
+
             if errorStatus:
-                self._debug.show('%s at %s' % (
-                        errorStatus.prettyPrint(),
-                        errorIndex and varBindTable[-1][int(errorIndex)-1] or '?'
-                        )
-                    )
-                # TODO : don't print, 'except'
+                if errorStatus.prettyPrint() == 'noSuchName' and self._version == '1':
+                    return      # SNMPv1 end of MIB
+                if errorStatus.prettyPrint() == 'tooBig' and repetitions > 1:
+                    self._tooBigRepetitions = min(repetitions, self._tooBigRepetitions or repetitions)
+                    self._maxRepetitions    = repetitions // 2
+                    self._debug.show('WALK - tooBig : max-repetitions = %s', self._maxRepetitions)
+                    continue
+                self._debug.show('WALK - ERROR 4 : %s at %s', errorStatus.prettyPrint(), errorIndex)
+                self._walkFailed = True     # the rows read so far are not the whole table
+                return
+
+            walkVarBinds    = []
+            walkIsOver      = True
+            for oid, value in varBinds:     # a single column is walked : 1 varBind per row
+                if isinstance(value, EndOfMibView) or not rootOid.isPrefixOf(oid) or oid <= lastOid:
+                    break   # also stops on agents returning OIDs out of order, which would loop forever
+                walkVarBinds.append((oid, value))
+                lastOid = oid
             else:
-                if not varBindTable:    # list is empty because of invalid OID
-                    self._debug.show('WALK - ERROR 3 : Invalid OID')
-                    return None
+                walkIsOver = not varBinds
 
-#                self._debug.show(varBindTable)
-
-                for varBindTableRow in varBindTable:
-                    for oid, value in varBindTableRow:
-#                        self._debug.show('%s = %s' % (oid.prettyPrint(), value.prettyPrint()))
-                        oid     = str(oid)
-                        value   = str(value)
-                        try:
-                            returnData[oid] = float(value) if self._utility.isNumber(value) else value
-                        except AttributeError:
-                            # When the specified OID doesn't exist, 'value' doesn't either.
-                            return None
-#            self._debug.show(returnData)
-        return returnData
+            if self._version != '1' and not walkIsOver:
+                if len(varBinds) < repetitions:
+                    self._maxRepetitions = len(varBinds) if self._tooBigRepetitions \
+                        else max(len(varBinds), MINREPETITIONS)
+                elif self._tooBigRepetitions:
+                    # at most 'tooBig' - 1 : a response in between was too big, no need to try it again
+                    self._maxRepetitions = min(repetitions * 2, (repetitions + self._tooBigRepetitions) // 2)
+                else:
+                    self._maxRepetitions = min(repetitions * 2, MAXREPETITIONS)
+
+            if walkVarBinds:
+                yield walkVarBinds
+            if walkIsOver:
+                return
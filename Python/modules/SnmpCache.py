@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+######################################### SnmpCache.py ##############################################
+# FUNCTION :    Cache of SNMP responses shared by all the plugins running on the same host, so that agents
+#               get queried once per TTL, whatever the number of checks reading the same OIDs.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. 1 file per entry, in a directory only the current user can access (entries are pickled :
+#                  the cache is disabled if anybody else could write them). Entries are written to a
+#                  temporary file, then renamed : readers never see a partial entry, and don't lock anything.
+#               2. On a miss, the fetch is done while holding a lock : processes asking for the same entry at
+#                  the same time wait for it, then read it from the cache instead of querying the agent too.
+#                  Locks are 'flock' on LOCKFILES lock files (entry hash modulo LOCKFILES), so that unrelated
+#                  entries seldom wait for each other, and lock files don't pile up.
+#               3. Eviction : entries older than their TTL are not used. When there are more than
+#                  'maxEntries' entries, the least recently used ones (access time, set on each hit) are removed.
+#                  Listing the entries costs 1 stat per entry : it is done at most once every
+#                  'evictionIntervalSeconds', by a single process (the mtime of the EVICTIONMARKER file is the
+#                  time of the last eviction). In between, the cache may hold more than 'maxEntries' entries.
+#
+########################################## ##########################################################
+
+
+import fcntl
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+
+DEFAULTDIRECTORY    = os.path.join(tempfile.gettempdir(), 'nagios_snmp_cache_' + str(os.getuid()))
+LOCKFILES           = 64
+EVICTIONMARKER      = 'evicted'
+
+
+class SnmpCache(object):
+
+    def __init__(self, objDebug, directory=DEFAULTDIRECTORY, ttlSeconds=30, maxEntries=1000, evictionIntervalSeconds=10):
+        self._objDebug                  = objDebug
+        self._directory                 = directory
+        self._ttlSeconds                = ttlSeconds
+        self._maxEntries                = maxEntries
+        self._evictionIntervalSeconds   = evictionIntervalSeconds
+        self._enabled       = None      # checked on first use, see _isUsable()
+        self._stats         = { 'hits': 0, 'misses': 0 }
+
+
+    def getOrFetch(self, key, fetchFunction):
+        """
+        Return the cached value of 'key' (any repr()-able value : host, community, OID, ...). When it is missing or
+        expired, call 'fetchFunction()', cache its result and return it. None results (errors) are not cached.
+        """
+        if not self._isUsable():
+            return fetchFunction()
+        entryName   = hashlib.sha1(repr(key).encode()).hexdigest()
+        entryPath   = os.path.join(self._directory, entryName + '.entry')
+        found, value = self._read(entryPath)
+        if found:
+            self._stats['hits'] += 1
+            return value
+
+        lockPath = os.path.join(self._directory, 'lock.' + str(int(entryName, 16) % LOCKFILES))
+        with open(lockPath, 'a') as lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            try:
+                found, value = self._read(entryPath)  # fetched by another process while we were waiting ?
+                if found:
+                    self._stats['hits'] += 1
+                    return value
+                self._stats['misses'] += 1
+                value = fetchFunction()
+                if value is not None:
+                    self._write(entryPath, value)
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+        self._evictIfDue()
+        return value
+
+
+    def getStats(self):
+        """ { 'hits', 'misses' } of this process. """
+        return dict(self._stats)
+
+
+    def _isUsable(self):
+        if self._enabled is None:
+            try:
+                os.makedirs(self._directory, mode=0o700, exist_ok=True)
+                status = os.stat(self._directory)
+                self._enabled = status.st_uid == os.getuid() and not status.st_mode & 0o077
+                if not self._enabled:
+                    self._objDebug.show('SNMP cache disabled : %s is accessible to other users', self._directory)
+            except OSError as e:
+                self._objDebug.show('SNMP cache disabled : %s', e)
+                self._enabled = False
+        return self._enabled
+
+
+    def _read(self, entryPath):
+        """ Return (True, value) when the entry exists and is fresh, (False, None) otherwise. """
+        try:
+            with open(entryPath, 'rb') as entryFile:
+                if time.time() - os.fstat(entryFile.fileno()).st_mtime >= self._ttlSeconds:
+                    return False, None
+                value = pickle.load(entryFile)
+            os.utime(entryPath, (time.time(), os.stat(entryPath).st_mtime))    # 'used' : for LRU eviction
+            return True, value
+        except FileNotFoundError:
+            return False, None
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            self._objDebug.show('SNMP cache : cannot read %s : %s', entryPath, e)
+            return False, None
+
+
+    def _write(self, entryPath, value):
+        try:
+            fileDescriptor, temporaryPath = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+            with os.fdopen(fileDescriptor, 'wb') as temporaryFile:
+                pickle.dump(value, temporaryFile, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporaryPath, entryPath)
+        except OSError as e:
+            self._objDebug.show('SNMP cache : cannot write %s : %s', entryPath, e)
+
+
+    def _isEvictionDue(self, markerPath):
+        try:
+            return time.time() - os.stat(markerPath).st_mtime >= self._evictionIntervalSeconds
+        except FileNotFoundError:
+            return True
+
+
+    def _evictIfDue(self):
+        """ See NOTES. Processes finding another one evicting don't wait for it. """
+        markerPath = os.path.join(self._directory, EVICTIONMARKER)
+        if not self._isEvictionDue(markerPath):
+            return
+        try:
+            with open(markerPath, 'a') as markerFile:
+                try:
+                    fcntl.flock(markerFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+                try:
+                    if self._isEvictionDue(markerPath):     # not evicted by another process while we were checking ?
+                        os.utime(markerPath)
+                        self._evict()
+                finally:
+                    fcntl.flock(markerFile, fcntl.LOCK_UN)
+        except OSError as e:
+            self._objDebug.show('SNMP cache : eviction : %s', e)
+
+
+    def _evict(self):
+        try:
+            entries = [ entry for entry in os.scandir(self._directory) if entry.name.endswith('.entry') ]
+            if len(entries) <= self._maxEntries:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_atime)
+            for entry in entries[:len(entries) - self._maxEntries]:
+                os.remove(entry.path)
+        except OSError as e:    # entries removed by another process meanwhile, ...
+            self._objDebug.show('SNMP cache : eviction : %s', e)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+######################################### SnmpFanout.py #############################################
+# FUNCTION :    GET the same OIDs from thousands of SNMP agents, as fast as a single core can : the request
+#               is BER-encoded once, and only its request-id is written for each agent.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. The PDU is encoded once per OID set. Request-ids are taken in [0x01000000, 0x7FFFFFFF] : they
+#                  are all encoded on 4 bytes, so the PDU template never changes size. The message header
+#                  (version + community) is encoded once per community.
+#               2. All agents share a single UDP socket (per address family), responses are matched to their
+#                  request by request-id through a dict, as snmp_GET.py does.
+#               3. Responses are decoded by the minimal BER reader below : no pyasn1 / pysnmp involved.
+#               4. SNMP v1 / v2c GET only. Values are converted as Snmp.getMany() does. When the agent
+#                  answers with an error status, all the OIDs get a VarBindError : the OIDs of this agent
+#                  that do have a value can be queried again with Snmp.getMany().
+#
+########################################## ##########################################################
+
+
+import collections
+import random
+import select
+import socket
+import time
+
+from modules import Snmp
+
+
+MINREQUESTID    = 0x01000000
+MAXREQUESTID    = 0x7FFFFFFF
+
+# BER tags of the SNMP types
+INTEGER, OCTETSTRING, NULL, OID, SEQUENCE = 0x02, 0x04, 0x05, 0x06, 0x30
+IPADDRESS, COUNTER32, GAUGE32, TIMETICKS, OPAQUE, COUNTER64 = 0x40, 0x41, 0x42, 0x43, 0x44, 0x46
+GETREQUEST, RESPONSE = 0xA0, 0xA2
+EXCEPTIONS      = { 0x80 : 'noSuchObject', 0x81 : 'noSuchInstance', 0x82 : 'endOfMibView' }
+ERRORSTATUSES   = ('noError', 'tooBig', 'noSuchName', 'badValue', 'readOnly', 'genErr', 'noAccess',
+    'wrongType', 'wrongLength', 'wrongEncoding', 'wrongValue', 'noCreation', 'inconsistentValue',
+    'resourceUnavailable', 'commitFailed', 'undoFailed', 'authorizationError', 'notWritable', 'inconsistentName')
+
+
+########################################## ##########################################################
+# BER
+
+def encodeLength(length):
+    if length < 0x80:
+        return bytes((length,))
+    lengthBytes = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(lengthBytes),)) + lengthBytes
+
+
+def encodeTlv(tag, value):
+    return bytes((tag,)) + encodeLength(len(value)) + value
+
+
+def encodeOid(oid):
+    arcs    = [ int(arc) for arc in oid.strip('.').split('.') ]
+    encoded = bytearray()
+    for arc in [ arcs[0] * 40 + arcs[1] ] + arcs[2:]:
+        chunk = [ arc & 0x7F ]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        encoded.extend(reversed(chunk))
+    return encodeTlv(OID, bytes(encoded))
+
+
+def readTlv(data, offset):
+    """ Return (tag, start of the value, end of the value) of the TLV at 'offset'. """
+    tag     = data[offset]
+    length  = data[offset + 1]
+    offset  += 2
+    if length & 0x80:
+        lengthSize  = length & 0x7F
+        length      = int.from_bytes(data[offset:offset + lengthSize], 'big')
+        offset      += lengthSize
+    if offset + length > len(data):
+        raise ValueError('Truncated BER value')
+    return tag, offset, offset + length
+
+
+def decodeOid(value):
+    arcs    = []
+    arc     = 0
+    for byte in value:
+        arc = (arc << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(arc)
+            arc = 0
+    first = min(arcs[0] // 40, 2)
+    return '.'.join(map(str, [ first, arcs[0] - first * 40 ] + arcs[1:]))
+
+
+def decodeValue(tag, value):
+    """
+    Decode as Snmp.decodeValue() does : integers, counters, gauges, timeticks become int, OIDs tuples of int,
+    OCTET STRING, IpAddress and Opaque bytes, NULL None.
+    """
+    if tag == INTEGER:
+        return int.from_bytes(value, 'big', signed=True)
+    if tag in (COUNTER32, GAUGE32, TIMETICKS, COUNTER64):
+        return int.from_bytes(value, 'big')
+    if tag == OID:
+        return tuple(int(arc) for arc in decodeOid(value).split('.'))
+    if tag in EXCEPTIONS:
+        return Snmp.VarBindError(EXCEPTIONS[tag])
+    if tag == NULL:
+        return None
+    return bytes(value)     # OCTET STRING, IpAddress, Opaque
+
+
+########################################## ##########################################################
+# ENGINE
+
+class SnmpFanout(object):
+
+    def __init__(self, objDebug, timeoutMilliseconds=1000, retries=1, maxInFlight=5000):
+        self._objDebug          = objDebug
+        self._timeoutSeconds    = timeoutMilliseconds / 1000
+        self._retries           = retries
+        self._maxInFlight       = maxInFlight
+        self._requestId         = random.randint(MINREQUESTID, MAXREQUESTID)
+        self._headers           = {}    # (version, community, PDU length) => message header, see _getHeader()
+        self._sockets           = {}    # address family => socket
+        self._addresses         = {}    # (host, port) => (address family, address), resolved once
+        self._stats             = {
+            'requests'      : 0,
+            'retries'       : 0,
+            'timeouts'      : 0,
+            'bytesSent'     : 0,
+            'bytesReceived' : 0,
+            }
+
+
+    def getAll(self, targets, OIDs):
+        """
+        GET 'OIDs' from all the 'targets' : dicts with the keys 'host' (an IP address, or a name that resolves
+        quickly : targets are resolved one after the other), and optionally 'port' (161), 'community' ('public')
+        and 'version' ('2c').
+        Return a list with, for each target in the same order : { OID : value or Snmp.VarBindError }, or None when
+        the agent couldn't be queried (timeout, invalid address).
+        """
+        results     = [ None ] * len(targets)
+        pduTail     = self._encodePduTail(OIDs)
+        pending     = {}    # request-id => [ target index, address, datagram, retries left, socket ]
+        deadlines   = collections.deque()   # (deadline, request-id), in sending order : deadlines are sorted
+        nextTarget  = 0
+        while nextTarget < len(targets) or pending:
+            while nextTarget < len(targets) and len(pending) < self._maxInFlight:
+                self._sendFirst(nextTarget, targets[nextTarget], pduTail, pending, deadlines)
+                nextTarget += 1
+            if not pending:
+                continue
+            readable, writable, errors = select.select(
+                list(self._sockets.values()), [], [], max(deadlines[0][0] - time.monotonic(), 0))
+            for readableSocket in readable:
+                self._receiveAll(readableSocket, OIDs, pending, results)
+            self._expire(pending, deadlines)
+        return results
+
+
+    def getStats(self):
+        """ { 'requests', 'retries', 'timeouts', 'bytesSent', 'bytesReceived' }, as SnmpSession.getStats(). """
+        return dict(self._stats)
+
+
+    def close(self):
+        for openSocket in self._sockets.values():
+            openSocket.close()
+        self._sockets = {}
+
+
+########################################## ##########################################################
+# SENDING
+
+    def _encodePduTail(self, OIDs):
+        """ The GET PDU after the request-id : error-status, error-index, varbinds. Encoded once per OID set. """
+        nullValue = encodeTlv(NULL, b'')
+        varBinds  = b''.join([ encodeTlv(SEQUENCE, encodeOid(oid) + nullValue) for oid in OIDs ])
+        return encodeTlv(INTEGER, b'\x00') + encodeTlv(INTEGER, b'\x00') + encodeTlv(SEQUENCE, varBinds)
+
+
+    def _getHeader(self, version, community, pduTail):
+        """ Everything before the request-id value : message header, then PDU header. Encoded once per community. """
+        key = (version, community, len(pduTail))
+        if key not in self._headers:
+            pduLength   = 2 + 4 + len(pduTail)      # request-id : tag + length + 4 bytes
+            pduHeader   = bytes((GETREQUEST,)) + encodeLength(pduLength) + bytes((INTEGER, 4))
+            versionTlv  = encodeTlv(INTEGER, b'\x00' if version == '1' else b'\x01')
+            communityTlv = encodeTlv(OCTETSTRING, community.encode())
+            messageLength = len(versionTlv) + len(communityTlv) + len(pduHeader) + 4 + len(pduTail)
+            self._headers[key] = (bytes((SEQUENCE,)) + encodeLength(messageLength)
+                + versionTlv + communityTlv + pduHeader)
+        return self._headers[key]
+
+
+    def _getRequestId(self):
+        self._requestId = self._requestId + 1 if self._requestId < MAXREQUESTID else MINREQUESTID
+        return self._requestId
+
+
+    def _getSocket(self, family):
+        if family not in self._sockets:
+            newSocket = socket.socket(family, socket.SOCK_DGRAM)
+            newSocket.setblocking(False)
+            newSocket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            self._sockets[family] = newSocket
+        return self._sockets[family]
+
+
+    def _sendFirst(self, index, target, pduTail, pending, deadlines):
+        key = (target['host'], target.get('port', 161))
+        if key not in self._addresses:
+            try:
+                family, socketType, proto, canonName, address = socket.getaddrinfo(*key, type=socket.SOCK_DGRAM)[0]
+            except OSError as e:    # socket.gaierror : invalid address / unknown name
+                self._objDebug.show('%s : %s', target['host'], e)
+                return
+            self._addresses[key] = (family, address)
+        family, address = self._addresses[key]
+        requestId   = self._getRequestId()
+        datagram    = (self._getHeader(str(target.get('version', '2c')), target.get('community', 'public'), pduTail)
+            + requestId.to_bytes(4, 'big') + pduTail)
+        pending[requestId] = [ index, address, datagram, self._retries, self._getSocket(family) ]
+        self._stats['requests'] += 1
+        self._send(requestId, pending, deadlines)
+
+
+    def _send(self, requestId, pending, deadlines):
+        index, address, datagram, retriesLeft, sendingSocket = pending[requestId]
+        while True:
+            try:
+                sendingSocket.sendto(datagram, address)
+                break
+            except BlockingIOError:     # socket buffer full : wait until it can take more
+                select.select([], [sendingSocket], [])
+            except OSError as e:        # unreachable network, ...
+                self._objDebug.show('%s : %s', address, e)
+                break
+        self._stats['bytesSent'] += len(datagram)
+        deadlines.append((time.monotonic() + self._timeoutSeconds, requestId))
+
+
+    def _expire(self, pending, deadlines):
+        now = time.monotonic()
+        while deadlines and deadlines[0][0] <= now:
+            deadline, requestId = deadlines.popleft()
+            request = pending.get(requestId)
+            if request is None:
+                continue        # already answered
+            if request[3]:
+                request[3] -= 1
+                self._stats['retries'] += 1
+                self._send(requestId, pending, deadlines)
+            else:
+                self._stats['timeouts'] += 1
+                self._objDebug.show('%s : timeout', request[1])
+                del pending[requestId]
+
+
+########################################## ##########################################################
+# RECEIVING
+
+    def _receiveAll(self, readableSocket, OIDs, pending, results):
+        while True:
+            try:
+                datagram, address = readableSocket.recvfrom(65535)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:     # ICMP port unreachable reported on the socket : the request will time out
+                continue
+            self._stats['bytesReceived'] += len(datagram)
+            try:
+                self._receive(datagram, address, OIDs, pending, results)
+            except (ValueError, IndexError) as e:     # not a valid SNMP response
+                self._objDebug.show('Invalid SNMP response from %s : %s', address, e)
+
+
+    def _receive(self, datagram, address, OIDs, pending, results):
+        tag, start, end = readTlv(datagram, 0)                  # message
+        tag, start, end = readTlv(datagram, start)              # version
+        tag, start, end = readTlv(datagram, end)                # community
+        pduTag, start, pduEnd = readTlv(datagram, end)
+        tag, start, end = readTlv(datagram, start)              # request-id
+        requestId = int.from_bytes(datagram[start:end], 'big', signed=True)
+        request = pending.get(requestId)
+        if pduTag != RESPONSE or request is None or request[1][:2] != address[:2]:
+            return      # late response to a request already answered / given up, or spoofed
+        del pending[requestId]
+
+        tag, start, end = readTlv(datagram, end)                # error-status
+        errorStatus = int.from_bytes(datagram[start:end], 'big')
+        tag, start, end = readTlv(datagram, end)                # error-index
+        tag, start, end = readTlv(datagram, end)                # varbind list
+        if errorStatus:
+            reason = ERRORSTATUSES[errorStatus] if errorStatus < len(ERRORSTATUSES) else str(errorStatus)
+            results[request[0]] = { oid : Snmp.VarBindError(reason) for oid in OIDs }
+            return
+        values      = {}
+        offset      = start
+        for oid in OIDs:
+            tag, varBindStart, offset = readTlv(datagram, offset)
+            tag, start, end = readTlv(datagram, varBindStart)   # OID, as requested
+            tag, start, end = readTlv(datagram, end)
+            values[oid] = decodeValue(tag, datagram[start:end])
+        results[request[0]] = values
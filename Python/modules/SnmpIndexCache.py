@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+######################################### SnmpIndexCache.py #########################################
+# FUNCTION :    Remember, from one run to the next, the row index of each descriptor of a table (filesystem in
+#               hrStorageDescr, interface in ifDescr, ...), so that reading the row of a descriptor is a single
+#               GET instead of a walk of the descriptor column + a GET.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. The GET of the row also reads the descriptor at the cached index, and a validator OID :
+#                       - sysUpTime by default : indexes may change when the agent restarts. The boot time
+#                         (now - sysUpTime) is cached : a restart moves it, however long ago the walk was. It is
+#                         compared with a tolerance (BOOTTIMETOLERANCESECONDS) : request delays, clocks drifting
+#                       - or a table last change OID (ifTableLastChange, ...) : any change of its value
+#                  When the descriptor doesn't match anymore, or the validator says so, the descriptor column is
+#                  walked again, the cache is refreshed, and the row is read again.
+#               2. Descriptors are compared as text : OctetStrings (bytes, see Snmp.decodeValue()) are decoded as
+#                  ISO-8859-1.
+#               3. Stored per host and descriptor column :
+#                       { host : { column OID : { 'validatorOid', 'validator', 'indexes' : { descriptor : index } } } }
+#                  Indexes are dotted strings ('31', '1.2.3', ...). 'validator' is the boot time (seconds since
+#                  the epoch) for sysUpTime, the value of the OID otherwise.
+#
+########################################## ##########################################################
+
+
+import time
+
+from modules import CounterStore
+from modules import Snmp
+
+
+BOOTTIMETOLERANCESECONDS = 5
+
+
+class SnmpIndexCache(object):
+
+    def __init__(self, objDebug, stateFile):
+        """ 'stateFile' : a StateFile. """
+        self._objDebug  = objDebug
+        self._stateFile = stateFile
+
+
+    def getRow(self, objSnmp, host, descrColumnOid, descr, columnOids, lastChangeOid=None):
+        """
+        Return { column OID : value } (values as Snmp.getMany() returns them) for the 'columnOids' of the row which
+        'descrColumnOid' column is 'descr'. Return None when there is no such row, or the agent can't be queried.
+        'lastChangeOid' : validate the cached indexes with this OID rather than with sysUpTime, see NOTES.
+        """
+        validatorOid    = lastChangeOid or CounterStore.SYSUPTIMEOID
+        entry           = self._stateFile.load().get(host, {}).get(descrColumnOid)
+        if entry and entry.get('validatorOid') == validatorOid and descr in entry.get('indexes', {}):
+            values = self._getRowValues(objSnmp, validatorOid, descrColumnOid, entry['indexes'][descr], columnOids)
+            if values is None:
+                return None
+            if self._isValid(entry, values, descrColumnOid, entry['indexes'][descr], descr):
+                return { columnOid : values[columnOid + '.' + entry['indexes'][descr]] for columnOid in columnOids }
+            self._objDebug.show('%s : index of "%s" in %s is stale', host, descr, descrColumnOid)
+
+        indexes = self._walkIndexes(objSnmp, descrColumnOid)
+        if indexes is None:
+            return None
+        if descr not in indexes:
+            self._objDebug.show('%s : no "%s" in %s', host, descr, descrColumnOid)
+            return None
+        values = self._getRowValues(objSnmp, validatorOid, descrColumnOid, indexes[descr], columnOids)
+        if values is None:
+            return None
+        if isinstance(values[validatorOid], Snmp.VarBindError):
+            self._objDebug.show('%s : cannot cache the indexes of %s : %s is %s', host, descrColumnOid, validatorOid,
+                values[validatorOid])
+        else:
+            entry = { 'validatorOid' : validatorOid, 'validator' : self._getValidator(validatorOid, values[validatorOid]),
+                'indexes' : indexes }
+            self._stateFile.update(lambda state: state.setdefault(host, {}).__setitem__(descrColumnOid, entry))
+        return { columnOid : values[columnOid + '.' + indexes[descr]] for columnOid in columnOids }
+
+
+    def _getRowValues(self, objSnmp, validatorOid, descrColumnOid, index, columnOids):
+        """ The validator, the descriptor and the columns of the row 'index', in a single GET. """
+        return objSnmp.getMany([ validatorOid, descrColumnOid + '.' + index ]
+            + [ columnOid + '.' + index for columnOid in columnOids ])
+
+
+    def _getValidator(self, validatorOid, value):
+        """ The boot time of the agent for sysUpTime, 'value' for any other validator OID. See NOTES. """
+        if validatorOid == CounterStore.SYSUPTIMEOID:
+            return time.time() - value / CounterStore.TICKSPERSECOND
+        return value
+
+
+    def _isValid(self, entry, values, descrColumnOid, index, descr):
+        value = values[entry['validatorOid']]
+        if isinstance(value, Snmp.VarBindError) or self._getText(values[descrColumnOid + '.' + index]) != descr:
+            return False
+        validator = self._getValidator(entry['validatorOid'], value)
+        if entry['validatorOid'] == CounterStore.SYSUPTIMEOID:
+            return abs(validator - entry['validator']) <= BOOTTIMETOLERANCESECONDS     # no restart since the walk
+        return validator == entry['validator']
+
+
+    def _walkIndexes(self, objSnmp, descrColumnOid):
+        """ { descriptor : index } of all the rows, or None when the column couldn't be walked. """
+        result = objSnmp.walk(descrColumnOid)
+        if result is None:
+            return None
+        prefixLength = descrColumnOid.count('.') + 1
+        return { self._getText(value) : '.'.join(map(str, oid[prefixLength:])) for oid, value in result.items() }
+
+
+    def _getText(self, value):
+        return value.decode('iso-8859-1') if isinstance(value, bytes) else str(value)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+######################################### SnmpPoller.py #############################################
+# FUNCTION :    Poll many SNMP agents concurrently on a single asyncio event loop : GETs and walks of
+#               all the agents are in flight at the same time, and the results are yielded as soon as
+#               each agent is done.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. All the requests go through a single UDP socket (per address family). Responses are
+#                  matched to their request by request-id and source address.
+#               2. 'concurrency' is the number of requests in flight, all agents together : this is what
+#                  the network and the agents see, whatever the number of agents.
+#               3. SNMP v1 / v2c only : messages are built with the pysnmp v1arch API (as in snmp_GET.py).
+#                  The pysnmp asyncio carrier can't be used : it relies on 'asyncio.coroutine', which
+#                  Python 3.11 removed. SNMPv3 agents are reported with an error : use modules.Snmp.
+#               4. Values are converted by Snmp.decodeValue(), as modules.Snmp does : the same types for
+#                  'get' as for 'walk'.
+#
+########################################## ##########################################################
+
+
+import asyncio
+import socket
+
+from modules import Snmp
+from modules import timer
+
+
+# pysnmp / pyasn1 are only imported when polling starts (see Snmp.py)
+api     = None
+encoder = None
+decoder = None
+univ    = None
+
+
+class _SnmpProtocol(asyncio.DatagramProtocol):
+    """ Hands each response to the request waiting for it. """
+
+    def __init__(self, poller):
+        self._poller = poller
+
+
+    def datagram_received(self, data, address):
+        self._poller._receive(data, address)
+
+
+class SnmpPoller(object):
+
+    def __init__(self, objDebug, concurrency=100, timeoutMilliseconds=1000, retries=3, maxVarBindsPerPdu=64):
+        self._objDebug              = objDebug
+        self._concurrency           = concurrency
+        self._timeoutSeconds        = timeoutMilliseconds / 1000
+        self._retries               = retries
+        self._maxVarBindsPerPdu     = maxVarBindsPerPdu
+        self._stats                 = {
+            'requests'      : 0,
+            'retries'       : 0,
+            'timeouts'      : 0,
+            'bytesSent'     : 0,
+            'bytesReceived' : 0,
+            }
+
+
+    def pollAll(self, targets):
+        """
+        'targets' is a list of dicts with the keys : 'host', and optionally 'port' (161), 'community'
+        ('public'), 'version' ('2c'), 'get' (a list of OIDs) and 'walk' (a list of OIDs to walk).
+        Yield a result per target, as soon as it is complete (not in the order of 'targets'). Each result is
+        a dict with the keys : 'target' (the target dict), 'get' ({ OID : value or Snmp.VarBindError }),
+        'walk' ({ walked OID : { OID : value }, or None when the agent answered an error during the walk : the rows
+        read so far are not the whole table }), 'durationMilliseconds' and 'error' (None unless the
+        agent couldn't be polled : timeout, invalid address, ...).
+        """
+        loop        = asyncio.new_event_loop()
+        results     = self.iterPoll(targets)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.close()
+
+
+    async def iterPoll(self, targets):
+        """ Same as pollAll(), as an asynchronous generator, for callers already running an event loop. """
+        self._loadPysnmp()
+        self._semaphore     = asyncio.Semaphore(self._concurrency)
+        self._transports    = {}    # address family => asyncio transport
+        self._pending       = {}    # request-id => (agent address, future)
+        tasks = [ asyncio.ensure_future(self._pollTarget(target)) for target in targets ]
+        try:
+            for nextResult in asyncio.as_completed(tasks):
+                yield await nextResult
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for transport in self._transports.values():
+                transport.close()
+
+
+    def getStats(self):
+        """ { 'requests', 'retries', 'timeouts', 'bytesSent', 'bytesReceived' }, as SnmpSession.getStats(). """
+        return dict(self._stats)
+
+
+    def _loadPysnmp(self):
+        global api, encoder, decoder, univ
+        if api is None:
+            from pysnmp.proto import api
+            from pyasn1.codec.ber import encoder, decoder
+            from pyasn1.type import univ
+
+
+########################################## ##########################################################
+# POLLING
+
+    async def _pollTarget(self, target):
+        result  = {
+            'target'    : target,
+            'get'       : {},
+            'walk'      : {},
+            'error'     : None,
+            }
+        myTimer = timer.Timer()
+        myTimer.start()
+        try:
+            if str(target.get('version', '2c')) not in ('1', '2c'):
+                raise ValueError('SNMP version ' + str(target['version']) + ' is not supported by the poller')
+            agent = await self._getAgent(target)
+            walks = target.get('walk', [])
+            responses = await asyncio.gather(
+                self._getMany(agent, target.get('get', [])),
+                *[ self._walk(agent, OID) for OID in walks ]
+                )
+            result['get']  = responses[0]
+            result['walk'] = dict(zip(walks, responses[1:]))
+        except (OSError, ValueError) as e:     # TimeoutError is an OSError
+            result['error'] = str(e)
+        result['durationMilliseconds'] = myTimer.stop() / 1000
+        self._objDebug.show('%s : %s GET, %s walks in %sms, error : %s',
+            target['host'], len(result['get']), len(result['walk']), result['durationMilliseconds'], result['error'])
+        return result
+
+
+    async def _getAgent(self, target):
+        """ Resolve the host name, and open the socket of its address family if needed. """
+        loop    = asyncio.get_running_loop()
+        family, socketType, proto, canonName, address = (await loop.getaddrinfo(
+            target['host'], target.get('port', 161), type=socket.SOCK_DGRAM))[0]
+        if family not in self._transports:
+            self._transports[family], protocol = await loop.create_datagram_endpoint(
+                lambda: _SnmpProtocol(self), family=family)
+        return {
+            'address'   : address,
+            'transport' : self._transports[family],
+            'community' : target.get('community', 'public'),
+            'pMod'      : api.protoModules[api.protoVersion1 if str(target.get('version')) == '1' else api.protoVersion2c],
+            }
+
+
+    async def _getMany(self, agent, OIDs):
+        """ Same as Snmp.getMany(), but raises on timeout. """
+        returnData          = {}
+        pending             = list(OIDs)
+        maxVarBindsPerPdu   = self._maxVarBindsPerPdu
+        while pending:
+            chunk = pending[:maxVarBindsPerPdu]
+            errorStatus, errorIndex, varBinds = await self._request(agent, 'get', chunk)
+            if errorStatus == 'tooBig' and len(chunk) > 1:
+                maxVarBindsPerPdu = (len(chunk) + 1) // 2
+                continue
+            if errorStatus:
+                if 0 < errorIndex <= len(chunk):
+                    blamed = [ chunk[errorIndex - 1] ]
+                else:
+                    blamed = chunk
+                for oid in blamed:
+                    returnData[oid] = Snmp.VarBindError(errorStatus)
+                    pending.remove(oid)
+                continue
+            for oid, (returnedOid, value) in zip(chunk, varBinds):
+                returnData[oid] = self._convertGetValue(value)
+            pending = pending[len(chunk):]
+        return returnData
+
+
+    async def _walk(self, agent, OID):
+        """
+        Same as Snmp.walk() : GETBULK with v2c, GETNEXT with v1. Return None when the agent answers an error before
+        the end of the walk. max-repetitions is adapted as Snmp._iterWalkPdus() does, for this walk only.
+        """
+        returnData          = {}
+        rootOid             = univ.ObjectIdentifier(OID)
+        lastOid             = rootOid
+        version1            = agent['pMod'] is api.protoModules[api.protoVersion1]
+        repetitions         = Snmp.MINREPETITIONS
+        tooBigRepetitions   = None      # the lowest max-repetitions the agent answered 'tooBig' to
+        while True:
+            if version1:
+                errorStatus, errorIndex, varBinds = await self._request(agent, 'next', [lastOid])
+            else:
+                errorStatus, errorIndex, varBinds = await self._request(agent, 'bulk', [lastOid], repetitions)
+            if errorStatus == 'tooBig' and repetitions > 1:
+                tooBigRepetitions   = min(repetitions, tooBigRepetitions or repetitions)
+                repetitions         //= 2
+                continue
+            if errorStatus == 'noSuchName' and version1:    # the SNMPv1 end of MIB
+                return returnData
+            if errorStatus:
+                self._objDebug.show('Walk of %s : %s at %s', OID, errorStatus, errorIndex)
+                return None
+
+            for oid, value in varBinds:
+                if isinstance(value, api.v2c.EndOfMibView) or not rootOid.isPrefixOf(oid) or oid <= lastOid:
+                    return returnData
+                returnData[oid.asTuple()] = Snmp.decodeValue(value)
+                lastOid = oid
+            if not varBinds:
+                return returnData
+            if len(varBinds) >= repetitions:
+                if tooBigRepetitions:
+                    repetitions = min(repetitions * 2, (repetitions + tooBigRepetitions) // 2)
+                else:
+                    repetitions = min(repetitions * 2, Snmp.MAXREPETITIONS)
+
+
+    def _convertGetValue(self, value):
+        if isinstance(value, (api.v2c.NoSuchObject, api.v2c.NoSuchInstance, api.v2c.EndOfMibView)):
+            name = value.__class__.__name__
+            return Snmp.VarBindError(name[0].lower() + name[1:])
+        return Snmp.decodeValue(value)
+
+
+########################################## ##########################################################
+# TRANSPORT
+
+    async def _request(self, agent, pduType, OIDs, maxRepetitions=0):
+        """
+        Send a request, resending it on timeout, and return (errorStatus name or None, errorIndex, varBinds).
+        Raise TimeoutError when all the retries timed out.
+        """
+        pMod = agent['pMod']
+        if pduType == 'bulk':
+            pdu = pMod.GetBulkRequestPDU()
+            pMod.apiBulkPDU.setDefaults(pdu)
+            pMod.apiBulkPDU.setNonRepeaters(pdu, 0)
+            pMod.apiBulkPDU.setMaxRepetitions(pdu, maxRepetitions)
+        else:
+            pdu = pMod.GetRequestPDU() if pduType == 'get' else pMod.GetNextRequestPDU()
+            pMod.apiPDU.setDefaults(pdu)
+        pMod.apiPDU.setVarBinds(pdu, [ (oid, pMod.Null('')) for oid in OIDs ])
+        message = pMod.Message()
+        pMod.apiMessage.setDefaults(message)
+        pMod.apiMessage.setCommunity(message, agent['community'])
+        pMod.apiMessage.setPDU(message, pdu)
+        data        = encoder.encode(message)
+        requestId   = int(pMod.apiPDU.getRequestID(pdu))
+        future      = asyncio.get_running_loop().create_future()
+
+        self._pending[requestId] = (agent['address'], future)
+        try:
+            async with self._semaphore:
+                self._stats['requests'] += 1
+                for attempt in range(self._retries + 1):
+                    if attempt:
+                        self._stats['retries'] += 1
+                    agent['transport'].sendto(data, agent['address'])
+                    self._stats['bytesSent'] += len(data)
+                    try:
+                        responsePdu = await asyncio.wait_for(asyncio.shield(future), self._timeoutSeconds)
+                        break
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    self._stats['timeouts'] += 1
+                    raise TimeoutError('No SNMP response received before timeout')
+        finally:
+            del self._pending[requestId]
+
+        errorStatus = pMod.apiPDU.getErrorStatus(responsePdu)
+        return (errorStatus.prettyPrint() if errorStatus else None,
+            int(pMod.apiPDU.getErrorIndex(responsePdu)),
+            pMod.apiPDU.getVarBinds(responsePdu))
+
+
+    def _receive(self, data, address):
+        self._stats['bytesReceived'] += len(data)
+        try:
+            pMod            = api.protoModules[api.decodeMessageVersion(data)]
+            message, rest   = decoder.decode(data, asn1Spec=pMod.Message())
+            pdu             = pMod.apiMessage.getPDU(message)
+            requestId       = int(pMod.apiPDU.getRequestID(pdu))
+        except Exception as e:     # pyasn1 errors : not an SNMP message
+            self._objDebug.show('Invalid SNMP response from %s : %s', address, e)
+            return
+        agentAddress, future = self._pending.get(requestId, (None, None))
+        if future is None or future.done() or agentAddress[:2] != address[:2]:
+            return      # late response to a request already answered / given up, or spoofed
+        future.set_result(pdu)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+######################################### SnmpSession.py ############################################
+# FUNCTION :    The pysnmp engine, credentials and UDP transport of an SNMP agent, built once and shared
+#               by all the requests sent to this agent (see getSession()).
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Requests are sent with the pysnmp 'entity.rfc3413' command generators : OIDs are sent as
+#                  they are, without going through the MIB view controller (which takes ~300ms to load).
+#               2. A session sends one request at a time : concurrent callers (threads) wait for their turn.
+#               3. Stats : 'requests' are the requests asked for, 'retries' the extra messages that were sent
+#                  (resent requests, and SNMPv3 discovery), 'timeouts' the requests that got no response.
+#               4. Long-lived processes (PluginRunner.py) query many agents : only the MAXSESSIONS sessions
+#                  used last are kept, the others are closed (engine and socket). A closed session still works :
+#                  its next request opens it again.
+#
+########################################## ##########################################################
+
+
+import collections
+import threading
+
+
+MAXSESSIONS     = 64
+
+_sessions       = collections.OrderedDict()     # (host, port, version, credentials, timeout) => SnmpSession, last used last
+_sessionsLock   = threading.Lock()
+
+
+def getSession(host, port=161, community='public', version='2c', timeoutMilliseconds=1000,
+        user=None, authKey=None, privKey=None):
+    """ Return the session for these parameters, creating it on first use. See NOTES about the sessions kept. """
+    key = (host, port, str(version), community, user, authKey, privKey, timeoutMilliseconds)
+    with _sessionsLock:
+        if key in _sessions:
+            _sessions.move_to_end(key)
+            return _sessions[key]
+        _sessions[key] = SnmpSession(host, port, community, version, timeoutMilliseconds, user, authKey, privKey)
+        evicted = []
+        while len(_sessions) > MAXSESSIONS:
+            evicted.append(_sessions.popitem(last=False)[1])
+        session = _sessions[key]
+    for evictedSession in evicted:     # out of the lock : this waits for the request being sent, if any
+        evictedSession.close()
+    return session
+
+
+def clearSessions():
+    """ Close and forget all the sessions. """
+    with _sessionsLock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+class SnmpSession(object):
+
+    def __init__(self, host, port=161, community='public', version='2c', timeoutMilliseconds=1000,
+            user=None, authKey=None, privKey=None, retries=3):
+        """
+        'version' : '1', '2c' or '3'. With '3', 'community' is unused : 'user', and 'authKey' / 'privKey' when
+        authentication / privacy are enabled, are used instead (with the pysnmp default protocols : MD5 / DES).
+        """
+        self._host                  = host
+        self._port                  = port
+        self._community             = community
+        self._version               = str(version)
+        self._timeoutMilliseconds   = timeoutMilliseconds
+        self._user                  = user
+        self._authKey               = authKey
+        self._privKey               = privKey
+        self._retries               = retries
+        self._lock                  = threading.Lock()
+        self._engine                = None      # built by the first request
+        self._stats                 = {
+            'requests'      : 0,
+            'messagesSent'  : 0,
+            'timeouts'      : 0,
+            'bytesSent'     : 0,
+            'bytesReceived' : 0,
+            }
+
+
+    def getVersion(self):
+        return self._version
+
+
+    def getStats(self):
+        """ { 'requests', 'retries', 'timeouts', 'bytesSent', 'bytesReceived' } since the session was created. """
+        return {
+            'requests'      : self._stats['requests'],
+            'retries'       : max(self._stats['messagesSent'] - self._stats['requests'], 0),
+            'timeouts'      : self._stats['timeouts'],
+            'bytesSent'     : self._stats['bytesSent'],
+            'bytesReceived' : self._stats['bytesReceived'],
+            }
+
+
+    def request(self, pduType, OIDs, maxRepetitions=0):
+        """
+        Send a single request and wait for its response.
+        'pduType' : 'get', 'next' or 'bulk' (GETBULK without non-repeaters).
+        'OIDs' : strings or pyasn1 ObjectIdentifiers.
+        Return (errorIndication, errorStatus, errorIndex, varBinds). With 'bulk', 'varBinds' holds all the
+        repetitions, row after row.
+        May raise pysnmp errors, such as an invalid address on the first request.
+        """
+        with self._lock:
+            self._open()
+            varBinds = [ (self._univ.ObjectIdentifier(oid), self._univ.Null('')) for oid in OIDs ]
+            response = []
+            def callback(snmpEngine, sendRequestHandle, errorIndication, errorStatus, errorIndex, varBinds, cbCtx):
+                response.append((errorIndication, errorStatus, errorIndex, varBinds))
+
+            self._stats['requests'] += 1
+            if pduType == 'bulk':
+                self._commandGenerators['bulk'].sendVarBinds(
+                    self._engine, self._targetName, None, '', 0, maxRepetitions, varBinds, callback)
+            else:
+                self._commandGenerators[pduType].sendVarBinds(
+                    self._engine, self._targetName, None, '', varBinds, callback)
+            self._engine.transportDispatcher.runDispatcher()
+
+            if isinstance(response[0][0], self._errind.RequestTimedOut):
+                self._stats['timeouts'] += 1
+            return response[0]
+
+
+    def close(self):
+        """ Release the engine and its socket. The next request opens the session again. """
+        with self._lock:
+            if self._engine is not None:
+                self._engine.transportDispatcher.closeDispatcher()
+                self._engine.unregisterTransportDispatcher()
+                self._engine = None
+
+
+    def _open(self):
+        """ Build the engine, credentials and transport. Nothing is kept if this fails. """
+        if self._engine is not None:
+            return
+        from pyasn1.type import univ
+        from pysnmp.entity import engine
+        from pysnmp.entity.rfc3413 import cmdgen
+        from pysnmp.hlapi.asyncore import CommunityData, UsmUserData, UdpTransportTarget
+        from pysnmp.hlapi.lcd import CommandGeneratorLcdConfigurator
+        from pysnmp.proto import errind
+
+        if self._version == '3':
+            authData = UsmUserData(self._user, self._authKey, self._privKey)
+        else:
+            authData = CommunityData(self._community, mpModel = 0 if self._version == '1' else 1)
+        transportTarget = UdpTransportTarget(
+            (self._host, self._port),
+            timeout = self._timeoutMilliseconds / 1000,
+            retries = self._retries
+            )
+        snmpEngine = engine.SnmpEngine()
+        snmpEngine.registerTransportDispatcher(self._getCountingDispatcher())
+        self._targetName, paramsName = CommandGeneratorLcdConfigurator().configure(snmpEngine, authData, transportTarget, '')
+
+        self._univ              = univ
+        self._errind            = errind
+        self._commandGenerators = {
+            'get'   : cmdgen.GetCommandGenerator(),
+            'next'  : cmdgen.NextCommandGeneratorSingleRun(),
+            'bulk'  : cmdgen.BulkCommandGeneratorSingleRun(),
+            }
+        self._engine = snmpEngine
+
+
+    def _getCountingDispatcher(self):
+        """ The pysnmp transport dispatcher, counting the messages and bytes sent and received. """
+        from pysnmp.carrier.asyncore.dispatch import AsyncoreDispatcher
+        stats = self._stats
+
+        class CountingDispatcher(AsyncoreDispatcher):
+
+            def sendMessage(self, outgoingMessage, transportDomain, transportAddress):
+                stats['messagesSent']   += 1
+                stats['bytesSent']      += len(outgoingMessage)
+                return AsyncoreDispatcher.sendMessage(self, outgoingMessage, transportDomain, transportAddress)
+
+            def _cbFun(self, incomingTransport, transportAddress, incomingMessage):
+                stats['bytesReceived']  += len(incomingMessage)
+                return AsyncoreDispatcher._cbFun(self, incomingTransport, transportAddress, incomingMessage)
+
+        return CountingDispatcher()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+######################################### SnmpTable.py ##############################################
+# FUNCTION :    Columns of an SNMP table (hrStorageTable, ifTable, ...) walked together, and joined on their
+#               row index : 1 array per column, and 1 row index vector shared by all the columns.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Integer columns are NumPy integer arrays, or float arrays (NaN where a row has no value) when
+#                  some rows have no value. Other columns are NumPy object arrays (None where a row has no
+#                  value). Filters and computations on a whole column are 1 NumPy operation, e.g. :
+#                       usedPercent = 100 * table.getColumn('used') / table.getColumn('size')
+#                       rootRow     = table.getRowsWhere('descr', b'/')
+#               2. Row indexes are the OID suffixes after the column OID ((31,), (1, 2, 3), ...), as tuples of
+#                  int, as Snmp.walk() returns OIDs. Rows are sorted as the agent sorts them.
+#
+########################################## ##########################################################
+
+
+class SnmpTable(object):
+
+    def __init__(self, indexes, columns):
+        """
+        'indexes' : a NumPy object array of the row indexes. 'columns' : { column name : NumPy array, 1 value per row }.
+        See fromWalks() to build a table from walks.
+        """
+        self._indexes   = indexes
+        self._columns   = columns
+        self._rowOf     = None      # { index : row number }, built on the first getRow()
+
+
+    @classmethod
+    def fromWalks(cls, walks):
+        """
+        'walks' : { column name : { index : value } }, 1 walk per column. Join them on the index : the table has
+        a row for each index found in any of the columns.
+        """
+        import numpy
+        # walks return rows in the agent order, which is the index order : when all the columns have the same rows,
+        # there is nothing to join
+        walkIndexes = [ list(walk) for walk in walks.values() ]
+        sameRows    = all(thoseIndexes == walkIndexes[0] for thoseIndexes in walkIndexes)
+        if sameRows:
+            indexes = walkIndexes[0] if walkIndexes else []
+        else:
+            allIndexes  = {}
+            for thoseIndexes in walkIndexes:
+                allIndexes.update(dict.fromkeys(thoseIndexes))
+            indexes = sorted(allIndexes)
+        rowOf       = { index : row for row, index in enumerate(indexes) }
+
+        columns = {}
+        for (name, walk), thoseIndexes in zip(walks.items(), walkIndexes):
+            values  = list(walk.values())
+            integer = set(map(type, values)) <= { int }
+            if integer and sameRows:
+                column = numpy.array(values)    # int64, or uint64 for Counter64 values over 2^63 : exact
+            else:
+                if integer:
+                    column = numpy.full(len(indexes), numpy.nan)
+                else:
+                    column = numpy.full(len(indexes), None, dtype=object)
+                column[[ rowOf[index] for index in thoseIndexes ]] = values
+            columns[name] = column
+
+        indexVector     = numpy.empty(len(indexes), dtype=object)   # 1 tuple per cell, not a 2D array
+        indexVector[:]  = indexes
+        table = cls(indexVector, columns)
+        table._rowOf = rowOf
+        return table
+
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+    def getIndexes(self):
+        return self._indexes
+
+
+    def getColumnNames(self):
+        return list(self._columns)
+
+
+    def getColumn(self, name):
+        """ The values of column 'name', 1 per row, in the order of getIndexes(). """
+        return self._columns[name]
+
+
+    def getRow(self, index):
+        """ Return { column name : value } for the row 'index', or None when there is no such row. """
+        if self._rowOf is None:
+            self._rowOf = { index : row for row, index in enumerate(self._indexes) }
+        row = self._rowOf.get(index)
+        if row is None:
+            return None
+        return { name : column[row] for name, column in self._columns.items() }
+
+
+    def getRowsWhere(self, name, value):
+        """ The table of the rows which column 'name' equals 'value'. """
+        return self.filter(self._columns[name] == value)
+
+
+    def filter(self, mask):
+        """ The table of the rows selected by 'mask' : a NumPy boolean array, 1 value per row. """
+        return SnmpTable(self._indexes[mask], { name : column[mask] for name, column in self._columns.items() })
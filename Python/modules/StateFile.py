@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+######################################### StateFile.py ##############################################
+# FUNCTION :    What a plugin keeps from one run to the next (counters, snapshots, ...), as a JSON file.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Files are written to a temporary file, then renamed : a run killed while saving, or a
+#                  concurrent run, never sees a partial file.
+#               2. update() holds an 'flock' on '<file>.lock' from load to save : concurrent runs sharing a
+#                  state file (same host checked by several services, ...) don't lose each other's updates.
+#               3. A missing or unreadable file is an empty state : the plugin starts over.
+#
+########################################## ##########################################################
+
+
+import fcntl
+import json
+import os
+import re
+import tempfile
+
+
+DEFAULTDIRECTORY = os.path.join(tempfile.gettempdir(), 'nagios_state_' + str(os.getuid()))
+
+
+class StateFile(object):
+
+    def __init__(self, objDebug, name, directory=DEFAULTDIRECTORY):
+        """ 'name' : the plugin, host, ... this state belongs to. Characters not allowed in file names are replaced. """
+        self._objDebug  = objDebug
+        self._directory = directory
+        self._path      = os.path.join(directory, re.sub('[^A-Za-z0-9._-]', '_', name) + '.json')
+
+
+    def getPath(self):
+        return self._path
+
+
+    def load(self):
+        try:
+            with open(self._path) as stateFile:
+                state = json.load(stateFile)
+            return state if isinstance(state, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self._objDebug.show('State file %s : cannot read : %s', self._path, e)
+            return {}
+
+
+    def save(self, state):
+        """ Return False when the state couldn't be saved (it is not worth failing the check for). """
+        try:
+            os.makedirs(self._directory, mode=0o700, exist_ok=True)
+            fileDescriptor, temporaryPath = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+            try:
+                with os.fdopen(fileDescriptor, 'w') as temporaryFile:
+                    json.dump(state, temporaryFile, separators=(',', ':'))
+                os.replace(temporaryPath, self._path)
+            except BaseException:
+                os.unlink(temporaryPath)
+                raise
+            return True
+        except OSError as e:
+            self._objDebug.show('State file %s : cannot save : %s', self._path, e)
+            return False
+
+
+    def update(self, updateFunction):
+        """
+        Load the state, call 'updateFunction(state)' (which changes 'state' in place, and returns anything),
+        save the state, and return what 'updateFunction' returned. Concurrent updates wait for each other.
+        """
+        try:
+            os.makedirs(self._directory, mode=0o700, exist_ok=True)
+            lockFile = open(self._path + '.lock', 'a')
+        except OSError as e:
+            self._objDebug.show('State file %s : cannot lock : %s', self._path, e)
+            state   = self.load()
+            result  = updateFunction(state)
+            self.save(state)
+            return result
+        with lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            state   = self.load()
+            result  = updateFunction(state)
+            self.save(state)
+        return result
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+######################################### Threshold.py ##############################################
+# FUNCTION :    Warning / critical thresholds, parsed once, then evaluated against a single value or
+#               against a whole array of values at once.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Ranges : http://nagiosplug.sourceforge.net/developer-guidelines.html#THRESHOLDFORMAT
+#                   10          alert if < 0 or > 10
+#                   10:         alert if < 10
+#                   ~:10        alert if > 10
+#                   10:20       alert if < 10 or > 20
+#                   @10:20      alert if >= 10 and <= 20
+#               2. With 'invertible=True', thresholds that are both plain numbers keep the meaning they
+#                  have everywhere else in these plugins (see NagiosPlugin.computeExitStatus()) :
+#                  warn < crit : the higher, the worse. warn > crit : the lower, the worse. 0 / 0 : no alert.
+#               3. getStatuses() needs NumPy, which is only imported when it is called.
+#
+########################################## ##########################################################
+
+
+import math
+import re
+
+
+NUMBER      = r'[-+]?(?:\d+(?:\.\d*)?|\.\d+)'
+# for CommandLine 'rule' : 'N', 'N:', '~:N', ':N', 'N:M', each with an optional '@'. Inverted ranges ('20:10') can't
+# be told by a RegExp : Threshold() raises ValueError on them, see NagiosPlugin._getThreshold()
+RANGERULE   = '@?(?:' + NUMBER + '|(?:~|' + NUMBER + ')?:' + NUMBER + '|' + NUMBER + ':)'
+STATUSES    = ('OK', 'WARNING', 'CRITICAL')                          # the exit code is the index
+
+
+class Threshold(object):
+
+    def __init__(self, warning=None, critical=None, invertible=False):
+        """ 'warning' and 'critical' are range strings (or numbers). None or '' means 'never alert'. """
+        self._noThresholds = False
+        if invertible and self._isPlainNumber(warning) and self._isPlainNumber(critical):
+            self._warningRange, self._criticalRange = self._getInvertedRanges(float(warning), float(critical))
+        else:
+            self._warningRange  = self._parseRange(warning)
+            self._criticalRange = self._parseRange(critical)
+
+
+    def getStatus(self, value):
+        """ Return 'OK', 'WARNING' or 'CRITICAL' ('NOWARN (ok)' when there are no thresholds, see NOTES). """
+        if self._noThresholds:
+            return self._getNoThresholdsStatus()
+        value = float(value)
+        if self._isAlert(self._criticalRange, value):
+            return 'CRITICAL'
+        if self._isAlert(self._warningRange, value):
+            return 'WARNING'
+        return 'OK'
+
+
+    def getStatuses(self, values):
+        """
+        Evaluate all the values in one go.
+        Return the per-value exit codes (a NumPy array of 0 / 1 / 2, see STATUSES), and the worst status.
+        """
+        import numpy
+        values  = numpy.asarray(values, dtype=float)
+        states  = numpy.zeros(values.shape, dtype=numpy.int8)
+        if self._noThresholds:
+            return states, self._getNoThresholdsStatus()
+        if self._warningRange:
+            states[self._getAlerts(self._warningRange, values)] = 1
+        if self._criticalRange:
+            states[self._getAlerts(self._criticalRange, values)] = 2
+        return states, STATUSES[int(states.max())] if states.size else 'OK'
+
+
+########################################## ##########################################################
+# PARSING
+
+    def _isPlainNumber(self, threshold):
+        return re.search('^' + NUMBER + '$', str(threshold)) is not None
+
+
+    def _parseRange(self, threshold):
+        """ Return (start, end, inside, closed), or None when there's no threshold. """
+        if threshold is None or str(threshold) == '':
+            return None
+        match = re.search('^(@?)(?:(~|' + NUMBER + ')?(:))?(' + NUMBER + ')?$', str(threshold))
+        if not match or not (match.group(3) or match.group(4)):
+            raise ValueError('Invalid threshold range "' + str(threshold) + '"')
+        inside, start, colon, end = match.groups()
+        start   = -math.inf if start == '~' else float(start or 0)
+        end     = math.inf if end is None else float(end)
+        if start > end:
+            raise ValueError('Invalid threshold range "' + str(threshold) + '" : start > end')
+        return start, end, inside == '@', True
+
+
+    def _getInvertedRanges(self, warning, critical):
+        """
+        Values equal to the warning threshold are WARNING : the 'OK' range is open on this side,
+        hence 'closed = False'.
+        """
+        if warning == 0 and critical == 0:
+            self._noThresholds = True
+            return None, None
+        if warning < critical:
+            return (-math.inf, warning, False, False), (-math.inf, critical, False, True)
+        return (warning, math.inf, False, False), (critical, math.inf, False, True)
+
+
+    def _getNoThresholdsStatus(self):
+        from modules import NagiosPlugin
+        return NagiosPlugin.okNoWarnString
+
+
+########################################## ##########################################################
+# EVALUATION
+
+    def _isAlert(self, valueRange, value):
+        if valueRange is None:
+            return False
+        start, end, inside, closed = valueRange
+        isOutside = (value < start or value > end) if closed else (value <= start or value >= end)
+        return not isOutside if inside else isOutside
+
+
+    def _getAlerts(self, valueRange, values):
+        start, end, inside, closed = valueRange
+        isOutside = ((values < start) | (values > end)) if closed else ((values <= start) | (values >= end))
+        return ~isOutside if inside else isOutside
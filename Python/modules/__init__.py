@@ -0,0 +1,5 @@
+import sys
+
+if '--import-profile' in sys.argv:
+    from modules import ImportProfile
+    ImportProfile.ImportProfile().install()
@@ -1,8 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+######################################### timer.py ##################################################
+# FUNCTION :    Measure durations, as a whole and split into named spans (DNS, connect, ...).
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. Based on time.perf_counter_ns() : monotonic (not fooled by NTP / manual clock changes) and
+#                  with a nanosecond resolution.
+#
+########################################## ##########################################################
 
-from datetime import datetime
+
+import time
 
 
 class Timer(object):
@@ -12,14 +23,31 @@ class Timer(object):
 
 
     def start(self):
-        self._startTime = datetime.now()
+        self._startTime     = time.perf_counter_ns()
+        self._lapTime       = self._startTime
+        self._spans         = []
 
 
-    def stop(self):
-        """ Return the elapsed time as µ-seconds. """
-        # source : http://stackoverflow.com/questions/766335/python-speed-testing-time-difference-milliseconds
-#        print "START : " + `self._startTime`
-#        print "STOP  : " + `self._stopTime`
-        duration = datetime.now() - self._startTime     # <== duration is a 'timedelta' object
-        return duration.seconds * 1000000 + duration.microseconds
+    def lap(self, spanName):
+        """
+        Close the span 'spanName' : from the previous lap (or start) until now.
+        Return its duration as nanoseconds.
+        """
+        now                 = time.perf_counter_ns()
+        duration            = now - self._lapTime
+        self._lapTime       = now
+        self._spans.append((spanName, duration))
+        return duration
+
 
+    def getSpansMilliseconds(self):
+        """ { spanName : milliseconds }. Spans closed many times under the same name are added up. """
+        spans = {}
+        for spanName, duration in self._spans:
+            spans[spanName] = spans.get(spanName, 0) + duration
+        return dict((spanName, duration / 1000000) for spanName, duration in spans.items())
+
+
+    def stop(self):
+        """ Return the elapsed time since start() as µ-seconds. """
+        return (time.perf_counter_ns() - self._startTime) // 1000
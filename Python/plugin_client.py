@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# plugin_client.py - Copyright (C) 2012 Matthieu FOURNET, fournet.matthieu@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+######################################### plugin_client.py ##########################################
+# FUNCTION :    Tiny shim sending a plugin command line to 'plugin_runner.py' and relaying the plugin
+#               output + exit code to Nagios.
+#
+# VERSION :     20131020
+#
+# COMMAND LINE :    (the scissors 8< mean the command continues on the next line)
+#       ./plugin_client.py [--socket=/var/tmp/plugin_runner.sock] check_web.py --url="http://www.voici.fr" 8<
+#           --httpStatusCode=200 -w 2500 -c 4000
+#
+# NOTES :	1. This script imports nothing but 'os', 'socket' and 'sys' on purpose : keep it that way.
+#               2. When the runner is not available, the plugin is run the usual way.
+#
+# KNOWN BUGS AND LIMITATIONS :
+#               1.
+#
+########################################## ##########################################################
+
+
+import os
+import socket
+import sys
+
+
+SOCKETPATH = '/var/tmp/plugin_runner.sock'
+
+argv = sys.argv[1:]
+if argv and argv[0].startswith('--socket='):
+    SOCKETPATH = argv.pop(0)[len('--socket='):]
+
+if not argv:
+    print('UNKNOWN. Usage : ' + sys.argv[0] + ' [--socket=PATH] plugin.py [plugin arguments]')
+    sys.exit(3)
+
+try:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(SOCKETPATH)
+except socket.error:
+    pluginPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.basename(argv[0]))
+    os.execv(sys.executable, [sys.executable, pluginPath] + argv[1:])
+
+client.sendall('\0'.join(argv).encode())
+client.shutdown(socket.SHUT_WR)
+response = b''
+while True:
+    data = client.recv(65536)
+    if not data:
+        break
+    response += data
+client.close()
+
+exitCode, _, output = response.decode().partition('\n')
+sys.stdout.write(output)
+sys.exit(int(exitCode) if exitCode.isdigit() else 3)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# plugin_runner.py - Copyright (C) 2012 Matthieu FOURNET, fournet.matthieu@gmail.com
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+######################################### plugin_runner.py ##########################################
+# FUNCTION :    Daemon running the Python plugins of this directory in-process, so that each check
+#               doesn't pay for a fresh interpreter + imports. Plugins are invoked through the
+#               'plugin_client.py' shim.
+#
+# VERSION :     20131020
+#
+# COMMAND LINE :    (the scissors 8< mean the command continues on the next line)
+#       ./plugin_runner.py --socket=/var/tmp/plugin_runner.sock --workers=4 &
+#       ./plugin_client.py --socket=/var/tmp/plugin_runner.sock 8<
+#           check_local_cpu.py -w 75 -c 90
+#
+# NOTES :	1. The socket is created with mode 0600 : run the runner as the Nagios / NRPE user.
+#
+# KNOWN BUGS AND LIMITATIONS :
+#               1. A plugin hanging forever keeps its worker busy forever.
+#
+########################################## ##########################################################
+
+
+import os
+
+from modules import CommandLine
+from modules import Debug
+from modules import PluginRunner
+from modules import Utility
+
+
+########################################## ##########################################################
+# CONFIG
+########################################## ##########################################################
+SOCKETPATH  = '/var/tmp/plugin_runner.sock'
+PRELOAD     = [
+    'argparse',
+    'http.client',
+    'modules.CheckLocalCpu',
+    'modules.CommandLine',
+    'modules.Debug',
+    'modules.NagiosPlugin',
+    'modules.Snmp',
+    'modules.Url',
+    'modules.Utility',
+    'modules.timer',
+    'psutil',
+    'pysnmp.entity.rfc3413.oneliner.cmdgen',
+    ]
+########################################## ##########################################################
+# /CONFIG
+# main()
+########################################## ##########################################################
+
+
+myUtility   = Utility.Utility()
+myDebug     = Debug.Debug()
+
+myCommandLine = CommandLine.CommandLine(
+    description = 'Run the Python plugins in-process.',
+    objDebug    = myDebug,
+    objUtility  = myUtility
+    )
+
+myCommandLine.declareArgument({
+    'shortOption'   : 's',
+    'longOption'    : 'socket',
+    'required'      : False,
+    'default'       : SOCKETPATH,
+    'help'          : 'Unix socket to listen on (optional. Defaults to ' + SOCKETPATH + ')',
+    'rule'          : '[\w/\.\-]+'
+    })
+
+myCommandLine.declareArgument({
+    'shortOption'   : 'n',
+    'longOption'    : 'workers',
+    'required'      : False,
+    'default'       : '1',
+    'help'          : 'Number of worker processes (optional. Defaults to 1)',
+    'rule'          : '\d+'
+    })
+
+myCommandLine.declareArgumentDebug()
+myCommandLine.readArgs()
+
+if not myCommandLine.checkArgsMatchRules():
+    myDebug.die(exitMessage = 'args dont match rules :-(')
+
+myRunner = PluginRunner.PluginRunner(
+    objDebug    = myDebug,
+    socketPath  = myCommandLine.getArgValue('socket'),
+    pluginDir   = os.path.dirname(os.path.abspath(__file__)),
+    workers     = int(myCommandLine.getArgValue('workers'))
+    )
+myRunner.preload(PRELOAD)
+myDebug.flush()
+myRunner.serve()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+######################################### SnmpTestAgent.py ##########################################
+# FUNCTION :    Minimal SNMP v1 / v2c agent answering on 127.0.0.1, in a thread of the test process : the
+#               tests of the SNMP transports (SnmpSession, SnmpPoller, SnmpFanout) send real UDP requests
+#               without depending on a host of the network.
+#
+# AUTHOR :	Matthieu FOURNET (fournet.matthieu@gmail.com)
+# LICENSE :	GPL - http://www.fsf.org/licenses/gpl.txt
+#
+# NOTES :	1. GET, GETNEXT and GETBULK, on the OIDs of MIB (or those given to the constructor). Missing OIDs
+#                  are 'noSuchName' errors with SNMPv1, noSuchObject values with SNMPv2c. As real agents do,
+#                  SNMPv1 GETNEXT skips the Counter64 values, which SNMPv1 can't carry.
+#               2. Not collected by the test runners : its name doesn't start with 'test_'.
+#
+########################################## ##########################################################
+
+
+import bisect
+import socket
+import threading
+
+
+def getMib():
+    """
+    { OID tuple : pysnmp value } : sysServices = 72, the sysORID column (8 rows), and 3 interfaces : ifIndex,
+    ifDescr, ifInOctets (Counter32) and ifHCInOctets (Counter64, over 2^53).
+    """
+    from pysnmp.proto import rfc1902
+    mib = { (1, 3, 6, 1, 2, 1, 1, 7, 0) : rfc1902.Integer(72) }
+    for row in range(1, 9):
+        mib[(1, 3, 6, 1, 2, 1, 1, 9, 1, 2, row)] = rfc1902.ObjectName('1.3.6.1.6.3.' + str(row))
+    for row in range(1, 4):
+        mib[(1, 3, 6, 1, 2, 1, 2, 2, 1, 1, row)]        = rfc1902.Integer(row)
+        mib[(1, 3, 6, 1, 2, 1, 2, 2, 1, 2, row)]        = rfc1902.OctetString('eth' + str(row - 1))
+        mib[(1, 3, 6, 1, 2, 1, 2, 2, 1, 10, row)]       = rfc1902.Counter32(row * 1000)
+        mib[(1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 6, row)]    = rfc1902.Counter64(2**60 + row)
+    return mib
+
+
+class SnmpTestAgent(object):
+
+    def __init__(self, mib=None, community='public'):
+        self._mib       = mib or getMib()
+        self._oids      = sorted(self._mib)
+        self._community = community
+        self.requests   = 0
+        self._socket    = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(('127.0.0.1', 0))
+        self._thread    = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+
+    def getPort(self):
+        return self._socket.getsockname()[1]
+
+
+    def stop(self):
+        self._socket.close()
+
+
+    def _serve(self):
+        while True:
+            try:
+                data, address = self._socket.recvfrom(65535)
+            except OSError:     # stop()
+                return
+            response = self._getResponse(data)
+            if response:
+                self._socket.sendto(response, address)
+
+
+    def _getNextOid(self, oid, version1=False):
+        from pysnmp.proto import rfc1902
+        position = bisect.bisect_right(self._oids, tuple(oid))
+        while version1 and position < len(self._oids) and isinstance(self._mib[self._oids[position]], rfc1902.Counter64):
+            position += 1
+        return self._oids[position] if position < len(self._oids) else None
+
+
+    def _getResponse(self, data):
+        from pyasn1.codec.ber import decoder, encoder
+        from pysnmp.proto import api
+        version = int(api.decodeMessageVersion(data))
+        pMod    = api.protoModules[version]
+        request, _ = decoder.decode(data, asn1Spec=pMod.Message())
+        self.requests += 1
+        if str(pMod.apiMessage.getCommunity(request)) != self._community:
+            return None
+        response    = pMod.apiMessage.getResponse(request)
+        requestPdu  = pMod.apiMessage.getPDU(request)
+        responsePdu = pMod.apiMessage.getPDU(response)
+        oids        = [ oid for oid, value in pMod.apiPDU.getVarBinds(requestPdu) ]
+        varBinds    = []
+        for position, oid in enumerate(oids):
+            if requestPdu.isSameTypeWith(pMod.GetRequestPDU()):
+                nextOid = tuple(oid) if tuple(oid) in self._mib else None
+            else:
+                nextOid = self._getNextOid(oid, version == api.protoVersion1)
+            if nextOid is None and version == api.protoVersion1:
+                pMod.apiPDU.setErrorStatus(responsePdu, 2)     # noSuchName
+                pMod.apiPDU.setErrorIndex(responsePdu, position + 1)
+                varBinds = [ (oid, pMod.Null('')) for oid in oids ]
+                break
+            if nextOid is None:
+                endValue = api.v2c.NoSuchObject() if requestPdu.isSameTypeWith(pMod.GetRequestPDU()) \
+                    else api.v2c.EndOfMibView()
+                varBinds.append((oid, endValue))
+            else:
+                varBinds.append((pMod.ObjectIdentifier(nextOid), self._mib[nextOid]))
+        if version != api.protoVersion1 and requestPdu.isSameTypeWith(pMod.GetBulkRequestPDU()):
+            varBinds = self._getBulkVarBinds(pMod, oids, int(pMod.apiBulkPDU.getMaxRepetitions(requestPdu)))
+        pMod.apiPDU.setVarBinds(responsePdu, varBinds)
+        return encoder.encode(response)
+
+
+    def _getBulkVarBinds(self, pMod, oids, maxRepetitions):
+        """ No non-repeaters : 'maxRepetitions' rows of the next OIDs, until the end of the MIB. """
+        from pysnmp.proto import api
+        varBinds    = []
+        currentOids = [ tuple(oid) for oid in oids ]
+        for repetition in range(max(maxRepetitions, 1)):
+            for position, oid in enumerate(currentOids):
+                nextOid = self._getNextOid(oid)
+                if nextOid is None:
+                    varBinds.append((pMod.ObjectIdentifier(oid), api.v2c.EndOfMibView()))
+                    return varBinds
+                varBinds.append((pMod.ObjectIdentifier(nextOid), self._mib[nextOid]))
+                currentOids[position] = nextOid
+        return varBinds
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import http.server
+import threading
+
+from modules import AsyncHttp
+from modules import Debug
+from modules import StreamMatcher
+
+
+class testHandler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        content = ('page ' + self.path + ' on ' + self.headers['Host']).encode()
+        self.send_response(200 if self.path != '/missing' else 404)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        if self.path == '/close':
+            self.close_connection = True    # without telling the client
+
+
+    def log_message(self, *args):
+        pass
+
+
+class test_AsyncHttp(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), testHandler)
+        cls._port   = cls._server.server_address[1]
+        threading.Thread(target=cls._server.serve_forever, daemon=True).start()
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._server.shutdown()
+        cls._server.server_close()
+
+
+    def _request(self, query, port=None):
+        return {
+            'host'          : '127.0.0.1',
+            'port'          : port or self._port,
+            'method'        : 'GET',
+            'query'         : query,
+            'hostHeader'    : 'www.example.com',
+            }
+
+
+    def test1_fetchAll(self):
+        """
+        Given 3 pages,
+        should return their status codes and contents, in the order of the requests
+        """
+        myAsyncHttp = AsyncHttp.AsyncHttp(objDebug=Debug.Debug(), concurrency=2, timeoutSeconds=2)
+        results = myAsyncHttp.fetchAll([ self._request('/a'), self._request('/missing'), self._request('/b') ])
+        self.assertEqual([ result['httpStatusCode'] for result in results ], [200, 404, 200])
+        self.assertEqual(results[0]['bytesRead'], len(b'page /a on www.example.com'))
+        self.assertTrue(all(result['error'] is None for result in results))
+
+
+    def test2_fetchAll(self):
+        """
+        Given a page on a closed port,
+        should return an error for this page only
+        """
+        myAsyncHttp = AsyncHttp.AsyncHttp(objDebug=Debug.Debug(), timeoutSeconds=2)
+        results = myAsyncHttp.fetchAll([ self._request('/a', port=1), self._request('/a') ])
+        self.assertNotEqual(results[0]['error'], None)
+        self.assertEqual(results[1]['httpStatusCode'], 200)
+
+
+    def test3_fetchAll(self):
+        """
+        Given 3 pages of the same origin fetched one after the other,
+        should open a single connection and reuse it
+        """
+        myAsyncHttp = AsyncHttp.AsyncHttp(objDebug=Debug.Debug(), concurrency=1, timeoutSeconds=2)
+        results = myAsyncHttp.fetchAll([ self._request('/a'), self._request('/b'), self._request('/c') ])
+        self.assertEqual([ result['reused'] for result in results ], [False, True, True])
+        self.assertEqual([ result['connectMilliseconds'] for result in results ][1:], [0, 0])
+        self.assertEqual([ result['dnsMilliseconds'] for result in results ][1:], [0, 0])
+        for result in results:
+            self.assertTrue(sum(result[phase + 'Milliseconds'] for phase in AsyncHttp.PHASES) \
+                <= result['durationMilliseconds'] + 0.001)     # stop() rounds down to the µs
+        self.assertEqual(myAsyncHttp.getPoolStats()['opened'], 1)
+
+
+    def test4_fetchAll(self):
+        """
+        Given a page after which the server silently closes the connection,
+        should open a new connection for the next page
+        """
+        myAsyncHttp = AsyncHttp.AsyncHttp(objDebug=Debug.Debug(), concurrency=1, timeoutSeconds=2)
+        results = myAsyncHttp.fetchAll([ self._request('/close'), self._request('/b') ])
+        self.assertEqual([ result['httpStatusCode'] for result in results ], [200, 200])
+        self.assertEqual(myAsyncHttp.getPoolStats()['opened'], 2)
+
+
+    def test5_fetchAll(self):
+        """
+        Given a matcher and a page containing its pattern,
+        should feed the page to the matcher
+        """
+        request = self._request('/a')
+        request['matcher'] = StreamMatcher.StreamMatcher([b'on www.example'])
+        myAsyncHttp = AsyncHttp.AsyncHttp(objDebug=Debug.Debug(), timeoutSeconds=2)
+        myAsyncHttp.fetchAll([ request ])
+        self.assertTrue(request['matcher'].isFound())
+
+
+    def test6_fetchAll(self):
+        """
+        Given maxBytes and a pattern located after maxBytes,
+        should stop reading after maxBytes and not find the pattern
+        """
+        request = self._request('/a')
+        request['matcher']  = StreamMatcher.StreamMatcher([b'example'])
+        request['maxBytes'] = 10
+        myAsyncHttp = AsyncHttp.AsyncHttp(objDebug=Debug.Debug(), timeoutSeconds=2)
+        results = myAsyncHttp.fetchAll([ request ])
+        self.assertEqual(results[0]['bytesRead'], 10)
+        self.assertFalse(request['matcher'].isFound())
+
+
+# uncomment this to run this unit test manually
+#if __name__ == '__main__':
+#    unittest.main()
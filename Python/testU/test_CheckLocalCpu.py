@@ -13,7 +13,11 @@ os.sys.path.insert(0,parentdir)
 ########################################## ##########################################################
 
 
+import tempfile
+import time
+
 from modules import CheckLocalCpu
+from modules import StateFile
 from modules import Utility
 from modules import Debug
 
@@ -79,6 +83,84 @@ class test_CheckLocalCpu(unittest.TestCase):
         self.assertEqual(exitStatus, 'CRITICAL')
 
 
+    def test4_computeExitStatus(self):
+        """
+        Given Nagios ranges : warn '10:' and crit '5:' (alert under 10% / 5%), and a CPU load of 7%, then of 50%
+        should return the 'WARNING' then the 'OK' Nagios plugin exit status
+        """
+        myPlugin    = CheckLocalCpu.CheckLocalCpu(
+            name        = 'CHECK LOCAL CPU',
+            objDebug    = Debug.Debug(),
+            )
+
+        myPlugin.cpuUsagePercent = 7
+        self.assertEqual(myPlugin.computeExitStatus(warningThreshold='10:', criticalThreshold='5:'), 'WARNING')
+        myPlugin.cpuUsagePercent = 50
+        self.assertEqual(myPlugin.computeExitStatus(warningThreshold='10:', criticalThreshold='5:'), 'OK')
+
+
+    def test1_computeCpuUsage(self):
+        """
+        Given the cpu_times deltas of 2 cores : 30s user (of which 10s guest), 10s iowait, 60s idle on cpu0,
+        and 100s steal on cpu1
+        should return 30% for cpu0 (as psutil.cpu_percent() does), 100% for cpu1, 65% for both, 50% steal
+        """
+        import numpy
+        myPlugin    = CheckLocalCpu.CheckLocalCpu(
+            name        = 'CHECK LOCAL CPU',
+            objDebug    = Debug.Debug(),
+            )
+        fields = [ 'user', 'idle', 'iowait', 'steal', 'guest' ]
+        deltas = numpy.array([ [ 30, 60, 10, 0, 10 ], [ 0, 0, 0, 100, 0 ] ], dtype=float)
+        myPlugin.computeCpuUsage(fields, deltas)
+        self.assertEqual(myPlugin.coreUsagePercents.tolist(), [ 30, 100 ])
+        self.assertEqual(myPlugin.cpuUsagePercent, 65)
+        self.assertEqual((myPlugin.maxCore, myPlugin.maxCoreUsagePercent), (1, 100))
+        self.assertEqual(myPlugin.statePercents, { 'user' : 15, 'iowait' : 5, 'steal' : 50 })
+
+
+    def test1_computeBreakdownExitStatus(self):
+        """
+        Given 128 cores, 1 of them at 99%, and 2% steal
+        should return 'CRITICAL' with core thresholds 80 / 90, 'WARNING' with steal thresholds 1 / 5 only
+        """
+        import numpy
+        myPlugin    = CheckLocalCpu.CheckLocalCpu(
+            name        = 'CHECK LOCAL CPU',
+            objDebug    = Debug.Debug(),
+            )
+        myPlugin.coreUsagePercents = numpy.full(128, 10.0)
+        myPlugin.coreUsagePercents[42] = 99
+        myPlugin.maxCore, myPlugin.maxCoreUsagePercent = 42, 99.0
+        myPlugin.statePercents = { 'user' : 10, 'steal' : 2 }
+        exitStatus, message = myPlugin.computeBreakdownExitStatus(coreWarning='80', coreCritical='90')
+        self.assertEqual(exitStatus, 'CRITICAL')
+        self.assertIn('cpu42', message)
+        exitStatus, message = myPlugin.computeBreakdownExitStatus(stealWarning='1', stealCritical='5')
+        self.assertEqual((exitStatus, message), ('WARNING', 'steal : 2%'))
+
+
+    def test1_getCpuUsagePercent(self):
+        """
+        Given a state file, and 2 runs
+        should sample on the first run, then compute the CPU usage since the snapshot without waiting
+        """
+        myPlugin    = CheckLocalCpu.CheckLocalCpu(
+            name        = 'CHECK LOCAL CPU',
+            objDebug    = Debug.Debug(),
+            )
+        with tempfile.TemporaryDirectory() as directory:
+            myStateFile = StateFile.StateFile(Debug.Debug(), 'check_local_cpu', directory=directory)
+            myPlugin.getCpuUsagePercent(objStateFile=myStateFile, fallbackIntervalSeconds=0.05)
+            self.assertTrue(0 <= myPlugin.cpuUsagePercent <= 100)
+            self.assertIn('perCpuTimes', myStateFile.load())
+            time.sleep(0.1)
+            startTime = time.time()
+            myPlugin.getCpuUsagePercent(objStateFile=myStateFile, fallbackIntervalSeconds=0.05)
+            self.assertTrue(time.time() - startTime < 0.05)
+            self.assertTrue(0 <= myPlugin.cpuUsagePercent <= 100)
+
+
 # uncomment this to run this unit test manually
 #if __name__ == '__main__':
 #    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+from modules import CheckSnmpNetAppDiskIO
+from modules import Debug
+
+
+warning     = 1000
+critical    = 2000
+
+
+class test_CheckSnmpNetAppDiskIO(unittest.TestCase):
+
+    def _getPlugin(self, readBytesPerSecond, writeBytesPerSecond):
+        myPlugin = CheckSnmpNetAppDiskIO.CheckSnmpNetAppDiskIO(
+            name        = 'CHECK NETAPP DISK IO',
+            objDebug    = Debug.Debug(),
+            )
+        myPlugin.readBytesPerSecond     = readBytesPerSecond
+        myPlugin.writeBytesPerSecond    = writeBytesPerSecond
+        return myPlugin
+
+
+    def test1_computeExitStatus(self):
+        """
+        Given read and write rates < warn threshold
+        should return the 'OK' Nagios plugin exit status
+        """
+        myPlugin = self._getPlugin(warning - 1, warning - 1)
+        self.assertEqual(myPlugin.computeExitStatus(warningThreshold=warning, criticalThreshold=critical), 'OK')
+
+
+    def test2_computeExitStatus(self):
+        """
+        Given a read rate < warn threshold and a write rate > crit threshold
+        should return the 'CRITICAL' Nagios plugin exit status
+        """
+        myPlugin = self._getPlugin(warning - 1, critical + 1)
+        self.assertEqual(myPlugin.computeExitStatus(warningThreshold=warning, criticalThreshold=critical), 'CRITICAL')
+
+
+#if __name__ == '__main__':
+#    unittest.main()
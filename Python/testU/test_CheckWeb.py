@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import contextlib
+import http.server
+import io
+import re
+import subprocess
+import sys
+import threading
+
+from modules import AsyncHttp
+
+
+def getCheckWeb():
+    """
+    The globals of check_web.py. It can't be imported : it runs the plugin. Run it with '--help' instead,
+    which exits once the CONFIG section and the arguments are declared.
+    """
+    checkWebPath    = os.path.join(parentdir, 'check_web.py')
+    checkWeb        = { '__name__' : 'check_web', '__file__' : checkWebPath }
+    argv            = sys.argv
+    sys.argv        = [ checkWebPath, '--help' ]
+    try:
+        with open(checkWebPath) as checkWebFile, contextlib.redirect_stdout(io.StringIO()):
+            exec(compile(checkWebFile.read(), checkWebPath, 'exec'), checkWeb)
+    except SystemExit:
+        pass
+    finally:
+        sys.argv = argv
+    return checkWeb
+
+
+class testHandler(http.server.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        content = ('page ' + self.path).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+    def log_message(self, *args):
+        pass
+
+
+class test_CheckWeb(unittest.TestCase):
+
+    def test1_phases(self):
+        """
+        Given check_web.py and AsyncHttp, which times the fetches of many pages
+        Should have the same phases
+        """
+        self.assertEqual(getCheckWeb()['PHASES'], AsyncHttp.PHASES)
+
+
+    def test2_phases(self):
+        """
+        Given the thresholds of all the phases, then of an unknown phase
+        Should accept the first ones only
+        """
+        phasesRule = '^' + getCheckWeb()['PHASESRULE'] + '$'
+        self.assertTrue(re.search(phasesRule, ','.join(phase + '=50' for phase in AsyncHttp.PHASES)))
+        self.assertTrue(re.search(phasesRule, 'ttfb=800'))
+        self.assertFalse(re.search(phasesRule, 'dns=50,tls=100'))
+        self.assertFalse(re.search(phasesRule, 'dns=50,'))
+
+
+    def test1_checkPages(self):
+        """
+        Given a local web server, the same page twice, and 'http://host' / 'http://host/'
+        Should check the 4 pages, with 4 distinct perfdata labels (and phase labels)
+        """
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), testHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            output = subprocess.run([
+                sys.executable, 'check_web.py',
+                '--url=http://127.0.0.1', '--url=http://127.0.0.1/', '--url=http://127.0.0.1/a', '--url=http://127.0.0.1/a',
+                '--httpPort=' + str(server.server_address[1]), '--httpStatusCode=200', '-w', '2500', '-c', '4000'
+                ], cwd=parentdir, stdout=subprocess.PIPE).stdout.decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        message, perfData = output.strip().split('|')
+        self.assertEqual(message, 'CHECK WEB OK. 4/4 pages OK')
+        labels = [ item.split('=')[0] for item in perfData.split() ]
+        self.assertEqual(len(labels), len(set(labels)))
+        self.assertEqual([ label for label in labels if not label.endswith(AsyncHttp.PHASES) ],
+            [ '127.0.0.1/', '127.0.0.1/_2', '127.0.0.1/a', '127.0.0.1/a_2', 'connections_opened', 'connections_reused' ])
+        self.assertIn('127.0.0.1/a_2_ttfb', labels)
+
+
+# uncomment this to run this unit test manually
+#if __name__ == '__main__':
+#    unittest.main()
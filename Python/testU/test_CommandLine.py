@@ -110,6 +110,59 @@ class test_CommandLine(unittest.TestCase):
         self.assertEqual(myCommandLine.checkArgsMatchRules(), False)
 
 
+    def test4_checkArgsMatchRules(self):
+        """
+        Given a repeated argument with 1 invalid value,
+        Should return 'False'
+        """
+        integerRule     = '(\\d+)'
+
+        myUtility       = Utility.Utility()
+        myDebug         = Debug.Debug()
+
+        myCommandLine   = CommandLine.CommandLine(
+            description = 'Blah blah blah.',
+            objDebug    = myDebug,
+            objUtility  = myUtility
+            )
+
+        myCommandLine._argDict['integers'] = {
+            'value'         : ['12', '42'],
+            'rule'          : integerRule,
+            }
+        self.assertEqual(myCommandLine.checkArgsMatchRules(), True)
+
+        myCommandLine._argDict['integers']['value'].append('a')
+        self.assertEqual(myCommandLine.checkArgsMatchRules(), False)
+
+
+    def test1_readArgs(self):
+        """
+        Given a 'multiple' argument given twice,
+        Should return the list of both values
+        """
+        myUtility       = Utility.Utility()
+        myDebug         = Debug.Debug()
+
+        myCommandLine   = CommandLine.CommandLine(
+            description = 'Blah blah blah.',
+            objDebug    = myDebug,
+            objUtility  = myUtility
+            )
+        myCommandLine.declareArgument({
+            'shortOption'   : 'u',
+            'longOption'    : 'url',
+            'required'      : False,
+            'default'       : None,
+            'help'          : '',
+            'rule'          : '',
+            'multiple'      : True
+            })
+        myCommandLine.declareArgumentDebug()
+        myCommandLine.readArgs(['-u', 'http://a', '--url', 'http://b'])
+        self.assertEqual(myCommandLine.getArgValue('url'), ['http://a', 'http://b'])
+
+
     def test1_checkOrArgGroups(self):
         """
         Given 2 arguments while expecting 2 'orArg' arguments in a single group,
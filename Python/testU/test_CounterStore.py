@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import tempfile
+
+from modules import CounterStore
+from modules import Debug
+from modules import StateFile
+
+myDebug     = Debug.Debug()
+myDebug.enable(False)
+
+readOid     = '1.3.6.1.4.1.789.1.2.2.32.0'
+
+
+class test_CounterStore(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._counterStore = CounterStore.CounterStore(myDebug,
+            StateFile.StateFile(myDebug, 'counters', directory=self._directory.name))
+
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+
+    def test1_getRates(self):
+        """
+        Given a first run, then a run 10s later (sysUpTime) with the counter increased by 1000
+        Should return None, then 100 per second
+        """
+        self.assertEqual(self._counterStore.getRates('host', { readOid : 5000 }, sysUpTime=1000), { readOid : None })
+        self.assertEqual(self._counterStore.getRates('host', { readOid : 6000 }, sysUpTime=2000), { readOid : 100 })
+
+
+    def test2_getRates(self):
+        """
+        Given a 32-bit counter going from 2^32 - 500 to 500 in 10s
+        Should return 100 per second (the counter wrapped)
+        """
+        self._counterStore.getRates('host', { readOid : 2 ** 32 - 500 }, sysUpTime=1000, counterBits=32)
+        self.assertEqual(self._counterStore.getRates('host', { readOid : 500 }, sysUpTime=2000, counterBits=32),
+            { readOid : 100 })
+
+
+    def test3_getRates(self):
+        """
+        Given a 64-bit counter going backwards, then a sysUpTime going backwards (agent restart)
+        Should return None both times, then a rate again
+        """
+        self._counterStore.getRates('host', { readOid : 5000 }, sysUpTime=1000)
+        self.assertEqual(self._counterStore.getRates('host', { readOid : 10 }, sysUpTime=2000), { readOid : None })
+        self.assertEqual(self._counterStore.getRates('host', { readOid : 2000 }, sysUpTime=100), { readOid : None })
+        self.assertEqual(self._counterStore.getRates('host', { readOid : 3000 }, sysUpTime=1100), { readOid : 100 })
+
+
+    def test4_getRates(self):
+        """
+        Given 2 hosts sharing the state file
+        Should compute the rates of each host against its own previous values
+        """
+        self._counterStore.getRates('host1', { readOid : 0 }, sysUpTime=0)
+        self._counterStore.getRates('host2', { readOid : 0 }, sysUpTime=500)
+        self.assertEqual(self._counterStore.getRates('host1', { readOid : 100 }, sysUpTime=100), { readOid : 100 })
+        self.assertEqual(self._counterStore.getRates('host2', { readOid : 100 }, sysUpTime=1500), { readOid : 10 })
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import contextlib
+import io
+
+from modules import Debug
+
+
+class NotFormattable(object):
+    def __str__(self):
+        raise AssertionError('formatted although debug is disabled')
+
+
+class test_Debug(unittest.TestCase):
+
+    def test1_show(self):
+        """
+        Given debug is disabled,
+        should neither format nor display anything
+        """
+        myDebug = Debug.Debug()
+        output  = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            myDebug.show('value : %s', NotFormattable())
+            myDebug.flush()
+        self.assertEqual(output.getvalue(), '')
+
+
+    def test2_show(self):
+        """
+        Given debug is enabled,
+        should display the formatted message and its caller once flushed, and only once
+        """
+        myDebug = Debug.Debug()
+        myDebug.enable(True)
+        output  = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            myDebug.show('value : %s', 42)
+            self.assertEqual(output.getvalue(), '')
+            myDebug.flush()
+            myDebug.flush()
+        self.assertEqual(output.getvalue().count('MESSAGE : value : 42'), 1)
+        self.assertIn('CALLER  : test2_show', output.getvalue())
+
+
+    def test3_show(self):
+        """
+        Given the INFO level,
+        should ignore the TRACE messages
+        """
+        myDebug = Debug.Debug()
+        myDebug.enable(True, level=Debug.INFO)
+        output  = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            myDebug.show('info')
+            myDebug.show('trace', level=Debug.TRACE)
+            myDebug.flush()
+        self.assertIn('MESSAGE : info', output.getvalue())
+        self.assertNotIn('MESSAGE : trace', output.getvalue())
+        self.assertTrue(myDebug.isEnabled())
+        self.assertFalse(myDebug.isEnabled(Debug.TRACE))
+
+
+    def test4_show(self):
+        """
+        Given more records than the ring buffer holds,
+        should keep the most recent ones and tell how many were dropped
+        """
+        myDebug = Debug.Debug(maxRecords=3)
+        myDebug.enable(True)
+        output  = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            for i in range(5):
+                myDebug.show('record %d', i)
+            myDebug.flush()
+        self.assertIn('2 older records dropped', output.getvalue())
+        self.assertNotIn('record 1', output.getvalue())
+        self.assertIn('record 2', output.getvalue())
+        self.assertIn('record 4', output.getvalue())
+
+
+#if __name__ == '__main__':
+#    unittest.main()
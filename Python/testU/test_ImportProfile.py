@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import subprocess
+import sys
+
+from modules import ImportProfile
+
+
+class test_ImportProfile(unittest.TestCase):
+
+    def test1_getRecords(self):
+        """
+        Given a module imported for the first time while profiling,
+        should record it with its import duration
+        """
+        sys.modules.pop('colorsys', None)
+        myProfile = ImportProfile.ImportProfile()
+        myProfile.install(reportAtExit=False)
+        try:
+            import colorsys
+        finally:
+            myProfile.uninstall()
+        records = [ name for depth, name, duration in myProfile.getRecords() ]
+        self.assertEqual(records, ['colorsys'])
+
+
+    def test2_getRecords(self):
+        """
+        Given a module that was already imported,
+        should not record it
+        """
+        import json
+        myProfile = ImportProfile.ImportProfile()
+        myProfile.install(reportAtExit=False)
+        try:
+            import json
+        finally:
+            myProfile.uninstall()
+        self.assertEqual(myProfile.getRecords(), [])
+
+
+    def test1_lazyImports(self):
+        """
+        Given the plugins' modules imported without sending any request,
+        should not have imported their heavy dependencies
+        """
+        heavyModules = ['http.client', 'psutil', 'pysnmp']
+        output = subprocess.check_output([
+            sys.executable,
+            '-c',
+            'import sys;'
+            + 'import modules.CheckLocalCpu, modules.CommandLine, modules.NagiosPlugin, modules.Snmp;'
+            + 'print(" ".join(m for m in ' + repr(heavyModules) + ' if m in sys.modules))'
+            ], cwd=parentdir)
+        self.assertEqual(output.strip(), b'')
+
+
+# uncomment this to run this unit test manually
+#if __name__ == '__main__':
+#    unittest.main()
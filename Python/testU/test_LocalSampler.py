@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import multiprocessing
+import numpy
+import tempfile
+import time
+
+from modules import CheckLocalCpu
+from modules import Debug
+from modules import LocalSampler
+
+myDebug     = Debug.Debug()
+myDebug.enable(False)
+
+
+class test_LocalSampler(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._socketPath = os.path.join(self._directory.name, 'sampler.sock')
+
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+
+    def test1_getAggregates(self):
+        """
+        Given more samples than the ring buffer holds, some of them older than the window,
+	should aggregate the samples of the window only
+        """
+        mySampler = LocalSampler.LocalSampler(myDebug, self._socketPath, intervalSeconds=1, windowSeconds=10)
+        for value in range(15):
+            mySampler.sample()
+        self.assertEqual(mySampler._sampleCount, 15)
+        self.assertEqual(len(mySampler._times), 10)
+        self.assertEqual(mySampler.getAggregates(60)['samples'], 10)
+
+        now = time.monotonic()
+        mySampler._times[:]         = [ now - age for age in range(10) ]     # 1 sample per second
+        mySampler._samples[:, 0]    = range(10)                                     # 'cpu' : 0 (now) .. 9 (9s ago)
+        aggregates = mySampler.getAggregates(4.5)
+        self.assertEqual(aggregates['samples'], 5)
+        self.assertEqual(aggregates['metrics']['cpu']['mean'], 2)
+        self.assertEqual(aggregates['metrics']['cpu']['max'], 4)
+        self.assertEqual(aggregates['metrics']['cpu']['p95'], 3.8)
+        self.assertEqual(len(aggregates['cores']['mean']), len(mySampler._cpuTimes))
+
+
+    def test2_getAggregates(self):
+        """
+        Given no sample yet,
+	should return None values
+        """
+        mySampler = LocalSampler.LocalSampler(myDebug, self._socketPath)
+        aggregates = mySampler.getAggregates(60)
+        self.assertEqual(aggregates['samples'], 0)
+        self.assertIsNone(aggregates['metrics']['cpu']['p95'])
+
+
+    def test1_sample(self):
+        """
+        Given samples, then a CPU added
+	should keep sampling, and aggregate the cores of the samples taken since the CPU was added
+        """
+        mySampler = LocalSampler.LocalSampler(myDebug, self._socketPath, intervalSeconds=1, windowSeconds=10)
+        readCpuTimes = mySampler._checkLocalCpu.readCpuTimes
+        for value in range(3):
+            mySampler.sample()
+        cores = len(mySampler._cpuTimes)
+
+        def readOneMoreCpuTimes():
+            fields, times = readCpuTimes()
+            return fields, numpy.vstack([ times, times[:1] ])
+        mySampler._checkLocalCpu.readCpuTimes = readOneMoreCpuTimes
+        for value in range(3):
+            mySampler.sample()
+        self.assertEqual(mySampler._sampleCount, 5)
+        aggregates = mySampler.getAggregates(60)
+        self.assertEqual(aggregates['samples'], 5)
+        self.assertEqual(len(aggregates['cores']['mean']), cores + 1)
+        self.assertTrue(all(value is not None for value in aggregates['cores']['p95']))
+
+
+    def test1_getCpuUsageFromSampler(self):
+        """
+        Given a sampler serving on a Unix socket,
+	should give its aggregates to CheckLocalCpu, and False once it is gone
+        """
+        mySampler = LocalSampler.LocalSampler(myDebug, self._socketPath, intervalSeconds=0.05)
+        server = multiprocessing.Process(target=mySampler.serve)
+        server.start()
+        try:
+            time.sleep(0.5)
+            myPlugin = CheckLocalCpu.CheckLocalCpu(name='CHECK LOCAL CPU', objDebug=myDebug)
+            self.assertTrue(myPlugin.getCpuUsageFromSampler(self._socketPath, windowSeconds=60, statistic='max'))
+            self.assertTrue(0 <= myPlugin.cpuUsagePercent <= 100)
+            self.assertEqual(len(myPlugin.coreUsagePercents), len(mySampler._cpuTimes))
+            self.assertIn('user', myPlugin.statePercents)
+        finally:
+            server.terminate()      # SIGTERM : the sampler removes its socket
+            server.join()
+        self.assertFalse(os.path.exists(self._socketPath))
+        self.assertFalse(myPlugin.getCpuUsageFromSampler(self._socketPath))
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -96,6 +96,101 @@ class test_NagiosPlugin(unittest.TestCase):
         self.assertEqual(myPlugin.computeExitStatus(1, 3, 2), 'CRITICAL')
 
 
+    def test7_computeExitStatus(self):
+        """
+        Given an inverted range ('20:10'),
+        should exit 'UNKNOWN' with the reason, instead of crashing
+        """
+        myDebug = Debug.Debug()
+        myPlugin = NagiosPlugin.NagiosPlugin(
+            name        = 'bla',
+            objDebug    = myDebug
+            )
+        NagiosPlugin.NagiosPlugin.embedded = True
+        try:
+            with self.assertRaises(NagiosPlugin.PluginExit) as context:
+                myPlugin.computeExitStatus(15, '20:10', None)
+        finally:
+            NagiosPlugin.NagiosPlugin.embedded = False
+        self.assertEqual(context.exception.exitCode, 3)
+        self.assertIn('20:10', context.exception.outputMessage)
+
+
+    def test1_getWorstExitStatus(self):
+        """
+        Given several exit statuses,
+        should return the worst one
+        """
+        myDebug = Debug.Debug()
+        myPlugin = NagiosPlugin.NagiosPlugin(
+            name        = 'bla',
+            objDebug    = myDebug
+            )
+        self.assertEqual(myPlugin.getWorstExitStatus(['OK', 'WARNING', 'UNKNOWN']), 'WARNING')
+        self.assertEqual(myPlugin.getWorstExitStatus(['OK', 'CRITICAL', 'WARNING']), 'CRITICAL')
+        self.assertEqual(myPlugin.getWorstExitStatus([NagiosPlugin.okNoWarnString, 'OK']), NagiosPlugin.okNoWarnString)
+
+
+    def test1_getResult(self):
+        """
+        Given an exit status and a message,
+        should return the output line and the matching exit code
+        """
+        myDebug = Debug.Debug()
+        myPlugin = NagiosPlugin.NagiosPlugin(
+            name        = 'bla',
+            objDebug    = myDebug
+            )
+        self.assertEqual(myPlugin.getResult('WARNING', 'meh'), ('bla WARNING. meh', 1))
+
+
+    def test1_exit(self):
+        """
+        Given an embedded plugin,
+        should raise PluginExit instead of leaving
+        """
+        myDebug = Debug.Debug()
+        myPlugin = NagiosPlugin.NagiosPlugin(
+            name        = 'bla',
+            objDebug    = myDebug
+            )
+        NagiosPlugin.NagiosPlugin.embedded = True
+        try:
+            with self.assertRaises(NagiosPlugin.PluginExit) as context:
+                myPlugin.exit('CRITICAL', 'argh')
+        finally:
+            NagiosPlugin.NagiosPlugin.embedded = False
+        self.assertEqual(context.exception.outputMessage, 'bla CRITICAL. argh')
+        self.assertEqual(context.exception.exitCode, 2)
+
+
+    def test2_exit(self):
+        """
+        Given perfdata and a JSON file,
+        should output the perfdata after a '|' and append them to the file as JSON lines
+        """
+        import json
+        import tempfile
+        myDebug = Debug.Debug()
+        myPlugin = NagiosPlugin.NagiosPlugin(
+            name        = 'bla',
+            objDebug    = myDebug
+            )
+        myPlugin.addPerfData('time', 12, 'ms', 100, 200)
+        with tempfile.TemporaryDirectory() as directory:
+            myPlugin.setPerfDataJsonFile(os.path.join(directory, 'perfdata.json'))
+            NagiosPlugin.NagiosPlugin.embedded = True
+            try:
+                with self.assertRaises(NagiosPlugin.PluginExit) as context:
+                    myPlugin.exit('OK')
+            finally:
+                NagiosPlugin.NagiosPlugin.embedded = False
+            with open(os.path.join(directory, 'perfdata.json')) as perfDataJsonFile:
+                metric = json.loads(perfDataJsonFile.read())
+        self.assertEqual(context.exception.outputMessage, 'bla OK. |time=12ms;100;200')
+        self.assertEqual((metric['plugin'], metric['status'], metric['label'], metric['value']), ('bla', 'OK', 'time', 12))
+
+
 # uncomment this to run this unit test manually
 #if __name__ == '__main__':
 #    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+from modules import OidIndex
+
+# ifDescr and ifInOctets of 12 interfaces, as Snmp.walk() returns them
+ifDescr     = { (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, row) : b'eth%d' % row for row in range(1, 13) }
+ifInOctets  = { (1, 3, 6, 1, 2, 1, 2, 2, 1, 10, row) : row * 1000 for row in range(1, 13) }
+
+
+class test_OidIndex(unittest.TestCase):
+
+    def test1_update(self):
+        """
+        Given 2 walks added in reverse order,
+        should iterate in OID order : '.2' before '.10', ifDescr before ifInOctets
+        """
+        myIndex = OidIndex.OidIndex(ifInOctets)
+        myIndex.update(ifDescr)
+        oids = [ oid for oid, value in myIndex ]
+        self.assertEqual(len(myIndex), 24)
+        self.assertEqual(oids, sorted(ifDescr) + sorted(ifInOctets))
+        self.assertEqual(oids[1], (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 2))
+
+
+    def test1_add(self):
+        """
+        Given OIDs added out of order, one of them twice,
+        should keep them sorted, with the last value
+        """
+        myIndex = OidIndex.OidIndex()
+        for oid, value in [ ('1.3.6.1.10', 'a'), ('1.3.6.1.2', 'b'), ('.1.3.6.1.9', 'c'), ('1.3.6.1.2', 'd') ]:
+            myIndex.add(oid, value)
+        self.assertEqual(list(myIndex), [ ((1, 3, 6, 1, 2), 'd'), ((1, 3, 6, 1, 9), 'c'), ((1, 3, 6, 1, 10), 'a') ])
+        self.assertEqual(myIndex.get('1.3.6.1.9'), 'c')
+        self.assertIsNone(myIndex.get('1.3.6.1.3'))
+        self.assertIn((1, 3, 6, 1, 10), myIndex)
+
+
+    def test1_iterChildren(self):
+        """
+        Given the ifDescr column OID,
+        should return the 12 ifDescr rows only, not the ifInOctets (1.3.6.1.2.1.2.2.1.10) ones
+        """
+        myIndex = OidIndex.OidIndex(ifDescr)
+        myIndex.update(ifInOctets)
+        children = list(myIndex.iterChildren('1.3.6.1.2.1.2.2.1.2'))
+        self.assertEqual(len(children), 12)
+        self.assertEqual(children[-1], ((1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 12), b'eth12'))
+        self.assertEqual(list(myIndex.iterChildren('1.3.6.1.2.1.2.2.1.3')), [])
+
+
+    def test1_getNext(self):
+        """
+        Given an OID,
+        should return the next one as a GETNEXT would, and None after the last one
+        """
+        myIndex = OidIndex.OidIndex(ifDescr)
+        myIndex.update(ifInOctets)
+        self.assertEqual(myIndex.getNext('1.3.6.1.2.1.2.2.1.2')[0], (1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 1))
+        self.assertEqual(myIndex.getNext('1.3.6.1.2.1.2.2.1.2.12')[0], (1, 3, 6, 1, 2, 1, 2, 2, 1, 10, 1))
+        self.assertIsNone(myIndex.getNext('1.3.6.1.2.1.2.2.1.10.12'))
+
+
+    def test1_iterRange(self):
+        """
+        Given rows 2 to 10 of ifInOctets,
+        should return rows 2 to 9 (the stop OID is excluded)
+        """
+        myIndex = OidIndex.OidIndex(ifInOctets)
+        values = [ value for oid, value in myIndex.iterRange('1.3.6.1.2.1.2.2.1.10.2', '1.3.6.1.2.1.2.2.1.10.10') ]
+        self.assertEqual(values, [ row * 1000 for row in range(2, 10) ])
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import json
+
+from modules import PerfData
+
+
+class test_PerfData(unittest.TestCase):
+
+    def test1_render(self):
+        """
+        Given metrics with and without thresholds / min / max,
+        should leave the missing fields empty and omit the trailing ones
+        """
+        myPerfData = PerfData.PerfData()
+        myPerfData.add('time', 12.3456789, 'ms', 2500, 4000)
+        myPerfData.add('connections', 3)
+        myPerfData.add('cpu', 42.5, '%', '', '90', 0, 100)
+        self.assertEqual(myPerfData.render(), 'time=12.346ms;2500;4000 connections=3 cpu=42.5%;;90;0;100')
+
+
+    def test2_render(self):
+        """
+        Given labels with spaces, single quotes and '=',
+        should quote them, double the single quotes and replace the '='
+        """
+        myPerfData = PerfData.PerfData()
+        myPerfData.add('CHECK WEB', 1, 'ms')
+        myPerfData.add("it's", 2)
+        myPerfData.add('a=b', 3)
+        self.assertEqual(myPerfData.render(), "'CHECK WEB'=1ms 'it''s'=2 a_b=3")
+
+
+    def test3_render(self):
+        """
+        Given integers over 2^53, a missing value and a NaN max, then a value which is not a number,
+        should render the integers exactly, 'U' for the missing value, and refuse the last metric without
+        adding any part of it
+        """
+        myPerfData = PerfData.PerfData()
+        myPerfData.add('octets', 2**63 + 5, 'c', min=0)
+        myPerfData.add('unknown', None, 's', max=float('nan'))
+        with self.assertRaises(TypeError):
+            myPerfData.add('invalid', 'none')
+        self.assertEqual(len(myPerfData), 2)
+        self.assertEqual(myPerfData.render(), 'octets=9223372036854775813c;;;0 unknown=Us')
+        self.assertEqual(json.loads(myPerfData.renderJsonLines().splitlines()[0])['value'], 2**63 + 5)
+
+
+    def test3_renderJsonLines(self):
+        """
+        Given 2 metrics and extra fields,
+        should return 1 JSON object per line, missing fields being null
+        """
+        myPerfData = PerfData.PerfData()
+        myPerfData.add('time', 12.5, 'ms', '10:20', None)
+        myPerfData.add('cpu', 42, '%', min=0, max=100)
+        lines = myPerfData.renderJsonLines({ 'plugin': 'bla' }).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]), { 'plugin': 'bla', 'label': 'time', 'value': 12.5, 'uom': 'ms',
+            'warn': '10:20', 'crit': None, 'min': None, 'max': None })
+        self.assertEqual(json.loads(lines[1])['max'], 100)
+
+
+#if __name__ == '__main__':
+#    unittest.main()
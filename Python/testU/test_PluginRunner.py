@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import shutil
+import tempfile
+
+from modules import Debug
+from modules import NagiosPlugin
+from modules import PluginRunner
+
+
+testPlugin = """
+import sys
+from modules import Debug
+from modules import NagiosPlugin
+
+myPlugin = NagiosPlugin.NagiosPlugin(name='CHECK TEST', objDebug=Debug.Debug())
+myPlugin.exit(exitStatus=sys.argv[1], exitMessage='args : ' + ' '.join(sys.argv[2:]))
+"""
+
+
+class test_PluginRunner(unittest.TestCase):
+
+    def setUp(self):
+        self._pluginDir = tempfile.mkdtemp()
+        with open(os.path.join(self._pluginDir, 'check_test.py'), 'w') as pluginFile:
+            pluginFile.write(testPlugin)
+        self._runner = PluginRunner.PluginRunner(
+            objDebug    = Debug.Debug(),
+            socketPath  = os.path.join(self._pluginDir, 'runner.sock'),
+            pluginDir   = self._pluginDir
+            )
+        NagiosPlugin.NagiosPlugin.embedded = True
+
+
+    def tearDown(self):
+        NagiosPlugin.NagiosPlugin.embedded = False
+        shutil.rmtree(self._pluginDir)
+
+
+    def test1_runPlugin(self):
+        """
+        Given a plugin and its arguments,
+        should return the plugin output and exit code without leaving
+        """
+        output, exitCode = self._runner.runPlugin(['check_test.py', 'WARNING', 'a', 'b'])
+        self.assertEqual(output, 'CHECK TEST WARNING. args : a b\n')
+        self.assertEqual(exitCode, 1)
+
+
+    def test2_runPlugin(self):
+        """
+        Given the same plugin run twice with different arguments,
+        should not leak any state from the first run into the second
+        """
+        self._runner.runPlugin(['check_test.py', 'CRITICAL', 'first'])
+        output, exitCode = self._runner.runPlugin(['check_test.py', 'OK', 'second'])
+        self.assertEqual(output, 'CHECK TEST OK. args : second\n')
+        self.assertEqual(exitCode, 0)
+
+
+    def test3_runPlugin(self):
+        """
+        Given a plugin that is not in the plugin directory,
+        should return 'UNKNOWN'
+        """
+        output, exitCode = self._runner.runPlugin(['/bin/check_nothing.py', 'OK'])
+        self.assertEqual(exitCode, 3)
+
+
+# uncomment this to run this unit test manually
+#if __name__ == '__main__':
+#    unittest.main()
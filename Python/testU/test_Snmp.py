@@ -13,9 +13,14 @@ os.sys.path.insert(0,parentdir)
 ########################################## ##########################################################
 
 
+import tempfile
+
+from modules import OidIndex
 from modules import Snmp
+from modules import SnmpCache
 from modules import Utility
 from modules import Debug
+from testU import SnmpTestAgent
 
 myUtility   = Utility.Utility()
 myDebug     = Debug.Debug()
@@ -31,6 +36,79 @@ testHostVersion     = '2c'
 unusedIpAddress     = '192.168.42.42'
 invalidIpAddress    = '123.456.789.876'
 invalidOid          = '2.3.4.5.6.7.8'
+fakeColumnOid       = '1.3.6.1.2.1.2.2.1.10'
+
+
+class FakeErrorStatus(object):
+    """ An SNMP error status, as SnmpSession.request() returns it. """
+
+    def __init__(self, name):
+        self._name = name
+
+
+    def prettyPrint(self):
+        return self._name
+
+
+class FakeSession(object):
+    """
+    Replaces the SnmpSession of an Snmp object : an agent serving 'rows' rows of 'fakeColumnOid', answering 'tooBig'
+    to GETBULK requests of more than 'maxRepetitions' rows, and 'errorStatus' when asked for rows after 'failAfterRow'.
+    Records the max-repetitions of each request, and the 'tooBig' answers.
+    GET requests are answered from 'values' ({ OID : pysnmp value }, noSuchObject for the others).
+    """
+
+    def __init__(self, rows, maxRepetitions=1000, failAfterRow=None, errorStatus='genErr', values=None):
+        self._rows              = rows
+        self._values            = values or {}
+        self._maxRepetitions    = maxRepetitions
+        self._failAfterRow      = failAfterRow
+        self._errorStatus       = errorStatus
+        self.repetitions        = []
+        self.tooBigs            = 0
+
+
+    def request(self, pduType, OIDs, maxRepetitions=0):
+        from pyasn1.type import univ
+        from pysnmp.proto import rfc1902, rfc1905
+        if pduType == 'get' and self._values:
+            return None, 0, 0, [ (univ.ObjectIdentifier(oid), self._values.get(oid, rfc1905.NoSuchObject())) for oid in OIDs ]
+        self.repetitions.append(maxRepetitions)
+        if maxRepetitions > self._maxRepetitions:
+            self.tooBigs += 1
+            return None, FakeErrorStatus('tooBig'), 0, []
+        columnOid   = univ.ObjectIdentifier(fakeColumnOid)
+        requestedOid = univ.ObjectIdentifier(OIDs[0])
+        lastRow     = requestedOid[len(columnOid)] if len(requestedOid) > len(columnOid) else 0
+        if self._failAfterRow is not None and lastRow >= self._failAfterRow:
+            return None, FakeErrorStatus(self._errorStatus), 1, []
+        varBinds = [ (columnOid + (row,), rfc1902.Counter32(row))
+            for row in range(lastRow + 1, min(lastRow + max(maxRepetitions, 1), self._rows) + 1) ]
+        if len(varBinds) < max(maxRepetitions, 1):
+            varBinds.append((univ.ObjectIdentifier('1.3.6.1.2.1.2.2.1.11.1'), rfc1905.EndOfMibView()))
+        return None, 0, 0, varBinds
+
+
+def countCalls(function):
+    """ 'function', counting its calls in its 'calls' attribute. """
+    def countingFunction(*args, **kwargs):
+        countingFunction.calls += 1
+        return function(*args, **kwargs)
+    countingFunction.calls = 0
+    return countingFunction
+
+
+def getAgentSnmp(agent, version=testHostVersion):
+    """ An Snmp object querying 'agent', an SnmpTestAgent. """
+    return Snmp.Snmp(myUtility, myDebug, host='127.0.0.1', port=agent.getPort(), community=testHostCommunity,
+        version=version, timeoutMilliseconds=1000)
+
+
+def getFakeSnmp(session):
+    mySnmp = Snmp.Snmp(myUtility, myDebug, host='127.0.0.1')
+    mySnmp._session = session
+    return mySnmp
+
 
 class test_Snmp(unittest.TestCase):
 
@@ -69,10 +147,41 @@ class test_Snmp(unittest.TestCase):
         self.assertEqual(mySnmp.get(invalidOid), None)
 
 
+    def test1_getMany(self):
+        """
+        Given an agent with OID = '1.3.6.1.2.1.1.7.0', and a non-existing OID
+        Should return 72 for the first one, and a VarBindError for the other one, in a single request
+        """
+        from pysnmp.proto import rfc1902
+        mySession   = FakeSession(rows=0, values={ '1.3.6.1.2.1.1.7.0' : rfc1902.Integer(72) })
+        mySession.request = countCalls(mySession.request)
+        result = getFakeSnmp(mySession).getMany(['1.3.6.1.2.1.1.7.0', invalidOid])
+        self.assertEqual(result['1.3.6.1.2.1.1.7.0'], 72)
+        self.assertEqual(result[invalidOid], Snmp.VarBindError('noSuchObject'))
+        self.assertEqual(mySession.request.calls, 1)
+
+
+    def test2_getMany(self):
+        """
+        Given community, version, OID = '1.3.6.1.2.1.1.7.0' and an invalid IP address
+        Should return None
+        """
+        mySnmp = Snmp.Snmp(
+            myUtility,
+            myDebug,
+            host    = invalidIpAddress,
+            port    = testHostPort,
+            community   = testHostCommunity,
+            version     = testHostVersion,
+            timeoutMilliseconds = 1000
+            )
+        self.assertEqual(mySnmp.getMany(['1.3.6.1.2.1.1.7.0']), None)
+
+
     def test1_walk(self):
         """
         Given community, version, host, OID = '1.3.6.1.2.1.1.9.1.2'
-        Should return a dictionary which values all contain '1.3.6.1.'
+        Should return a dictionary which OIDs start with it, and which values are OIDs starting with (1, 3, 6, 1)
         """
 
         mySnmp = Snmp.Snmp(
@@ -87,13 +196,9 @@ class test_Snmp(unittest.TestCase):
         result = mySnmp.walk('1.3.6.1.2.1.1.9.1.2')
         resultIsADict = True if isinstance(result, dict) else False
 
-        valuesAreOk = True
-        for value in result.values():
-            try:
-                value.index('1.3.6.1.')
-            except ValueError:
-                valuesAreOk = False
-        self.assertTrue(resultIsADict and valuesAreOk)
+        oidsAreOk   = all(oid[:10] == (1, 3, 6, 1, 2, 1, 1, 9, 1, 2) for oid in result)
+        valuesAreOk = all(value[:4] == (1, 3, 6, 1) for value in result.values())
+        self.assertTrue(resultIsADict and oidsAreOk and valuesAreOk)
 
 
     def test2_walk(self):
@@ -132,6 +237,266 @@ class test_Snmp(unittest.TestCase):
         self.assertEqual(mySnmp.walk(invalidOid), None)
 
 
+    def test5_walk(self):
+        """
+        Given a local test agent, OID = '1.3.6.1.2.1.1.9.1.2' (8 rows) and versions '1' (GETNEXT) and '2c' (GETBULK)
+        Should return the same dictionary, with fewer requests with GETBULK
+        """
+        myAgent = SnmpTestAgent.SnmpTestAgent()
+        try:
+            results, requests = [], []
+            for version in ('1', '2c'):
+                requestsBefore = myAgent.requests
+                results.append(getAgentSnmp(myAgent, version).walk('1.3.6.1.2.1.1.9.1.2'))
+                requests.append(myAgent.requests - requestsBefore)
+        finally:
+            myAgent.stop()
+        self.assertEqual(len(results[0]), 8)
+        self.assertEqual(results[0], results[1])
+        self.assertTrue(requests[1] < requests[0])
+
+
+
+    def test6_walk(self):
+        """
+        Given a local test agent, ifHCInOctets (Counter64, over 2^53) and ifDescr (OctetString) OIDs
+        Should return exact int and bytes values, not str or float
+        """
+        myAgent = SnmpTestAgent.SnmpTestAgent()
+        try:
+            mySnmp      = getAgentSnmp(myAgent)
+            hcInOctets  = mySnmp.walk('1.3.6.1.2.1.31.1.1.1.6')
+            descr       = mySnmp.walk('1.3.6.1.2.1.2.2.1.2')
+        finally:
+            myAgent.stop()
+        self.assertEqual(sorted(hcInOctets.values()), [ 2**60 + 1, 2**60 + 2, 2**60 + 3 ])
+        self.assertTrue(all(type(value) is int for value in hcInOctets.values()))
+        self.assertEqual(sorted(descr.values()), [ b'eth0', b'eth1', b'eth2' ])
+
+
+    def test7_walk(self):
+        """
+        Given a local test agent with 3 interfaces, an OidIndex, and the ifInOctets then ifDescr columns
+        Should fill the index in OID order, ifDescr first
+        """
+        myAgent = SnmpTestAgent.SnmpTestAgent()
+        mySnmp  = getAgentSnmp(myAgent)
+        myIndex = OidIndex.OidIndex()
+        try:
+            inOctets    = mySnmp.walk('1.3.6.1.2.1.2.2.1.10', index=myIndex)
+            descr       = mySnmp.walk('1.3.6.1.2.1.2.2.1.2', index=myIndex)
+        finally:
+            myAgent.stop()
+        self.assertEqual((len(inOctets), len(descr)), (3, 3))
+        self.assertEqual(len(myIndex), len(inOctets) + len(descr))
+        self.assertEqual([ oid for oid, value in myIndex ], sorted(descr) + sorted(inOctets))
+        self.assertEqual(dict(myIndex.iterChildren('1.3.6.1.2.1.2.2.1.2')), descr)
+
+
+    def test1_iterWalk(self):
+        """
+        Given an agent with a 100 rows column
+        Should yield the same rows as walk(), in OID order
+        """
+        mySnmp  = getFakeSnmp(FakeSession(rows=100))
+        rows    = list(mySnmp.iterWalk(fakeColumnOid))
+        self.assertFalse(mySnmp.walkFailed())
+        self.assertEqual(len(rows), 100)
+        self.assertEqual([ oid for oid, value in rows ], sorted(oid for oid, value in rows))
+        self.assertEqual(dict(rows), mySnmp.walk(fakeColumnOid))
+
+
+    def test2_iterWalk(self):
+        """
+        Given OID = '1.3.6.1' (the whole MIB) with 1000 rows, stopping at the first row
+        Should have sent a single request
+        """
+        mySession   = FakeSession(rows=1000)
+        mySession.request = countCalls(mySession.request)
+        mySnmp      = getFakeSnmp(mySession)
+        oid = None
+        for oid, value in mySnmp.iterWalk('1.3.6.1'):
+            break
+        self.assertIsNotNone(oid)
+        self.assertEqual(oid[:4], (1, 3, 6, 1))
+        self.assertEqual(mySession.request.calls, 1)
+
+
+    def test3_iterWalk(self):
+        """
+        Given community, version, OID = '1.3.6.1.2.1.1.9.1.2' and an invalid IP address
+        Should yield nothing, and report the walk failed
+        """
+        mySnmp = Snmp.Snmp(
+            myUtility,
+            myDebug,
+            host    = invalidIpAddress,
+            port    = testHostPort,
+            community   = testHostCommunity,
+            version     = testHostVersion,
+            timeoutMilliseconds = 1000
+            )
+        self.assertEqual(list(mySnmp.iterWalk('1.3.6.1.2.1.1.9.1.2')), [])
+        self.assertTrue(mySnmp.walkFailed())
+
+
+    def test8_walk(self):
+        """
+        Given an agent answering 'genErr' in the middle of a walk
+        Should return None rather than the rows read so far, and report the walk failed
+        """
+        mySnmp = getFakeSnmp(FakeSession(rows=100, failAfterRow=30))
+        self.assertEqual(mySnmp.walk(fakeColumnOid), None)
+        self.assertTrue(mySnmp.walkFailed())
+        rows = list(mySnmp.iterWalk(fakeColumnOid))
+        self.assertTrue(0 < len(rows) < 100)     # what was read before the error is still yielded
+        self.assertTrue(mySnmp.walkFailed())
+
+
+    def test9_walk(self):
+        """
+        Given an agent answering 'tooBig' to more than 12 repetitions, and a table of 500 rows walked twice
+        Should get the whole table, with a few 'tooBig' during the first walk only, and never go over 12 again
+        """
+        mySession   = FakeSession(rows=500, maxRepetitions=12)
+        mySnmp      = getFakeSnmp(mySession)
+        self.assertEqual(len(mySnmp.walk(fakeColumnOid)), 500)
+        self.assertTrue(mySession.tooBigs <= 3, mySession.repetitions)
+        tooBigs = mySession.tooBigs
+        self.assertEqual(len(mySnmp.walk(fakeColumnOid)), 500)
+        self.assertEqual(mySession.tooBigs, tooBigs)
+
+
+    def test10_walk(self):
+        """
+        Given an agent answering 'tooBig' to more than 5 repetitions (less than MINREPETITIONS)
+        Should stay under 6 repetitions after the first 'tooBig'
+        """
+        mySession   = FakeSession(rows=100, maxRepetitions=5)
+        mySnmp      = getFakeSnmp(mySession)
+        self.assertEqual(len(mySnmp.walk(fakeColumnOid)), 100)
+        self.assertTrue(mySnmp._maxRepetitions <= 5)
+        tooBigs = mySession.tooBigs
+        self.assertEqual(len(mySnmp.walk(fakeColumnOid)), 100)
+        self.assertEqual(mySession.tooBigs, tooBigs)
+
+
+    def test11_walk(self):
+        """
+        Given a walk cached by an SnmpCache, then a walk failing, then the cached walk again
+        Should not report the cached walk as failed
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            mySession   = FakeSession(rows=20)
+            mySnmp      = getFakeSnmp(mySession)
+            mySnmp._cache = SnmpCache.SnmpCache(myDebug, directory)
+            self.assertEqual(len(mySnmp.walk(fakeColumnOid)), 20)
+            mySession._failAfterRow = 0
+            list(mySnmp.iterWalk(fakeColumnOid))
+            self.assertTrue(mySnmp.walkFailed())
+            self.assertEqual(len(mySnmp.walk(fakeColumnOid)), 20)
+            self.assertFalse(mySnmp.walkFailed())
+
+
+    def test3_getMany(self):
+        """
+        Given an SnmpCache, and the same OIDs read twice
+        Should send a single request
+        """
+        from pysnmp.proto import rfc1902
+        with tempfile.TemporaryDirectory() as directory:
+            mySession   = FakeSession(rows=0, values={ '1.3.6.1.2.1.1.7.0' : rfc1902.Integer(72) })
+            mySession.request = countCalls(mySession.request)
+            mySnmp      = getFakeSnmp(mySession)
+            mySnmp._cache = SnmpCache.SnmpCache(myDebug, directory)
+            for attempt in range(2):
+                self.assertEqual(mySnmp.getMany([ '1.3.6.1.2.1.1.7.0', invalidOid ]),
+                    { '1.3.6.1.2.1.1.7.0' : 72, invalidOid : Snmp.VarBindError('noSuchObject') })
+            self.assertEqual(mySession.request.calls, 1)
+
+
+    def test3_get(self):
+        """
+        Given an SNMP v1 agent answering 'noSuchName'
+        Should return None
+        """
+        mySnmp = getFakeSnmp(FakeSession(rows=0, failAfterRow=0, errorStatus='noSuchName'))
+        self.assertIsNone(mySnmp.get('1.3.6.1.2.1.1.7.0'))
+
+
+    def test4_get(self):
+        """
+        Given an agent with an OctetString holding a MAC address, an IpAddress and an OID
+        Should return them from get() and getMany() as walk() does : bytes and a tuple of int
+        """
+        from pysnmp.proto import rfc1902
+        values = {
+            '1.3.6.1.2.1.2.2.1.6.2'     : rfc1902.OctetString(hexValue='0050569a0b2c'),
+            '1.3.6.1.2.1.4.20.1.1.1'    : rfc1902.IpAddress('192.168.1.101'),
+            '1.3.6.1.2.1.1.2.0'         : rfc1902.ObjectName('1.3.6.1.4.1.789'),
+            }
+        mySnmp = getFakeSnmp(FakeSession(rows=0, values=values))
+        expected = {
+            '1.3.6.1.2.1.2.2.1.6.2'     : b'\x00\x50\x56\x9a\x0b\x2c',
+            '1.3.6.1.2.1.4.20.1.1.1'    : bytes((192, 168, 1, 101)),
+            '1.3.6.1.2.1.1.2.0'         : (1, 3, 6, 1, 4, 1, 789),
+            }
+        self.assertEqual(mySnmp.getMany(list(values)), expected)
+        for oid, value in expected.items():
+            self.assertEqual(mySnmp.get(oid), value)
+        self.assertIsNone(mySnmp.get(invalidOid))
+
+
+    def test1_decodeValue(self):
+        """
+        Given pysnmp values of each type
+        Should return native values : exact int, bytes, tuple of int, None
+        """
+        from pysnmp.proto import rfc1902, rfc1905
+        from pyasn1.type import univ
+        self.assertEqual(Snmp.decodeValue(rfc1902.Counter64(2 ** 64 - 1)), 2 ** 64 - 1)
+        self.assertEqual(Snmp.decodeValue(rfc1902.Integer32(-5)), -5)
+        self.assertEqual(Snmp.decodeValue(rfc1902.TimeTicks(123456)), 123456)
+        self.assertEqual(Snmp.decodeValue(rfc1902.OctetString(b'\x00\x1b\x21\xff\xfe\x01')), b'\x00\x1b\x21\xff\xfe\x01')
+        self.assertEqual(Snmp.decodeValue(rfc1902.IpAddress('192.168.1.101')), bytes([ 192, 168, 1, 101 ]))
+        self.assertEqual(Snmp.decodeValue(rfc1902.ObjectName('1.3.6.1.2.1')), (1, 3, 6, 1, 2, 1))
+        self.assertIsNone(Snmp.decodeValue(univ.Null('')))
+        self.assertIsNone(Snmp.decodeValue(rfc1905.NoSuchInstance('')))
+
+
+    def test1_walkTable(self):
+        """
+        Given a local test agent with 3 interfaces, ifEntry = '1.3.6.1.2.1.2.2.1' and the ifIndex / ifDescr /
+        ifInOctets columns
+        Should return a table with 1 row per interface, joined on the ifIndex
+        """
+        myAgent = SnmpTestAgent.SnmpTestAgent()
+        try:
+            myTable = getAgentSnmp(myAgent).walkTable('1.3.6.1.2.1.2.2.1', { 'index' : 1, 'descr' : 2, 'inOctets' : 10 })
+        finally:
+            myAgent.stop()
+        self.assertEqual(len(myTable), 3)
+        self.assertEqual(myTable.getRow((2, )), { 'index' : 2, 'descr' : b'eth1', 'inOctets' : 2000 })
+        for index in myTable.getIndexes():
+            self.assertEqual(myTable.getRow(index)['index'], index[0])
+        self.assertEqual(len(myTable.getRowsWhere('descr', myTable.getColumn('descr')[0])), 1)
+
+
+    def test2_walkTable(self):
+        """
+        Given host, community, version and an invalid entry OID
+        Should return None
+        """
+        mySnmp = Snmp.Snmp(
+            myUtility,
+            myDebug,
+            host    = testHostIp,
+            port    = testHostPort,
+            community   = testHostCommunity,
+            version     = testHostVersion,
+            timeoutMilliseconds = 1000
+            )
+        self.assertEqual(mySnmp.walkTable(invalidOid, { 'descr' : 2 }), None)
 
 
 
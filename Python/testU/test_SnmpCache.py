@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import multiprocessing
+import tempfile
+import time
+
+from modules import Debug
+from modules import SnmpCache
+
+myDebug     = Debug.Debug()
+myDebug.enable(False)
+
+
+def slowFetch(counterPath):
+    """ Count the calls in 'counterPath', and take long enough for the other processes to ask meanwhile. """
+    with open(counterPath, 'a') as counterFile:
+        counterFile.write('x')
+    time.sleep(0.3)
+    return { '1.3.6.1.2.1.1.7.0' : 72 }
+
+
+def getFromCache(directory, counterPath):
+    mySnmpCache = SnmpCache.SnmpCache(myDebug, directory=os.path.join(directory, 'cache'))
+    assert mySnmpCache.getOrFetch(('host', 'walk'), lambda: slowFetch(counterPath)) == { '1.3.6.1.2.1.1.7.0' : 72 }
+
+
+class test_SnmpCache(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._cacheDirectory = os.path.join(self._directory.name, 'cache')
+
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+
+    def test1_getOrFetch(self):
+        """
+        Given the same key twice, then another key, then a fetch returning None
+        Should fetch only once for the first key, and not cache None
+        """
+        mySnmpCache = SnmpCache.SnmpCache(myDebug, directory=self._cacheDirectory)
+        fetched = []
+        fetch = lambda: fetched.append(1) or 72
+        self.assertEqual(mySnmpCache.getOrFetch(('host', 'get', '1.3.6.1.2.1.1.7.0'), fetch), 72)
+        self.assertEqual(mySnmpCache.getOrFetch(('host', 'get', '1.3.6.1.2.1.1.7.0'), fetch), 72)
+        self.assertEqual(mySnmpCache.getOrFetch(('host', 'get', '1.3.6.1.2.1.1.5.0'), fetch), 72)
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(mySnmpCache.getOrFetch(('host', 'get', 'error'), lambda: None), None)
+        self.assertEqual(mySnmpCache.getOrFetch(('host', 'get', 'error'), fetch), 72)
+        self.assertEqual(mySnmpCache.getStats(), { 'hits': 1, 'misses': 4 })
+        self.assertEqual(os.stat(self._cacheDirectory).st_mode & 0o777, 0o700)
+
+
+    def test2_getOrFetch(self):
+        """
+        Given a TTL of 0.1s
+        Should fetch again once the entry has expired
+        """
+        mySnmpCache = SnmpCache.SnmpCache(myDebug, directory=self._cacheDirectory, ttlSeconds=0.1)
+        self.assertEqual(mySnmpCache.getOrFetch('key', lambda: 1), 1)
+        self.assertEqual(mySnmpCache.getOrFetch('key', lambda: 2), 1)
+        time.sleep(0.15)
+        self.assertEqual(mySnmpCache.getOrFetch('key', lambda: 3), 3)
+
+
+    def test3_getOrFetch(self):
+        """
+        Given maxEntries = 2, and 3 keys, the first one being read again before the third one is added
+        Should evict the second key only
+        """
+        mySnmpCache = SnmpCache.SnmpCache(myDebug, directory=self._cacheDirectory, maxEntries=2, evictionIntervalSeconds=0)
+        mySnmpCache.getOrFetch('key1', lambda: 1)
+        time.sleep(0.01)
+        mySnmpCache.getOrFetch('key2', lambda: 2)
+        time.sleep(0.01)
+        mySnmpCache.getOrFetch('key1', lambda: 'fetched again')
+        time.sleep(0.01)
+        mySnmpCache.getOrFetch('key3', lambda: 3)
+        self.assertEqual(mySnmpCache.getOrFetch('key1', lambda: 'fetched again'), 1)
+        self.assertEqual(mySnmpCache.getOrFetch('key2', lambda: 'fetched again'), 'fetched again')
+
+
+    def test4_getOrFetch(self):
+        """
+        Given a cache directory other users can write to
+        Should not use it, and fetch every time
+        """
+        os.makedirs(self._cacheDirectory, mode=0o777)
+        os.chmod(self._cacheDirectory, 0o777)
+        mySnmpCache = SnmpCache.SnmpCache(myDebug, directory=self._cacheDirectory)
+        mySnmpCache.getOrFetch('key', lambda: 1)
+        self.assertEqual(mySnmpCache.getOrFetch('key', lambda: 2), 2)
+        self.assertEqual(os.listdir(self._cacheDirectory), [])
+
+
+    def test5_getOrFetch(self):
+        """
+        Given 10 processes asking for the same key at the same time
+        Should fetch it only once
+        """
+        counterPath = os.path.join(self._directory.name, 'counter')
+        processes = [ multiprocessing.Process(target=getFromCache, args=(self._directory.name, counterPath))
+            for i in range(10) ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertTrue(all(process.exitcode == 0 for process in processes))
+        with open(counterPath) as counterFile:
+            self.assertEqual(counterFile.read(), 'x')
+
+
+    def test6_getOrFetch(self):
+        """
+        Given maxEntries = 2, an eviction interval of 0.2s, and 4 keys, the last one added after 0.2s
+        Should keep the 3 first keys until then, and only 2 keys after
+        """
+        mySnmpCache = SnmpCache.SnmpCache(myDebug, directory=self._cacheDirectory, maxEntries=2, evictionIntervalSeconds=0.2)
+        getEntries  = lambda: [ name for name in os.listdir(self._cacheDirectory) if name.endswith('.entry') ]
+        for key in ('key1', 'key2', 'key3'):
+            mySnmpCache.getOrFetch(key, lambda: key)
+        self.assertEqual(len(getEntries()), 3)
+        time.sleep(0.25)
+        mySnmpCache.getOrFetch('key4', lambda: 4)
+        self.assertEqual(len(getEntries()), 2)
+
+
+#if __name__ == '__main__':
+#    unittest.main()
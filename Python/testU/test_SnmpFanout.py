@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import socket
+
+from modules import Debug
+from modules import Snmp
+from modules import SnmpFanout
+from testU import SnmpTestAgent
+
+myDebug     = Debug.Debug()
+myDebug.enable(False)
+
+# test variables
+testHostCommunity   = 'public'
+invalidIpAddress    = '123.456.789.876'
+invalidOid          = '2.3.4.5.6.7.8'
+
+class test_SnmpFanout(unittest.TestCase):
+
+    def test1_encodeOid(self):
+        """
+        Given OIDs with arcs > 127
+        Should encode them as pyasn1 does, and decode them back
+        """
+        from pyasn1.codec.ber import encoder
+        from pyasn1.type import univ
+        for oid in ('1.3.6.1.2.1.1.7.0', '1.3.6.1.4.1.789.1.2.2.32.0', '2.999.4294967295'):
+            self.assertEqual(SnmpFanout.encodeOid(oid), encoder.encode(univ.ObjectIdentifier(oid)))
+            tag, start, end = SnmpFanout.readTlv(SnmpFanout.encodeOid(oid), 0)
+            self.assertEqual(SnmpFanout.decodeOid(SnmpFanout.encodeOid(oid)[start:end]), oid)
+
+
+    def test1_decodeValue(self):
+        """
+        Given values BER encoded by pyasn1 : an OctetString holding a MAC address, an IpAddress, an OID, a Counter64
+        Should decode them as Snmp.decodeValue() does
+        """
+        from pyasn1.codec.ber import encoder
+        from pysnmp.proto import rfc1902
+        for value in (rfc1902.OctetString(hexValue='0050569a0b2c'), rfc1902.IpAddress('192.168.1.101'),
+                rfc1902.ObjectName('1.3.6.1.4.1.789'), rfc1902.Counter64(2**64 - 1)):
+            data = encoder.encode(value)
+            tag, start, end = SnmpFanout.readTlv(data, 0)
+            self.assertEqual(SnmpFanout.decodeValue(tag, data[start:end]), Snmp.decodeValue(value))
+
+
+    def test1_getAll(self):
+        """
+        Given a local test agent twice (SNMP v2c), OIDs = '1.3.6.1.2.1.1.7.0' and a non-existing OID
+        Should return 72 and a VarBindError, for each
+        """
+        myAgent = SnmpTestAgent.SnmpTestAgent()
+        try:
+            myFanout = SnmpFanout.SnmpFanout(myDebug)
+            target = { 'host' : '127.0.0.1', 'port' : myAgent.getPort(), 'community' : testHostCommunity }
+            results = myFanout.getAll([ target, target ], [ '1.3.6.1.2.1.1.7.0', invalidOid ])
+        finally:
+            myAgent.stop()
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(result['1.3.6.1.2.1.1.7.0'], 72)
+            self.assertTrue(isinstance(result[invalidOid], Snmp.VarBindError))
+
+
+    def test2_getAll(self):
+        """
+        Given an agent that never answers, and an invalid IP address
+        Should return None for both, and count 1 timeout after 1 retry
+        """
+        silentAgent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silentAgent.bind(('127.0.0.1', 0))
+        myFanout = SnmpFanout.SnmpFanout(myDebug, timeoutMilliseconds=50, retries=1)
+        targets = [
+            { 'host' : '127.0.0.1', 'port' : silentAgent.getsockname()[1] },
+            { 'host' : invalidIpAddress },
+            ]
+        self.assertEqual(myFanout.getAll(targets, [ '1.3.6.1.2.1.1.7.0' ]), [ None, None ])
+        silentAgent.close()
+        myFanout.close()
+        self.assertEqual(myFanout.getStats()['timeouts'], 1)
+        self.assertEqual(myFanout.getStats()['retries'], 1)
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import tempfile
+
+from modules import CounterStore
+from modules import Debug
+from modules import Snmp
+from modules import SnmpIndexCache
+from modules import StateFile
+
+myDebug     = Debug.Debug()
+myDebug.enable(False)
+
+# test variables
+testHostIp          = '192.168.1.101'
+ifDescrOid          = '1.3.6.1.2.1.2.2.1.2'
+ifInOctetsOid       = '1.3.6.1.2.1.2.2.1.10'
+
+
+class FakeSnmp(object):
+    """ An agent with an ifTable, answering as Snmp.walk() / Snmp.getMany() do, and counting the requests. """
+
+    def __init__(self, interfaces):
+        self.interfaces = interfaces    # { index : (ifDescr, ifInOctets) }
+        self.sysUpTime  = 100000
+        self.requests   = 0
+
+
+    def walk(self, OID):
+        self.requests += 1
+        prefix = tuple(int(subIdentifier) for subIdentifier in OID.split('.'))
+        return { prefix + (index, ) : descr.encode('iso-8859-1') for index, (descr, octets) in self.interfaces.items() }
+
+
+    def getMany(self, OIDs):
+        self.requests += 1
+        values = {}
+        for oid in OIDs:
+            column, index = oid.rsplit('.', 1)
+            if oid == CounterStore.SYSUPTIMEOID:
+                values[oid] = self.sysUpTime
+            elif column in (ifDescrOid, ifInOctetsOid) and int(index) in self.interfaces:
+                descr, octets = self.interfaces[int(index)]
+                values[oid] = octets if column == ifInOctetsOid else descr.encode('iso-8859-1')
+            else:
+                values[oid] = Snmp.VarBindError('noSuchInstance')
+        return values
+
+
+class test_SnmpIndexCache(unittest.TestCase):
+
+    def setUp(self):
+        self._directory     = tempfile.TemporaryDirectory()
+        self._stateFile     = StateFile.StateFile(myDebug, 'index_cache', self._directory.name)
+        self._snmp          = FakeSnmp({ 1 : ('lo', 10), 2 : ('eth0', 20), 3 : ('eth1', 30) })
+
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+
+    def _getRow(self, descr):
+        myIndexCache = SnmpIndexCache.SnmpIndexCache(myDebug, self._stateFile)
+        requestsBefore  = self._snmp.requests
+        row             = myIndexCache.getRow(self._snmp, testHostIp, ifDescrOid, descr, [ ifInOctetsOid ])
+        return row, self._snmp.requests - requestsBefore
+
+
+    def test1_getRow(self):
+        """
+        Given an interface name, read twice
+        should walk ifDescr the first time only : the second time is a single GET, with the same result
+        """
+        self.assertEqual(self._getRow('eth0'), ({ ifInOctetsOid : 20 }, 2))
+        self.assertEqual(self._getRow('eth0'), ({ ifInOctetsOid : 20 }, 1))
+
+
+    def test2_getRow(self):
+        """
+        Given a cached index which doesn't match the interface name anymore (interfaces renumbered)
+        should walk ifDescr again, return the right row, and refresh the cache
+        """
+        self._getRow('eth0')
+        self._snmp.interfaces = { 1 : ('lo', 10), 2 : ('eth1', 30), 3 : ('eth0', 20) }
+        self.assertEqual(self._getRow('eth0'), ({ ifInOctetsOid : 20 }, 3))
+        self.assertEqual(self._stateFile.load()[testHostIp][ifDescrOid]['indexes']['eth0'], '3')
+        self.assertEqual(self._getRow('eth0'), ({ ifInOctetsOid : 20 }, 1))
+
+
+    def test3_getRow(self):
+        """
+        Given an unknown interface name
+        should return None
+        """
+        self.assertIsNone(self._getRow('no such interface')[0])
+
+
+    def test4_getRow(self):
+        """
+        Given an agent restarted right after the walk, which sysUpTime is already greater than at the walk time
+        (index 2 is still 'eth0' : only the validator tells)
+        should detect the restart from the boot time, and walk ifDescr again
+        """
+        self._getRow('eth0')
+        self._snmp.sysUpTime        += 60 * CounterStore.TICKSPERSECOND     # booted 1 minute later than before
+        self._snmp.interfaces[2]    = ('eth0', 0)
+        self.assertEqual(self._getRow('eth0'), ({ ifInOctetsOid : 0 }, 3))
+        self.assertEqual(self._getRow('eth0'), ({ ifInOctetsOid : 0 }, 1))
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import asyncio
+import socket
+
+from modules import Debug
+from modules import Snmp
+from modules import SnmpPoller
+from testU import SnmpTestAgent
+
+myDebug     = Debug.Debug()
+myDebug.enable(False)
+
+# test variables
+testHostCommunity   = 'public'
+invalidIpAddress    = '123.456.789.876'
+invalidOid          = '2.3.4.5.6.7.8'
+
+class test_SnmpPoller(unittest.TestCase):
+
+    def test1_pollAll(self):
+        """
+        Given a local test agent polled with SNMP v1 and v2c, OIDs = '1.3.6.1.2.1.1.7.0' + a non-existing OID,
+        and a walk of '1.3.6.1.2.1.1.9.1.2' (8 rows)
+        Should return 2 results with 72, a VarBindError, and the same 8 rows
+        """
+        myAgent = SnmpTestAgent.SnmpTestAgent()
+        try:
+            myPoller = SnmpPoller.SnmpPoller(myDebug)
+            targets = [ {
+                'host'      : '127.0.0.1',
+                'port'      : myAgent.getPort(),
+                'community' : testHostCommunity,
+                'version'   : version,
+                'get'       : [ '1.3.6.1.2.1.1.7.0', invalidOid ],
+                'walk'      : [ '1.3.6.1.2.1.1.9.1.2' ],
+                } for version in ('1', '2c') ]
+            results = list(myPoller.pollAll(targets))
+        finally:
+            myAgent.stop()
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(result['error'], None)
+            self.assertEqual(result['get']['1.3.6.1.2.1.1.7.0'], 72)
+            self.assertTrue(isinstance(result['get'][invalidOid], Snmp.VarBindError))
+            self.assertEqual(len(result['walk']['1.3.6.1.2.1.1.9.1.2']), 8)
+        self.assertEqual(results[0]['walk'], results[1]['walk'])
+
+
+    def test2_pollAll(self):
+        """
+        Given an agent that never answers, an invalid IP address and an SNMPv3 agent
+        Should return a result with an error for each, and count 1 timeout
+        """
+        silentAgent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silentAgent.bind(('127.0.0.1', 0))
+        myPoller = SnmpPoller.SnmpPoller(myDebug, timeoutMilliseconds=50, retries=1)
+        targets = [
+            { 'host' : '127.0.0.1', 'port' : silentAgent.getsockname()[1], 'get' : [ '1.3.6.1.2.1.1.7.0' ] },
+            { 'host' : invalidIpAddress, 'get' : [ '1.3.6.1.2.1.1.7.0' ] },
+            { 'host' : '127.0.0.1', 'version' : '3', 'get' : [ '1.3.6.1.2.1.1.7.0' ] },
+            ]
+        results = list(myPoller.pollAll(targets))
+        silentAgent.close()
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result['error'] for result in results))
+        self.assertEqual(myPoller.getStats()['timeouts'], 1)
+        self.assertEqual(myPoller.getStats()['retries'], 1)
+
+
+    def test3__walk(self):
+        """
+        Given an SNMP v2c agent with a 500 rows column, answering 'tooBig' to more than 12 repetitions, then with an
+        agent answering 'genErr' after 100 rows
+        Should return the 500 rows with a few 'tooBig' only, then None
+        """
+        myPoller = SnmpPoller.SnmpPoller(myDebug)
+        myPoller._loadPysnmp()
+        api         = SnmpPoller.api
+        agent       = { 'pMod' : api.protoModules[api.protoVersion2c] }
+        columnOid   = (1, 3, 6, 1, 2, 1, 2, 2, 1, 10)
+        requests    = []
+
+        def getFakeRequest(rows, maxRepetitions, failAfterRow=None):
+            async def fakeRequest(agent, pduType, OIDs, repetitions=0):
+                requests.append(repetitions)
+                if repetitions > maxRepetitions:
+                    return 'tooBig', 0, []
+                firstRow = int(SnmpPoller.univ.ObjectIdentifier(OIDs[0])[-1]) if len(OIDs[0]) > len(columnOid) else 0
+                if failAfterRow is not None and firstRow >= failAfterRow:
+                    return 'genErr', 1, []
+                lastRow  = min(firstRow + repetitions, rows)
+                varBinds = [ (SnmpPoller.univ.ObjectIdentifier(columnOid + (row, )), api.v2c.Counter32(row))
+                    for row in range(firstRow + 1, lastRow + 1) ]
+                if lastRow < firstRow + repetitions:
+                    varBinds.append((SnmpPoller.univ.ObjectIdentifier(columnOid + (lastRow, )), api.v2c.EndOfMibView()))
+                return None, 0, varBinds
+            return fakeRequest
+
+        myPoller._request = getFakeRequest(rows=500, maxRepetitions=12)
+        result = asyncio.run(myPoller._walk(agent, '1.3.6.1.2.1.2.2.1.10'))
+        self.assertEqual(len(result), 500)
+        self.assertTrue(sum(repetitions > 12 for repetitions in requests) <= 3, requests)
+
+        myPoller._request = getFakeRequest(rows=500, maxRepetitions=1000, failAfterRow=100)
+        self.assertEqual(asyncio.run(myPoller._walk(agent, '1.3.6.1.2.1.2.2.1.10')), None)
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+from modules import SnmpSession
+from testU import SnmpTestAgent
+
+# test variables
+testHostIp          = '192.168.1.101'
+testHostPort        = 161
+testHostCommunity   = 'public'
+testHostVersion     = '2c'
+invalidIpAddress    = '123.456.789.876'
+
+class test_SnmpSession(unittest.TestCase):
+
+    def test1_getSession(self):
+        """
+        Given the same host, port and credentials twice, then another community
+        Should return the same session twice, then another one
+        """
+        session1 = SnmpSession.getSession(testHostIp, testHostPort, testHostCommunity, testHostVersion)
+        session2 = SnmpSession.getSession(testHostIp, testHostPort, testHostCommunity, testHostVersion)
+        session3 = SnmpSession.getSession(testHostIp, testHostPort, 'private', testHostVersion)
+        self.assertTrue(session1 is session2)
+        self.assertFalse(session1 is session3)
+
+
+    def test2_getSession(self):
+        """
+        Given more agents than MAXSESSIONS
+        Should close and forget the session used least recently, and keep the others
+        """
+        maxSessions = SnmpSession.MAXSESSIONS
+        SnmpSession.MAXSESSIONS = 2
+        try:
+            SnmpSession.clearSessions()
+            session1 = SnmpSession.getSession('127.0.0.1', 16101)
+            session1._open()
+            session2 = SnmpSession.getSession('127.0.0.1', 16102)
+            self.assertTrue(SnmpSession.getSession('127.0.0.1', 16101) is session1)
+            SnmpSession.getSession('127.0.0.1', 16103)
+            self.assertTrue(SnmpSession.getSession('127.0.0.1', 16101) is session1)
+            self.assertFalse(SnmpSession.getSession('127.0.0.1', 16102) is session2)
+            SnmpSession.getSession('127.0.0.1', 16104)
+            self.assertIsNone(session1._engine)
+        finally:
+            SnmpSession.MAXSESSIONS = maxSessions
+            SnmpSession.clearSessions()
+
+
+    def test1_request(self):
+        """
+        Given a session with a local test agent, and 2 GET requests
+        Should return the values, and count 2 requests with bytes sent and received
+        """
+        myAgent = SnmpTestAgent.SnmpTestAgent()
+        try:
+            mySession = SnmpSession.SnmpSession('127.0.0.1', myAgent.getPort(), testHostCommunity, testHostVersion)
+            for i in range(2):
+                errorIndication, errorStatus, errorIndex, varBinds = mySession.request('get', ['1.3.6.1.2.1.1.7.0'])
+                self.assertIsNone(errorIndication)
+                self.assertEqual(int(varBinds[0][1]), 72)
+            stats = mySession.getStats()
+            self.assertEqual(stats['requests'], 2)
+            self.assertEqual(stats['timeouts'], 0)
+            self.assertEqual(myAgent.requests, 2)
+            self.assertTrue(stats['bytesSent'] > 0 and stats['bytesReceived'] > 0)
+            mySession.close()
+        finally:
+            myAgent.stop()
+
+
+    def test2_request(self):
+        """
+        Given an invalid IP address
+        Should raise an error on the first request, and build nothing
+        """
+        mySession = SnmpSession.SnmpSession(invalidIpAddress, testHostPort, testHostCommunity, testHostVersion)
+        with self.assertRaises(Exception):
+            mySession.request('get', ['1.3.6.1.2.1.1.7.0'])
+        self.assertEqual(mySession.getStats()['bytesSent'], 0)
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import math
+
+from modules import SnmpTable
+
+# hrStorageTable columns, as returned by Snmp.walk() with the column OID removed
+storageWalks = {
+    'descr' : { (1,) : b'Physical memory', (2,) : b'Virtual memory', (10,) : b'Swap space', (31,) : b'/' },
+    'units' : { (1,) : 1024, (2,) : 1024, (10,) : 1024, (31,) : 4096 },
+    'size'  : { (1,) : 8000000, (2,) : 12000000, (31,) : 2500000 },      # no size for row 10
+    'used'  : { (1,) : 6000000, (2,) : 7000000, (10,) : 0, (31,) : 1000000 },
+    }
+
+
+class test_SnmpTable(unittest.TestCase):
+
+    def test1_fromWalks(self):
+        """
+        Given 4 column walks, one of them missing a row,
+        should join them on the index, rows sorted numerically, the missing value being NaN
+        """
+        myTable = SnmpTable.SnmpTable.fromWalks(storageWalks)
+        self.assertEqual(len(myTable), 4)
+        self.assertEqual(list(myTable.getIndexes()), [ (1,), (2,), (10,), (31,) ])
+        self.assertEqual(list(myTable.getColumn('descr')), [ b'Physical memory', b'Virtual memory', b'Swap space', b'/' ])
+        self.assertEqual(myTable.getColumn('size').dtype.kind, 'f')
+        self.assertTrue(math.isnan(myTable.getColumn('size')[2]))
+
+
+    def test2_fromWalks(self):
+        """
+        Given column walks having the same rows, one of them of Counter64 values over 2^63,
+        should keep the rows in the order of the walks (the agent order), and the exact integer values
+        """
+        counters = { index : 2 ** 64 - row for row, index in enumerate(storageWalks['used'], 1) }
+        myTable = SnmpTable.SnmpTable.fromWalks({ 'used' : storageWalks['used'], 'counter' : counters })
+        self.assertEqual(list(myTable.getIndexes()), list(storageWalks['used']))
+        self.assertEqual(list(myTable.getColumn('used')), list(storageWalks['used'].values()))
+        self.assertEqual(myTable.getColumn('counter').dtype.kind, 'u')
+        self.assertEqual([ int(value) for value in myTable.getColumn('counter') ], list(counters.values()))
+
+
+    def test1_getRow(self):
+        """
+        Given a row index,
+        should return the values of all the columns for this row, or None for an unknown index
+        """
+        myTable = SnmpTable.SnmpTable.fromWalks(storageWalks)
+        self.assertEqual(myTable.getRow((31,)), { 'descr' : b'/', 'units' : 4096, 'size' : 2500000, 'used' : 1000000 })
+        self.assertIsNone(myTable.getRow((42,)))
+
+
+    def test1_getRowsWhere(self):
+        """
+        Given descr == b'/',
+        should return a table of this row only, which columns can be computed on
+        """
+        rootTable = SnmpTable.SnmpTable.fromWalks(storageWalks).getRowsWhere('descr', b'/')
+        self.assertEqual(list(rootTable.getIndexes()), [ (31,) ])
+        self.assertEqual(rootTable.getRow((31,))['descr'], b'/')
+        usedPercent = 100 * rootTable.getColumn('used') / rootTable.getColumn('size')
+        self.assertEqual(list(usedPercent), [ 40 ])
+
+
+    def test1_filter(self):
+        """
+        Given a mask computed on a numeric column,
+        should keep the rows selected by the mask
+        """
+        myTable = SnmpTable.SnmpTable.fromWalks(storageWalks)
+        usedBytes = myTable.getColumn('used') * myTable.getColumn('units')
+        self.assertEqual(list(myTable.filter(usedBytes > 6.5e9).getIndexes()), [ (2,) ])
+
+
+#if __name__ == '__main__':
+#    unittest.main()
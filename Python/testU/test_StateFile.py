@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+import tempfile
+import threading
+
+from modules import Debug
+from modules import StateFile
+
+myDebug     = Debug.Debug()
+myDebug.enable(False)
+
+
+class test_StateFile(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+
+    def test1_load(self):
+        """
+        Given a state file that doesn't exist yet, then a corrupted one
+        Should return an empty state both times
+        """
+        myStateFile = StateFile.StateFile(myDebug, 'host/1', directory=self._directory.name)
+        self.assertEqual(myStateFile.load(), {})
+        with open(myStateFile.getPath(), 'w') as stateFile:
+            stateFile.write('{"truncated')
+        self.assertEqual(myStateFile.load(), {})
+
+
+    def test1_save(self):
+        """
+        Given a state saved, then loaded by another StateFile with the same name
+        Should load the same state, and leave no temporary file
+        """
+        StateFile.StateFile(myDebug, 'host/1', directory=self._directory.name).save({ 'a' : [ 1, 2 ] })
+        self.assertEqual(StateFile.StateFile(myDebug, 'host/1', directory=self._directory.name).load(), { 'a' : [ 1, 2 ] })
+        self.assertEqual(os.listdir(self._directory.name), [ 'host_1.json' ])
+
+
+    def test1_update(self):
+        """
+        Given 20 threads incrementing the same counter with update()
+        Should end with 20
+        """
+        def increment(state):
+            state['counter'] = state.get('counter', 0) + 1
+        threads = [ threading.Thread(target=lambda: StateFile.StateFile(myDebug, 'counter',
+            directory=self._directory.name).update(increment)) for i in range(20) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(StateFile.StateFile(myDebug, 'counter', directory=self._directory.name).load()['counter'], 20)
+
+
+#if __name__ == '__main__':
+#    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+from modules import StreamMatcher
+
+
+class test_StreamMatcher(unittest.TestCase):
+
+    def test1_feed(self):
+        """
+        Given a pattern found in the 2nd chunk,
+        should return False for the 1st chunk and True for the 2nd one
+        """
+        myMatcher = StreamMatcher.StreamMatcher([b'kate'])
+        self.assertFalse(myMatcher.feed(b'<html><body>'))
+        self.assertTrue(myMatcher.feed(b'<p>kate</p>'))
+        self.assertTrue(myMatcher.isFound())
+
+
+    def test2_feed(self):
+        """
+        Given a pattern spanning 3 chunks,
+        should find it
+        """
+        myMatcher = StreamMatcher.StreamMatcher([b'sans fausse note'])
+        for chunk in (b'xxxx sans f', b'auss', b'e note xxx'):
+            found = myMatcher.feed(chunk)
+        self.assertTrue(found)
+
+
+    def test3_feed(self):
+        """
+        Given a pattern that is never found,
+        should return False
+        """
+        myMatcher = StreamMatcher.StreamMatcher([b'k.te'])
+        for chunk in (b'kit', b'a', b'k', b'ut'):
+            self.assertFalse(myMatcher.feed(chunk))
+        self.assertFalse(myMatcher.isFound())
+
+
+    def test4_feed(self):
+        """
+        Given required and forbidden patterns, some of them overlapping each other,
+        should report which were found and which were not
+        """
+        myMatcher = StreamMatcher.StreamMatcher(
+            required    = [b'Gala', b'alan', b'missing'],
+            forbidden   = [b'Fatal error', b'Exception']
+            )
+        for chunk in (b'<title>Galan', b'tine</title> Fatal', b' error on line 42'):
+            self.assertFalse(myMatcher.feed(chunk))
+        self.assertFalse(myMatcher.isFound())
+        self.assertEqual(myMatcher.getFoundRequired(), [b'Gala', b'alan'])
+        self.assertEqual(myMatcher.getMissingRequired(), [b'missing'])
+        self.assertEqual(myMatcher.getFoundForbidden(), [b'Fatal error'])
+
+
+    def test5_feed(self):
+        """
+        Given required patterns only,
+        should return True as soon as all of them were found
+        """
+        myMatcher = StreamMatcher.StreamMatcher(required=[b'one', b'two'])
+        self.assertFalse(myMatcher.feed(b'two, '))
+        self.assertTrue(myMatcher.feed(b'one'))
+        self.assertTrue(myMatcher.isFound())
+
+
+# uncomment this to run this unit test manually
+#if __name__ == '__main__':
+#    unittest.main()
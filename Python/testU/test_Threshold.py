@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+########################################## ##########################################################
+# allows importing from parent folder
+# source : http://stackoverflow.com/questions/714063/python-importing-modules-from-parent-folder
+import os
+parentdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.sys.path.insert(0,parentdir)
+########################################## ##########################################################
+
+
+from modules import NagiosPlugin
+from modules import Threshold
+
+
+class test_Threshold(unittest.TestCase):
+
+    def test1_getStatus(self):
+        """
+        Given the ranges of the Nagios guidelines,
+        should alert outside of them, or inside with '@'
+        """
+        for warning, okValues, alertValues in (
+                ('10',      [0, 5, 10],     [-1, 10.5]),
+                ('10:',     [10, 1000],     [9.9, -5]),
+                ('~:10',    [-1000, 10],    [11]),
+                ('10:20',   [10, 15, 20],   [9, 21]),
+                ('@10:20',  [9, 21],        [10, 15, 20]),
+                ):
+            myThreshold = Threshold.Threshold(warning, None)
+            self.assertEqual([ myThreshold.getStatus(value) for value in okValues ], ['OK'] * len(okValues), warning)
+            self.assertEqual([ myThreshold.getStatus(value) for value in alertValues ], ['WARNING'] * len(alertValues), warning)
+
+
+    def test1_RANGERULE(self):
+        """
+        Given valid and invalid ranges,
+        should only match the valid ones
+        """
+        import re
+        for threshold in ('10', '10:', '~:10', ':10', '10:20', '@10:20', '-5.5:3'):
+            self.assertTrue(re.search('^' + Threshold.RANGERULE + '$', threshold), threshold)
+        for threshold in ('', '@', '~:', ':', 'abc', '10:20:30'):
+            self.assertFalse(re.search('^' + Threshold.RANGERULE + '$', threshold), threshold)
+
+
+    def test2_getStatus(self):
+        """
+        Given invertible plain numbers,
+        should behave like NagiosPlugin.computeExitStatus() always did, values equal to warn being WARNING
+        """
+        self.assertEqual(Threshold.Threshold(2, 3, invertible=True).getStatus(2), 'WARNING')
+        self.assertEqual(Threshold.Threshold(2, 3, invertible=True).getStatus(1.9), 'OK')
+        self.assertEqual(Threshold.Threshold(3, 2, invertible=True).getStatus(1), 'CRITICAL')
+        self.assertEqual(Threshold.Threshold('0', '0', invertible=True).getStatus(99), NagiosPlugin.okNoWarnString)
+
+
+    def test3_Threshold(self):
+        """
+        Given invalid ranges,
+        should raise ValueError
+        """
+        for threshold in ('abc', '@', '20:10', '1:2:3'):
+            with self.assertRaises(ValueError):
+                Threshold.Threshold(threshold, None)
+
+
+    def test4_getStatuses(self):
+        """
+        Given an array of values,
+        should return the same statuses as getStatus() for each value, and the worst one
+        """
+        values = [ -5, 0, 10, 15, 20, 25, 30, 31 ]
+        for warning, critical, invertible in (('10:20', '0:30', False), ('@10:20', '~:30', False), ('20', '30', True), ('20', '10', True)):
+            myThreshold = Threshold.Threshold(warning, critical, invertible=invertible)
+            states, worstStatus = myThreshold.getStatuses(values)
+            self.assertEqual([ Threshold.STATUSES[state] for state in states ], [ myThreshold.getStatus(value) for value in values ])
+            self.assertEqual(worstStatus, 'CRITICAL')
+
+
+#if __name__ == '__main__':
+#    unittest.main()
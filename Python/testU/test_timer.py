@@ -31,6 +31,25 @@ class test_Timer(unittest.TestCase):
         self.assertTrue((sleepDuration > sleepDurationMicroseconds) and (sleepDuration < (2 * sleepDurationMicroseconds)))
 
 
+    def test2_lap(self):
+        """
+        Given spans closed one after the other, one of them twice,
+        should return each span in ms, the repeated one added up, and no more than the whole duration
+        """
+        obj = modules.timer.Timer()
+        obj.start()
+        time.sleep(0.002)
+        obj.lap('first')
+        obj.lap('second')
+        time.sleep(0.002)
+        obj.lap('first')
+        wholeDurationMilliseconds = obj.stop() / 1000
+        spans = obj.getSpansMilliseconds()
+        self.assertEqual(sorted(spans), ['first', 'second'])
+        self.assertTrue(spans['first'] >= 4)
+        self.assertTrue(spans['first'] + spans['second'] <= wholeDurationMilliseconds + 0.001)     # stop() rounds down to the µs
+
+
 # uncomment this to run this unit test manually
 #if __name__ == '__main__':
 #    unittest.main()